@@ -522,11 +522,29 @@ function AppContent() {
               {properties.map((property) => (
                 <Card key={property.id} className="group overflow-hidden border-0 shadow-lg hover:shadow-2xl transition-all duration-500 bg-white rounded-2xl">
                   <div className="relative overflow-hidden">
-                    <img
-                      src={property.main_image || luxuryVilla1}
-                      alt={property.title}
-                      className="w-full h-64 object-cover group-hover:scale-110 transition-transform duration-700"
-                    />
+                    <picture>
+                      {property.main_image_variants?.sources.map((source) => (
+                        <source
+                          key={source.type}
+                          type={source.type}
+                          srcSet={source.srcset}
+                          sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                        />
+                      ))}
+                      <img
+                        src={property.main_image_variants?.src || property.main_image || luxuryVilla1}
+                        alt={property.title}
+                        width={property.main_image_variants?.width}
+                        height={property.main_image_variants?.height}
+                        loading="lazy"
+                        decoding="async"
+                        style={property.main_image_variants ? {
+                          backgroundImage: `url(${property.main_image_variants.placeholder})`,
+                          backgroundSize: 'cover'
+                        } : undefined}
+                        className="w-full h-64 object-cover group-hover:scale-110 transition-transform duration-700"
+                      />
+                    </picture>
                     <div className="absolute top-4 left-4 flex gap-2">
                       {property.featured && (
                         <Badge className="bg-amber-500 hover:bg-amber-600 text-white">
@@ -0,0 +1,135 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import func
+from src.models.user import db
+from src.models.subscription import OutboxEvent
+from src.routes.auth import require_role
+from src.utils.detail_cache import detail_cache
+from src.utils.outbox import outbox_dispatcher
+from src.utils.perf import registry as perf_registry
+from src.utils.query_log import query_log
+from src.utils.startup import import_timings_ms
+from src.utils.user_search import MAX_PAGE_SIZE, SEARCH_FIELDS, search_users
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/perf', methods=['GET'])
+@require_role('admin')
+def get_perf_stats():
+    """Get per-endpoint performance statistics (admin only)"""
+    try:
+        if request.args.get('format') == 'prometheus':
+            return current_app.response_class(
+                perf_registry.prometheus_text(),
+                mimetype='text/plain; version=0.0.4'
+            )
+
+        return jsonify({
+            'endpoints': perf_registry.snapshot(),
+            'startup_imports_ms': import_timings_ms(),
+            'detail_cache': dict(detail_cache.stats),
+            'outbox': dict(outbox_dispatcher.stats)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch performance stats', 'details': str(e)}), 500
+
+@admin_bp.route('/perf/reset', methods=['POST'])
+@require_role('admin')
+def reset_perf_stats():
+    """Reset performance statistics (admin only)"""
+    perf_registry.reset()
+    return jsonify({'message': 'Performance statistics reset'}), 200
+
+@admin_bp.route('/queries', methods=['GET'])
+@require_role('admin')
+def get_query_report():
+    """Get slow-query fingerprints and N+1 offenders (admin only)"""
+    try:
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        return jsonify(query_log.report(limit=limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch query report', 'details': str(e)}), 500
+
+@admin_bp.route('/queries/reset', methods=['POST'])
+@require_role('admin')
+def reset_query_report():
+    """Reset query statistics (admin only)"""
+    query_log.reset()
+    return jsonify({'message': 'Query statistics reset'}), 200
+
+@admin_bp.route('/users/search', methods=['GET'])
+@require_role('admin')
+def search_user_directory():
+    """Search users by email, username or phone prefix with filters (admin only)"""
+    try:
+        query = (request.args.get('q') or '').strip() or None
+        field = request.args.get('field') or None
+        limit = max(1, min(request.args.get('limit', 20, type=int), MAX_PAGE_SIZE))
+
+        if field and field not in SEARCH_FIELDS:
+            return jsonify({'error': f"field must be one of {', '.join(SEARCH_FIELDS)}"}), 400
+
+        is_active = request.args.get('is_active')
+        filters = {
+            'role': request.args.get('role') or None,
+            'subscription_type': request.args.get('subscription_type') or None,
+            'is_active': None if is_active in (None, '') else is_active.lower() in ('1', 'true', 'yes')
+        }
+
+        try:
+            users, next_cursor, total, total_is_estimate = search_users(
+                query, field=field, filters=filters, cursor=request.args.get('cursor'), limit=limit
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'users': [user.to_dict() for user in users],
+            'next_cursor': next_cursor,
+            'total': total,
+            'total_is_estimate': total_is_estimate
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to search users', 'details': str(e)}), 500
+
+@admin_bp.route('/outbox', methods=['GET'])
+@require_role('admin')
+def get_outbox():
+    """Get outbox counts by status and the most recent events in one status (admin only)"""
+    try:
+        status = request.args.get('status', 'failed')
+        limit = min(request.args.get('limit', 50, type=int), 200)
+
+        counts = dict(db.session.query(OutboxEvent.status, func.count(OutboxEvent.id)).group_by(OutboxEvent.status).all())
+        events = OutboxEvent.query.filter_by(status=status).order_by(OutboxEvent.id.desc()).limit(limit).all()
+
+        return jsonify({
+            'counts': counts,
+            'events': [outbox_event.to_dict() for outbox_event in events]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch outbox', 'details': str(e)}), 500
+
+@admin_bp.route('/outbox/<int:event_id>/retry', methods=['POST'])
+@require_role('admin')
+def retry_outbox_event(event_id):
+    """Requeue a failed outbox event (admin only)"""
+    try:
+        changed = OutboxEvent.query.filter(OutboxEvent.id == event_id, OutboxEvent.status == 'failed').update(
+            {'status': 'pending', 'attempts': 0, 'next_attempt_at': datetime.utcnow(), 'last_error': None},
+            synchronize_session=False
+        )
+        db.session.commit()
+        if not changed:
+            return jsonify({'error': 'Failed outbox event not found'}), 404
+
+        outbox_dispatcher.wake()
+        return jsonify({'message': 'Outbox event requeued'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to requeue outbox event', 'details': str(e)}), 500
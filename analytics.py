@@ -0,0 +1,49 @@
+from flask import Blueprint, request, jsonify
+from src.utils.price_analytics import price_analytics
+
+analytics_bp = Blueprint('analytics', __name__)
+
+def _segment_args():
+    return {
+        'status': request.args.get('status'),
+        'location': request.args.get('location'),
+        'property_type': request.args.get('property_type')
+    }
+
+@analytics_bp.route('/prices', methods=['GET'])
+def get_price_stats():
+    """Get price and price per sq ft statistics for a location and/or property type"""
+    try:
+        segment = _segment_args()
+        return jsonify(dict(segment, stats=price_analytics.summary(**segment))), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch price statistics', 'details': str(e)}), 500
+
+@analytics_bp.route('/prices/trend', methods=['GET'])
+def get_price_trend():
+    """Get the monthly average price per sq ft for a segment"""
+    try:
+        segment = _segment_args()
+        return jsonify(dict(segment, trend=price_analytics.trend(**segment))), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch price trend', 'details': str(e)}), 500
+
+@analytics_bp.route('/prices/breakdown', methods=['GET'])
+def get_price_breakdown():
+    """Get price statistics for every location or property type"""
+    try:
+        dimension = request.args.get('by', 'location')
+        if dimension not in ('location', 'property_type'):
+            return jsonify({'error': 'by must be location or property_type'}), 400
+
+        status = request.args.get('status')
+        return jsonify({
+            'by': dimension,
+            'status': status or 'For Sale',
+            'segments': price_analytics.breakdown(status=status, dimension=dimension)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch price breakdown', 'details': str(e)}), 500
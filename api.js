@@ -130,7 +130,16 @@ export const propertiesAPI = {
   },
 
   getProperty: async (id) => {
-    return await apiRequest(`/properties/${id}`)
+    return await apiRequest(`/properties/${id}/detail`)
+  },
+
+  searchProperties: async (query, { features = [], location, limit = 20 } = {}) => {
+    const params = new URLSearchParams()
+    if (query) params.append('q', query)
+    features.forEach((feature) => params.append('feature', feature))
+    if (location) params.append('location', location)
+    params.append('limit', limit)
+    return await apiRequest(`/properties/search?${params.toString()}`)
   },
 
   createProperty: async (propertyData) => {
@@ -174,9 +183,9 @@ export const propertiesAPI = {
   },
 
   createInquiry: async (propertyId, inquiryData) => {
-    return await apiRequest(`/properties/${propertyId}/inquire`, {
+    return await apiRequest('/leads/inquiries', {
       method: 'POST',
-      body: JSON.stringify(inquiryData),
+      body: JSON.stringify({ ...inquiryData, property_id: propertyId }),
     })
   },
 
@@ -190,6 +199,26 @@ export const propertiesAPI = {
       body: JSON.stringify({ properties }),
     })
   },
+
+  // Returns responsive variants; store each image's `src` in main_image / gallery_images
+  uploadImages: async (files) => {
+    const formData = new FormData()
+    Array.from(files).forEach((file) => formData.append('images', file))
+
+    const token = getAuthToken()
+    const response = await fetch(`${API_BASE_URL}/media/images`, {
+      method: 'POST',
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      body: formData,
+    })
+    const data = await response.json()
+
+    if (!response.ok) {
+      throw new Error(data.error || `HTTP error! status: ${response.status}`)
+    }
+
+    return data
+  },
 }
 
 // Users API
@@ -198,6 +227,18 @@ export const usersAPI = {
     return await apiRequest(`/users?page=${page}&per_page=${perPage}`)
   },
 
+  // Admin directory search: q matches an email, username or phone prefix; pass next_cursor to page
+  searchUsers: async ({ q, field, role, subscriptionType, isActive, cursor, limit = 20 } = {}) => {
+    const params = new URLSearchParams({ limit })
+    Object.entries({ q, field, role, subscription_type: subscriptionType, is_active: isActive, cursor })
+      .forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') {
+          params.append(key, value)
+        }
+      })
+    return await apiRequest(`/admin/users/search?${params.toString()}`)
+  },
+
   getUser: async (id) => {
     return await apiRequest(`/users/${id}`)
   },
@@ -298,6 +339,78 @@ export const marketingAPI = {
   },
 }
 
+// Lead inbox API
+export const leadsAPI = {
+  getCounts: async () => {
+    return await apiRequest('/leads/inbox/counts')
+  },
+
+  getInbox: async ({ role = 'owner', status, cursor, limit = 20 } = {}) => {
+    const params = new URLSearchParams({ role, limit })
+    if (status) params.append('status', status)
+    if (cursor) params.append('cursor', cursor)
+    return await apiRequest(`/leads/inbox?${params.toString()}`)
+  },
+
+  updateStatus: async (ids, status) => {
+    return await apiRequest('/leads/inbox/status', {
+      method: 'POST',
+      body: JSON.stringify({ ids, status }),
+    })
+  },
+}
+
+// Batch API: several requests in one round-trip, e.g.
+// batchAPI.run([{ id: 'me', path: '/api/auth/me' }, { id: 'plans', path: '/api/subscription/plans' }])
+// resolves to { me: { status, body }, plans: { status, body } }
+export const batchAPI = {
+  run: async (requests) => {
+    const response = await apiRequest('/batch', {
+      method: 'POST',
+      body: JSON.stringify({ requests }),
+    })
+
+    return Object.fromEntries(
+      response.responses.map((result, index) => [result.id ?? index, { status: result.status, body: result.body }])
+    )
+  },
+}
+
+// Real-time events (campaign.metrics, inquiry.created, resync after dropped events); returns a close function.
+// Each connection uses a fresh single-use ticket, so the session token never goes into a URL.
+export const subscribeEvents = (handlers = {}) => {
+  let source = null
+  let closed = false
+  let retryTimer = null
+
+  const connect = async () => {
+    try {
+      const { ticket } = await apiRequest('/stream/ticket', { method: 'POST' })
+      if (closed) return
+
+      source = new EventSource(`${API_BASE_URL}/stream?ticket=${encodeURIComponent(ticket)}`)
+      Object.entries(handlers).forEach(([eventType, handler]) => {
+        source.addEventListener(eventType, (event) => handler(JSON.parse(event.data)))
+      })
+      source.onerror = () => {
+        // The browser's own retry would reuse the spent ticket; reconnect with a new one instead
+        source.close()
+        if (!closed) retryTimer = setTimeout(connect, 3000)
+      }
+    } catch (error) {
+      if (!closed) retryTimer = setTimeout(connect, 10000)
+    }
+  }
+
+  connect()
+
+  return () => {
+    closed = true
+    clearTimeout(retryTimer)
+    if (source) source.close()
+  }
+}
+
 // Utility functions
 export const utils = {
   formatPrice: (price, currency = 'AED') => {
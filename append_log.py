@@ -0,0 +1,104 @@
+import fcntl
+import glob
+import os
+import time
+import uuid
+
+class AppendLog:
+    """Per-process append-only log that lets buffered writes survive a worker crash or restart
+
+    Every process writes <prefix>-<owner>.log, where owner is unique per boot (pid plus a random suffix),
+    and holds an flock on <prefix>-<owner>.lock for its lifetime. The kernel drops the lock when the process
+    dies, so recovery adopts exactly the logs whose owner's lock is free, even when a restarted worker
+    reuses its predecessor's pid. Not thread-safe: callers serialize access with their own lock.
+    """
+
+    def __init__(self, log_dir, prefix):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.path = self._path(self.owner, 'log')
+        self.unconfirmed = []
+
+        os.makedirs(log_dir, exist_ok=True)
+        # Lock before the log exists, so no other process can see the log without a live lock
+        self._lock_file = open(self._path(self.owner, 'lock'), 'w')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._log = open(self.path, 'a')
+
+    def _path(self, owner, suffix):
+        return os.path.join(self.log_dir, f'{self.prefix}-{owner}.{suffix}')
+
+    def append(self, line):
+        self._log.write(line + '\n')
+
+    def sync(self):
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def _claim(self, path):
+        """Rename a log to one of this process's .flushing files; returns None if another process got it first"""
+        claimed = self._path(self.owner, f'{time.time_ns()}.flushing')
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            return None
+        self.unconfirmed.append(claimed)
+        return claimed
+
+    def rotate(self):
+        """Move the current log aside for flushing and start a new one; returns the claimed path"""
+        self._log.close()
+        claimed = self._claim(self.path)
+        self._log = open(self.path, 'a')
+        return claimed
+
+    def _owner_alive(self, owner):
+        try:
+            lock_file = open(self._path(owner, 'lock'), 'a')
+        except FileNotFoundError:
+            return False  # Logs written before lock files existed, or a lock already cleaned up
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return True
+        try:
+            os.remove(lock_file.name)
+        except FileNotFoundError:
+            pass
+        lock_file.close()
+        return False
+
+    def recover(self):
+        """Claim the logs of processes that exited before flushing; returns their lines"""
+        owners = set()
+        for path in glob.glob(os.path.join(self.log_dir, f'{self.prefix}-*')):
+            owner = os.path.basename(path)[len(self.prefix) + 1:].split('.', 1)[0]
+            if owner != self.owner:
+                owners.add(owner)
+
+        lines = []
+        for owner in owners:
+            if self._owner_alive(owner):
+                continue
+            for path in glob.glob(os.path.join(self.log_dir, f'{self.prefix}-{owner}.*')):
+                if path.endswith('.lock'):
+                    continue
+                claimed = self._claim(path)
+                if claimed:
+                    lines.extend(read_lines(claimed))
+        return lines
+
+    def confirm(self):
+        """Delete claimed logs once their contents are stored"""
+        for path in self.unconfirmed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.unconfirmed = []
+
+def read_lines(path):
+    with open(path) as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
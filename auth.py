@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.security import generate_password_hash
 from src.models.user import db, User, UserSession
+from src.utils.outbox import enqueue
 from datetime import datetime, timedelta
 import secrets
 import re
@@ -162,26 +163,12 @@ def logout():
 def get_current_user():
     """Get current user information"""
     try:
-        session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        
-        if not session_token:
-            return jsonify({'error': 'No session token provided'}), 401
-        
-        session = UserSession.query.filter_by(session_token=session_token, is_active=True).first()
-        
-        if not session or not session.is_valid():
-            return jsonify({'error': 'Invalid or expired session'}), 401
-        
-        user = session.user
-        if not user.is_active:
-            return jsonify({'error': 'Account is deactivated'}), 401
-        
-        # Extend session
-        session.extend_session()
-        db.session.commit()
+        session, error_response = authenticate_request()
+        if error_response is not None:
+            return error_response
         
         return jsonify({
-            'user': user.to_dict(include_sensitive=True)
+            'user': session.user.to_dict(include_sensitive=True)
         }), 200
         
     except Exception as e:
@@ -201,10 +188,11 @@ def forgot_password():
         
         if user:
             reset_token = user.generate_reset_token()
+            # The email goes out from the outbox; the handler reads the token from the user at send time
+            enqueue('user.password_reset_requested', 'user', user.id, {'user_id': user.id})
             db.session.commit()
             
-            # In a real application, you would send an email here
-            # For now, we'll just return the token (remove this in production)
+            # For now, we'll also return the token (remove this in production)
             return jsonify({
                 'message': 'Password reset instructions sent to your email',
                 'reset_token': reset_token  # Remove this in production
@@ -304,32 +292,60 @@ def change_password():
         db.session.rollback()
         return jsonify({'error': 'Password change failed', 'details': str(e)}), 500
 
+# Set by /api/batch for its sub-requests once it has authenticated the batch; WSGI environ
+# keys like this cannot be supplied by clients (headers arrive as HTTP_*)
+TRUSTED_SESSION_ENVIRON_KEY = 'app.batch.session_id'
+
+def _session_error(session):
+    """Error response if the session may not be used (missing, logged out, expired or deactivated user)"""
+    if not session or not session.is_active or not session.is_valid():
+        return jsonify({'error': 'Invalid or expired session'}), 401
+    
+    if not session.user.is_active:
+        return jsonify({'error': 'Account is deactivated'}), 401
+    
+    return None
+
+def authenticate_request():
+    """Validate the request's session token; returns (session, error_response)"""
+    trusted_session_id = request.environ.get(TRUSTED_SESSION_ENVIRON_KEY)
+    if trusted_session_id is not None:
+        # Skips the token lookup, not the checks: an earlier sub-request may have logged the session out
+        session = db.session.get(UserSession, trusted_session_id, populate_existing=True)
+        error_response = _session_error(session)
+        if error_response is not None:
+            return None, error_response
+        return session, None
+    
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    
+    if not session_token:
+        return None, (jsonify({'error': 'Authentication required'}), 401)
+    
+    session = UserSession.query.filter_by(session_token=session_token, is_active=True).first()
+    
+    error_response = _session_error(session)
+    if error_response is not None:
+        return None, error_response
+    
+    # Extend session
+    session.extend_session()
+    db.session.commit()
+    
+    return session, None
+
 def require_auth(f):
     """Decorator to require authentication"""
     from functools import wraps
     
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        
-        if not session_token:
-            return jsonify({'error': 'Authentication required'}), 401
-        
-        session = UserSession.query.filter_by(session_token=session_token, is_active=True).first()
-        
-        if not session or not session.is_valid():
-            return jsonify({'error': 'Invalid or expired session'}), 401
-        
-        user = session.user
-        if not user.is_active:
-            return jsonify({'error': 'Account is deactivated'}), 401
-        
-        # Extend session
-        session.extend_session()
-        db.session.commit()
+        session, error_response = authenticate_request()
+        if error_response is not None:
+            return error_response
         
         # Add user to request context
-        request.current_user = user
+        request.current_user = session.user
         request.current_session = session
         
         return f(*args, **kwargs)
@@ -0,0 +1,112 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, current_app, request, jsonify
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+from src.routes.auth import TRUSTED_SESSION_ENVIRON_KEY, authenticate_request
+
+batch_bp = Blueprint('batch', __name__)
+
+MAX_SUB_REQUESTS = 20
+READ_ONLY_METHODS = ('GET', 'HEAD')
+ALLOWED_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Not batchable: nested batches, and event streams that would hold an executor thread for their whole lifetime
+EXCLUDED_PREFIXES = ('/api/batch', '/api/stream')
+
+# Shared so a burst of batches cannot spawn unbounded threads
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='batch')
+
+def _validate(sub_requests):
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return 'No requests provided'
+    if len(sub_requests) > MAX_SUB_REQUESTS:
+        return f'At most {MAX_SUB_REQUESTS} requests per batch'
+    for sub_request in sub_requests:
+        if not isinstance(sub_request, dict):
+            return 'Each request must be an object'
+        path = sub_request.get('path')
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            return 'Each path must be an /api/ path'
+        if path.startswith(EXCLUDED_PREFIXES):
+            return f"{', '.join(EXCLUDED_PREFIXES)} cannot be called from a batch"
+        if sub_request.get('method', 'GET').upper() not in ALLOWED_METHODS:
+            return f"Unsupported method {sub_request.get('method')}"
+    return None
+
+def _run(app, sub_request, base_environ):
+    """Dispatch one sub-request through the full WSGI stack; returns its result entry"""
+    method = sub_request.get('method', 'GET').upper()
+    builder = EnvironBuilder(
+        path=sub_request['path'],
+        method=method,
+        json=sub_request['body'] if 'body' in sub_request else None,
+        headers={'Accept': 'application/json'}
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    environ.update(base_environ)
+
+    app_iter, status, headers = run_wsgi_app(app.wsgi_app, environ, buffered=True)
+    try:
+        body = b''.join(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+
+    content_type = headers.get('Content-Type', '')
+    if content_type.startswith('application/json'):
+        body = json.loads(body) if body else None
+    else:
+        body = body.decode('utf-8', 'replace')
+
+    return {'id': sub_request.get('id'), 'status': int(status.split(' ', 1)[0]), 'body': body}
+
+@batch_bp.route('', methods=['POST'])
+def run_batch():
+    """Run several API requests in one round-trip; consecutive reads run in parallel, writes in order"""
+    try:
+        data = request.get_json(silent=True) or {}
+        sub_requests = data.get('requests')
+
+        error = _validate(sub_requests)
+        if error:
+            return jsonify({'error': error}), 400
+
+        base_environ = {
+            'REMOTE_ADDR': request.remote_addr,
+            'HTTP_USER_AGENT': request.headers.get('User-Agent', '')
+        }
+        if request.headers.get('Authorization'):
+            # Authenticate once; sub-requests reuse the validated session instead of re-checking the token
+            session, error_response = authenticate_request()
+            if error_response is not None:
+                return error_response
+            base_environ[TRUSTED_SESSION_ENVIRON_KEY] = session.id
+            base_environ['HTTP_AUTHORIZATION'] = request.headers['Authorization']
+
+        app = current_app._get_current_object()
+        results = [None] * len(sub_requests)
+        position = 0
+        while position < len(sub_requests):
+            if sub_requests[position].get('method', 'GET').upper() not in READ_ONLY_METHODS:
+                # Writes are barriers: they run alone and in the order given
+                results[position] = _run(app, sub_requests[position], base_environ)
+                position += 1
+                continue
+
+            end = position
+            while end < len(sub_requests) and sub_requests[end].get('method', 'GET').upper() in READ_ONLY_METHODS:
+                end += 1
+            futures = {
+                index: _executor.submit(_run, app, sub_requests[index], base_environ)
+                for index in range(position, end)
+            }
+            for index, future in futures.items():
+                results[index] = future.result()
+            position = end
+
+        return jsonify({'responses': results}), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Batch request failed', 'details': str(e)}), 500
@@ -0,0 +1,118 @@
+"""Benchmark JSON encoding throughput for 100-row property and campaign pages.
+
+Run from the directory that contains the ``src`` package:
+
+    python -m src.benchmarks.json_serialization --iterations 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.models.user import User
+from src.models.property import Property
+from src.models.subscription import MarketingCampaign
+from src.utils.json_provider import FastJSONProvider
+
+def build_pages(rows=100):
+    """Build transient property and campaign pages shaped like list responses"""
+    now = datetime.utcnow()
+    agent = User(id=1, username='agent', email='agent@example.com', full_name='Agent Smith', phone='+971500000000')
+    properties = []
+    campaigns = []
+
+    for i in range(rows):
+        prop = Property(
+            id=i + 1,
+            title=f'Luxury Villa {i}',
+            description='Stunning waterfront villa with private beach access. ' * 8,
+            location='Palm Jumeirah, Dubai',
+            address=f'Frond {i % 16}, Palm Jumeirah',
+            latitude=25.112 + i * 0.0001,
+            longitude=55.138 + i * 0.0001,
+            price=12500000 + i * 1000,
+            currency='AED',
+            bedrooms=5,
+            bathrooms=6,
+            area=8500,
+            property_type='Villa',
+            status='For Sale',
+            features=json.dumps(['Private Beach', 'Infinity Pool', 'Smart Home', 'Gym']),
+            main_image=f'/media/villa-{i}.jpg',
+            gallery_images=json.dumps([f'/media/villa-{i}-{j}.jpg' for j in range(6)]),
+            featured=i % 10 == 0,
+            active=True,
+            views=i * 17,
+            owner_id=1,
+            agent_id=1,
+            created_at=now - timedelta(days=i),
+            updated_at=now
+        )
+        prop.agent = agent
+        properties.append(prop)
+
+        campaign = MarketingCampaign(
+            id=i + 1,
+            user_id=1,
+            property_id=prop.id,
+            name=f'Campaign {i}',
+            platform='facebook',
+            campaign_type='property_promotion',
+            budget=500000,
+            daily_budget=50000,
+            target_audience=json.dumps({'age': [30, 60], 'locations': ['Dubai', 'Abu Dhabi']}),
+            status='active',
+            impressions=10000 + i,
+            clicks=200 + i,
+            leads=20,
+            cost_spent=120000,
+            created_at=now,
+            start_date=now,
+            end_date=now + timedelta(days=10)
+        )
+        campaign.property = prop
+        campaigns.append(campaign)
+
+    return (
+        {'properties': [p.to_dict() for p in properties]},
+        {'campaigns': [c.to_dict() for c in campaigns]}
+    )
+
+def time_encoder(encode, payload, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(payload)
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 4), 'pages_per_second': round(iterations / elapsed, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=100)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    encoders = {
+        'flask_default': DefaultJSONProvider(app).dumps,
+        'fast_provider': FastJSONProvider(app).dumps_bytes
+    }
+
+    property_page, campaign_page = build_pages(args.rows)
+    results = {'backend': FastJSONProvider(app).backend, 'rows': args.rows, 'iterations': args.iterations}
+
+    for page_name, page in (('property_page', property_page), ('campaign_page', campaign_page)):
+        results[page_name] = {
+            name: time_encoder(encode, page, args.iterations)
+            for name, encode in encoders.items()
+        }
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
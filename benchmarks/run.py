@@ -0,0 +1,152 @@
+"""Benchmark the Flask API against a seeded SQLite database.
+
+Run from the directory that contains the ``src`` package:
+
+    python -m src.benchmarks.run --scale 10000 --requests 200 --threads 8 --output results.json
+
+Every scenario is driven twice: in-process through the Flask test client,
+and over HTTP by a multi-threaded load generator against a local server.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.benchmarks.seed import seed, BENCH_PASSWORD, ADMIN_TOKEN, USER_TOKEN, USER_EMAIL
+
+# name -> (method, path, token, json body)
+SCENARIOS = {
+    'login': ('POST', '/api/auth/login', None, {'email': USER_EMAIL, 'password': BENCH_PASSWORD}),
+    'auth_me': ('GET', '/api/auth/me', USER_TOKEN, None),
+    'campaign_list': ('GET', '/api/marketing/campaigns?per_page=20', USER_TOKEN, None),
+    'marketing_analytics': ('GET', '/api/marketing/analytics', USER_TOKEN, None),
+    'admin_stats': ('GET', '/api/marketing/admin/stats', ADMIN_TOKEN, None)
+}
+
+def summarize(latencies_ms, query_counts, elapsed):
+    ordered = sorted(latencies_ms)
+
+    def pct(fraction):
+        if not ordered:
+            return 0
+        return round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)], 3)
+
+    return {
+        'requests': len(ordered),
+        'throughput_rps': round(len(ordered) / elapsed, 1) if elapsed else 0,
+        'p50_ms': pct(0.50),
+        'p90_ms': pct(0.90),
+        'p99_ms': pct(0.99),
+        'max_ms': round(ordered[-1], 3) if ordered else 0,
+        'avg_queries': round(sum(query_counts) / len(query_counts), 2) if query_counts else 0
+    }
+
+def _headers(token):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    return headers
+
+def run_test_client(app, requests_per_scenario):
+    """Drive each scenario sequentially through the Flask test client"""
+    client = app.test_client()
+    results = {}
+
+    for name, (method, path, token, body) in SCENARIOS.items():
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(requests_per_scenario):
+            request_started = time.perf_counter()
+            response = client.open(path, method=method, headers=_headers(token), json=body)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            queries.append(int(response.headers.get('X-Query-Count', 0)))
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        results[name] = summarize(latencies, queries, time.perf_counter() - started)
+
+    return results
+
+def run_http_load(app, requests_per_scenario, threads):
+    """Drive each scenario over HTTP with a pool of concurrent clients"""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    def call(method, path, token, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(base_url + path, data=data, method=method, headers=_headers(token))
+        request_started = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            query_count = int(response.headers.get('X-Query-Count', 0))
+        return (time.perf_counter() - request_started) * 1000, query_count
+
+    results = {}
+    try:
+        for name, (method, path, token, body) in SCENARIOS.items():
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                outcomes = list(pool.map(lambda _: call(method, path, token, body), range(requests_per_scenario)))
+            results[name] = summarize(
+                [outcome[0] for outcome in outcomes],
+                [outcome[1] for outcome in outcomes],
+                time.perf_counter() - started
+            )
+    finally:
+        server.shutdown()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10000, help='Number of properties (10k to 1M)')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent HTTP clients')
+    parser.add_argument('--database', help='Reuse an existing seeded database instead of seeding')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    database_path = args.database
+    seeded = None
+    if not database_path:
+        database_path = os.path.join(tempfile.mkdtemp(prefix='awh-bench-'), 'bench.db')
+        seeded = seed(database_path, args.scale, args.seed)
+
+    # Configure the app before importing it: bench database, no background jobs (importing never starts them;
+    # the switch also covers anything that calls start_background_jobs) and no shared cache or broker files
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    os.environ['BACKGROUND_JOBS'] = '0'
+    os.environ['DETAIL_CACHE_PATH'] = ''
+    os.environ['EVENT_BROKER_PATH'] = ''
+    from src.main import app
+
+    report = {
+        'python': platform.python_version(),
+        'scale': args.scale,
+        'seeded': seeded,
+        'requests_per_scenario': args.requests,
+        'threads': args.threads,
+        'test_client': run_test_client(app, args.requests),
+        'http': run_http_load(app, args.requests, args.threads)
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+if __name__ == '__main__':
+    main()
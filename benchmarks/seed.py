@@ -0,0 +1,80 @@
+"""Seed a SQLite database with synthetic rows for benchmarking.
+
+Run from the directory that contains the ``src`` package:
+
+    python -m src.benchmarks.seed --database /tmp/bench.db --scale 10000
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import create_engine
+from werkzeug.security import generate_password_hash
+from src.models.user import db
+from src.utils.datagen import DataGenerator, tune_sqlite_for_bulk_load
+
+BENCH_PASSWORD = 'BenchPass123'
+ADMIN_TOKEN = 'bench-admin-session'
+USER_TOKEN = 'bench-user-session'
+ADMIN_EMAIL = 'admin@bench.local'
+USER_EMAIL = 'user@bench.local'
+
+def scale_counts(scale):
+    """Row counts per table for a given scale (number of properties)"""
+    return {
+        'users': max(scale // 10, 10),
+        'properties': scale,
+        'campaigns': max(scale // 2, 10),
+        'sessions': max(scale // 5, 10),
+        'payments': max(scale // 5, 10),
+        'inquiries': max(scale // 2, 10),
+        'favorites': scale
+    }
+
+def seed(database_path, scale=10000, seed_value=42):
+    """Create the schema, generate synthetic rows and add the benchmark accounts"""
+    if os.path.exists(database_path):
+        os.remove(database_path)
+
+    engine = create_engine(f'sqlite:///{database_path}')
+    tune_sqlite_for_bulk_load(engine)
+    db.metadata.create_all(engine)
+    tables = db.metadata.tables
+    now = datetime.utcnow()
+
+    # Hashing is deliberately slow, so every synthetic user shares one hash
+    generator = DataGenerator(engine, seed=seed_value, now=now, password_hash=generate_password_hash(BENCH_PASSWORD))
+    summary = generator.generate(**scale_counts(scale))
+
+    # Fixed accounts the scenarios authenticate as
+    user_table = tables['user']
+    with engine.begin() as connection:
+        for user_id, email, role in ((1, ADMIN_EMAIL, 'admin'), (2, USER_EMAIL, 'user')):
+            connection.execute(user_table.update().where(user_table.c.id == user_id).values(
+                email=email, role=role, is_active=True, subscription_type='premium',
+                subscription_state='active', subscription_end=now + timedelta(days=30)
+            ))
+        connection.execute(tables['user_session'].insert(), [
+            {'user_id': 1, 'session_token': ADMIN_TOKEN, 'created_at': now,
+             'expires_at': now + timedelta(days=30), 'is_active': True},
+            {'user_id': 2, 'session_token': USER_TOKEN, 'created_at': now,
+             'expires_at': now + timedelta(days=30), 'is_active': True}
+        ])
+    engine.dispose()
+
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--scale', type=int, default=10000, help='Number of properties (10k to 1M)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(seed(args.database, args.scale, args.seed), indent=2))
+
+if __name__ == '__main__':
+    main()
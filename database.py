@@ -0,0 +1,80 @@
+import json
+import os
+from sqlalchemy import event
+from sqlalchemy.types import Text, TypeDecorator
+
+def database_uri(default_sqlite_path):
+    """DATABASE_URL, normalized for SQLAlchemy, or the local SQLite file"""
+    uri = os.environ.get('DATABASE_URL') or f'sqlite:///{default_sqlite_path}'
+    # Hosting providers still hand out the postgres:// scheme SQLAlchemy no longer accepts
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    if uri.startswith('postgresql://') and _has_psycopg3():
+        # Prefer psycopg 3, which can prepare statements server-side, over SQLAlchemy's psycopg2 default
+        uri = 'postgresql+psycopg://' + uri[len('postgresql://'):]
+    return uri
+
+def _has_psycopg3():
+    try:
+        import psycopg  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def engine_options(uri):
+    """Engine options for the backend: pooling and pre-ping for Postgres, nothing extra for SQLite"""
+    options = {
+        # Compiled-statement cache shared by all connections
+        'query_cache_size': int(os.environ.get('DB_STATEMENT_CACHE_SIZE', '1000'))
+    }
+    if uri.startswith('postgresql'):
+        options.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', '10')),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', '20')),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+            pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+            pool_pre_ping=True
+        )
+        if uri.startswith('postgresql+psycopg://'):
+            # Server-side prepared statements after a query has run this many times on a connection
+            options['connect_args'] = {'prepare_threshold': int(os.environ.get('DB_PREPARE_THRESHOLD', '5'))}
+    return options
+
+def init_sqlite_pragmas(engine):
+    """WAL and a busy timeout so readers never block on the single writer"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+class JSONText(TypeDecorator):
+    """JSON held as a string in Python; stored as JSONB on Postgres (indexable) and TEXT elsewhere"""
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import JSONB
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != 'postgresql':
+            return value
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return value  # Stored as a JSON string rather than rejecting legacy data
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name != 'postgresql' or isinstance(value, str):
+            return value
+        return json.dumps(value)
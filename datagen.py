@@ -0,0 +1,306 @@
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, select
+from src.models.user import db
+from src.models.subscription import SubscriptionPlan
+import src.models.property  # noqa: F401 - registers property tables on db.metadata
+from src.routes.marketing import SOCIAL_PLATFORMS
+from src.utils.listing_generation import bump_generation
+
+# (location, latitude, longitude, price multiplier, weight)
+DUBAI_LOCATIONS = [
+    ('Palm Jumeirah, Dubai', 25.1124, 55.1390, 2.2, 8),
+    ('Downtown Dubai, Dubai', 25.1972, 55.2744, 1.9, 10),
+    ('Dubai Marina, Dubai', 25.0805, 55.1403, 1.5, 12),
+    ('Emirates Hills, Dubai', 25.0657, 55.1713, 3.0, 3),
+    ('Jumeirah Beach Residence, Dubai', 25.0780, 55.1340, 1.4, 7),
+    ('Business Bay, Dubai', 25.1857, 55.2650, 1.3, 10),
+    ('Dubai Hills Estate, Dubai', 25.1059, 55.2445, 1.4, 8),
+    ('Arabian Ranches, Dubai', 25.0553, 55.2711, 1.1, 6),
+    ('Jumeirah Village Circle, Dubai', 25.0580, 55.2090, 0.8, 14),
+    ('Dubai Creek Harbour, Dubai', 25.2030, 55.3450, 1.3, 6),
+    ('Al Barsha, Dubai', 25.1136, 55.2004, 0.9, 8),
+    ('Saadiyat Island, Abu Dhabi', 24.5450, 54.4330, 1.7, 4),
+    ('Al Reem Island, Abu Dhabi', 24.4990, 54.4060, 1.0, 4)
+]
+
+# property_type -> (weight, bedrooms range, area range in sq ft, median AED per sq ft, log-normal sigma)
+PROPERTY_TYPES = {
+    'Apartment': (50, (1, 4), (550, 2400), 1500, 0.30),
+    'Studio': (10, (0, 0), (350, 600), 1300, 0.25),
+    'Townhouse': (14, (2, 5), (1800, 4200), 1250, 0.25),
+    'Villa': (20, (3, 7), (3500, 15000), 1700, 0.40),
+    'Penthouse': (6, (3, 6), (3000, 12000), 3200, 0.45)
+}
+
+FEATURES = [
+    'Private Pool', 'Sea View', 'Gym', 'Balcony', 'Maid Room', 'Covered Parking', 'Smart Home',
+    'Private Beach', 'Garden', 'Concierge', 'Burj Khalifa View', 'Study', 'Built-in Wardrobes',
+    'Shared Pool', 'Kids Play Area', 'Pets Allowed'
+]
+
+INQUIRY_TYPES = ('General', 'Viewing', 'Purchase')
+DEFAULT_CHUNK_SIZE = 10000
+
+# Tables whose generated rows carry explicit ids (sessions only in their tokens); a run on a non-empty
+# database numbers on from max(id)
+ID_TABLES = ('user', 'property', 'marketing_campaign', 'user_session', 'payment')
+EXPLICIT_ID_TABLES = ('user', 'property', 'marketing_campaign', 'payment')
+
+class DataGenerator:
+    """Deterministic bulk generator for production-shaped datasets"""
+
+    def __init__(self, engine, seed=42, now=None, chunk_size=DEFAULT_CHUNK_SIZE, password_hash=None):
+        self.engine = engine
+        self.seed = seed
+        # Every timestamp is relative to now; defaulting to the start of the UTC day keeps same-day runs
+        # identical, and passing the reported value reproduces a run on any later day
+        self.now = now or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.chunk_size = chunk_size
+        # A real hash for every row would dominate generation time
+        self.password_hash = password_hash or 'pbkdf2:sha256:600000$synthetic$0'
+        self.id_base = dict.fromkeys(ID_TABLES, 0)
+
+    def _rng(self, table):
+        """Independent stream per table so changing one count does not reshuffle the others"""
+        return random.Random(f'{self.seed}:{table}')
+
+    def _id(self, table, i):
+        """Id of the i-th generated row (1-based); usernames, emails and tokens derive from it so they stay unique"""
+        return self.id_base[table] + i
+
+    def _random_id(self, rng, table, count):
+        return self._id(table, rng.randint(1, count))
+
+    def _insert(self, connection, table, rows):
+        chunk = []
+        inserted = 0
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                connection.execute(table.insert(), chunk)
+                inserted += len(chunk)
+                chunk = []
+        if chunk:
+            connection.execute(table.insert(), chunk)
+            inserted += len(chunk)
+        return inserted
+
+    def users(self, count):
+        rng = self._rng('user')
+        now = self.now
+        for i in range(1, count + 1):
+            user_id = self._id('user', i)
+            roll = rng.random()
+            role = 'admin' if user_id == 1 else ('agent' if roll < 0.08 else 'user')
+            plan = rng.choices(('free', 'trial', 'basic', 'premium'), weights=(55, 10, 25, 10))[0]
+            created_at = now - timedelta(days=rng.expovariate(1 / 300))
+            start = end = None
+            state = 'free'
+            if plan != 'free':
+                start = created_at + timedelta(days=rng.uniform(0, 30))
+                end = start + timedelta(days=7 if plan == 'trial' else 30 * rng.choice((1, 1, 1, 12)))
+                state = 'trial' if plan == 'trial' else 'active'
+            phone = f'+9715{rng.randint(0, 99999999):08d}'
+            yield {
+                'id': user_id, 'username': f'user{user_id}', 'username_lower': f'user{user_id}',
+                'email': f'user{user_id}@example.ae', 'password_hash': self.password_hash, 'full_name': f'User {user_id}',
+                'phone': phone, 'phone_digits': phone[1:], 'role': role,
+                'is_verified': rng.random() < 0.7, 'is_active': rng.random() < 0.97,
+                'subscription_type': plan, 'subscription_state': state,
+                'subscription_start': start, 'subscription_end': end,
+                'free_trial_used': plan != 'free' or rng.random() < 0.3,
+                'marketing_enabled': True, 'social_media_promotion': plan in ('basic', 'premium'),
+                'created_at': created_at, 'updated_at': created_at,
+                'last_login': now - timedelta(days=rng.expovariate(1 / 14))
+            }
+
+    def properties(self, count, user_count):
+        rng = self._rng('property')
+        type_names = list(PROPERTY_TYPES)
+        type_weights = [PROPERTY_TYPES[name][0] for name in type_names]
+        location_weights = [location[4] for location in DUBAI_LOCATIONS]
+        # Roughly 8% of users are agents; pick agents from a fixed id stride
+        agent_ids = [self._id('user', i) for i in range(20, user_count + 1, 13)] or [self._id('user', 1)]
+
+        for i in range(1, count + 1):
+            property_id = self._id('property', i)
+            property_type = rng.choices(type_names, weights=type_weights)[0]
+            _, bedrooms_range, area_range, per_sqft, sigma = PROPERTY_TYPES[property_type]
+            location, lat, lng, multiplier, _ = rng.choices(DUBAI_LOCATIONS, weights=location_weights)[0]
+            area = rng.randint(*area_range)
+            bedrooms = rng.randint(*bedrooms_range)
+            price = int(area * per_sqft * multiplier * math.exp(rng.gauss(0, sigma)))
+            status = rng.choices(('For Sale', 'For Rent', 'Sold'), weights=(70, 25, 5))[0]
+            if status == 'For Rent':
+                price = max(price // 18, 20000)  # Annual rent
+            created_at = self.now - timedelta(days=rng.expovariate(1 / 120))
+            yield {
+                'id': property_id,
+                'title': f'{f"{bedrooms} BR " if bedrooms else ""}{property_type} in {location.split(",")[0]}',
+                'description': f'{property_type} in {location} with {rng.choice(FEATURES).lower()}. ' * rng.randint(2, 6),
+                'location': location, 'address': f'Unit {rng.randint(1, 4000)}, {location}',
+                'latitude': round(lat + rng.gauss(0, 0.01), 6), 'longitude': round(lng + rng.gauss(0, 0.01), 6),
+                'price': price, 'currency': 'AED',
+                'bedrooms': bedrooms, 'bathrooms': rng.randint(1, bedrooms + 2),
+                'area': area, 'property_type': property_type, 'status': status,
+                'features': json.dumps(rng.sample(FEATURES, rng.randint(2, 7))),
+                'main_image': f'/media/synthetic/{i % 500}.jpg',
+                'gallery_images': json.dumps([f'/media/synthetic/{(i + j) % 500}.jpg' for j in range(rng.randint(0, 8))]),
+                'featured': rng.random() < 0.04, 'active': status != 'Sold' and rng.random() < 0.95,
+                'views': int(rng.paretovariate(1.2) * 20),
+                'owner_id': self._random_id(rng, 'user', user_count),
+                'agent_id': rng.choice(agent_ids) if rng.random() < 0.6 else None,
+                'created_at': created_at, 'updated_at': created_at
+            }
+
+    def campaigns(self, count, user_count, property_count):
+        rng = self._rng('campaign')
+        platforms = list(SOCIAL_PLATFORMS)
+        for i in range(1, count + 1):
+            status = rng.choices(('draft', 'active', 'paused', 'completed'), weights=(15, 40, 15, 30))[0]
+            budget = rng.choice((100000, 250000, 500000, 1000000, 2500000))
+            impressions = int(rng.lognormvariate(9, 1.2)) if status != 'draft' else 0
+            clicks = int(impressions * rng.uniform(0.005, 0.04))
+            created_at = self.now - timedelta(days=rng.uniform(0, 365))
+            yield {
+                'id': self._id('marketing_campaign', i), 'user_id': self._random_id(rng, 'user', user_count),
+                'property_id': self._random_id(rng, 'property', property_count),
+                'name': f"Campaign {self._id('marketing_campaign', i)}", 'platform': rng.choice(platforms),
+                'campaign_type': rng.choice(('property_promotion', 'brand_awareness')),
+                'budget': budget, 'daily_budget': budget // rng.choice((10, 14, 30)),
+                'target_audience': json.dumps({'age': [25, 60], 'locations': ['Dubai']}), 'status': status,
+                'impressions': impressions, 'clicks': clicks, 'leads': int(clicks * rng.uniform(0.02, 0.15)),
+                'cost_spent': min(budget, int(clicks * rng.uniform(200, 900))),
+                'created_at': created_at, 'start_date': created_at if status != 'draft' else None,
+                'end_date': created_at + timedelta(days=30) if status == 'completed' else None
+            }
+
+    def sessions(self, count, user_count):
+        """Sessions with churn: most expire or are logged out, a recent minority are live"""
+        rng = self._rng('session')
+        for i in range(1, count + 1):
+            created_at = self.now - timedelta(days=rng.expovariate(1 / 20))
+            lifetime = timedelta(days=30)
+            yield {
+                'user_id': self._random_id(rng, 'user', user_count),
+                'session_token': f"synthetic-{self.seed}-{self._id('user_session', i)}",
+                'ip_address': f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                'user_agent': rng.choice(('Mozilla/5.0 (iPhone)', 'Mozilla/5.0 (Android)', 'Mozilla/5.0 (Macintosh)')),
+                'created_at': created_at, 'expires_at': created_at + lifetime,
+                'is_active': rng.random() < 0.35
+            }
+
+    def payments(self, count, user_count, plan_ids):
+        rng = self._rng('payment')
+        for i in range(1, count + 1):
+            billing_cycle = 'yearly' if rng.random() < 0.2 else 'monthly'
+            status = rng.choices(('completed', 'pending', 'failed', 'refunded'), weights=(85, 5, 8, 2))[0]
+            created_at = self.now - timedelta(days=rng.uniform(0, 400))
+            yield {
+                'id': self._id('payment', i), 'user_id': self._random_id(rng, 'user', user_count),
+                'stripe_payment_id': f"pi_synthetic_{self.seed}_{self._id('payment', i)}",
+                'amount': rng.choice((29900, 59900, 299900, 599900)),
+                'currency': 'AED', 'description': 'Subscription payment', 'status': status,
+                'payment_method': 'card', 'subscription_plan_id': rng.choice(plan_ids) if plan_ids else None,
+                'billing_cycle': billing_cycle, 'created_at': created_at,
+                'completed_at': created_at + timedelta(seconds=rng.randint(1, 600)) if status in ('completed', 'refunded') else None
+            }
+
+    def inquiries(self, count, user_count, property_count):
+        rng = self._rng('inquiry')
+        for i in range(1, count + 1):
+            yield {
+                'property_id': self._random_id(rng, 'property', property_count),
+                'user_id': self._random_id(rng, 'user', user_count) if rng.random() < 0.4 else None,
+                'name': f'Lead {i}', 'email': f'lead{rng.randint(1, count)}@example.com',
+                'phone': f'+9715{rng.randint(0, 99999999):08d}', 'message': 'Is this still available?',
+                'inquiry_type': rng.choice(INQUIRY_TYPES),
+                'status': rng.choices(('New', 'Contacted', 'Closed'), weights=(40, 35, 25))[0],
+                'created_at': self.now - timedelta(days=rng.expovariate(1 / 30))
+            }
+
+    def favorites(self, count, user_count, property_count):
+        rng = self._rng('favorite')
+        seen = set()
+        attempts = 0
+        while len(seen) < count and attempts < count * 3:
+            attempts += 1
+            # Popular listings attract most favorites
+            pair = (rng.randint(1, user_count), min(int(rng.paretovariate(0.8)), property_count))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield {
+                'user_id': self._id('user', pair[0]), 'property_id': self._id('property', pair[1]),
+                'created_at': self.now - timedelta(days=rng.expovariate(1 / 45))
+            }
+
+    def generate(self, users=1000, properties=10000, campaigns=5000, sessions=2000,
+                 payments=2000, inquiries=5000, favorites=10000):
+        """Write all tables in one transaction per table; returns row counts and timings, and the now used"""
+        tables = db.metadata.tables
+        summary = {'now': self.now.isoformat()}
+
+        with self.engine.connect() as connection:
+            plan_ids = [row[0] for row in connection.execute(select(SubscriptionPlan.id))]
+            # Number on from the existing rows so repeated runs add data instead of failing on duplicate keys
+            self.id_base = {
+                name: connection.execute(select(func.coalesce(func.max(tables[name].c.id), 0))).scalar()
+                for name in ID_TABLES
+            }
+
+        steps = (
+            ('user', lambda: self.users(users)),
+            ('property', lambda: self.properties(properties, users)),
+            ('marketing_campaign', lambda: self.campaigns(campaigns, users, properties)),
+            ('user_session', lambda: self.sessions(sessions, users)),
+            ('payment', lambda: self.payments(payments, users, plan_ids)),
+            ('property_inquiry', lambda: self.inquiries(inquiries, users, properties)),
+            ('property_favorite', lambda: self.favorites(favorites, users, properties))
+        )
+
+        for table_name, rows in steps:
+            started = time.perf_counter()
+            with self.engine.begin() as connection:
+                inserted = self._insert(connection, tables[table_name], rows())
+                if table_name == 'property':
+                    # Core inserts fire no ORM events; this tells running workers to rebuild their listing indexes
+                    bump_generation(connection)
+            summary[table_name] = {'rows': inserted, 'seconds': round(time.perf_counter() - started, 2)}
+
+        if self.engine.dialect.name == 'postgresql':
+            # Explicit ids do not advance PostgreSQL sequences; move them past the generated rows
+            with self.engine.begin() as connection:
+                for table_name in EXPLICIT_ID_TABLES:
+                    table = tables[table_name]
+                    connection.execute(select(func.setval(
+                        func.pg_get_serial_sequence(self.engine.dialect.identifier_preparer.format_table(table), 'id'),
+                        select(func.max(table.c.id)).scalar_subquery()
+                    )))
+
+        # Inquiries were written without ORM events, so derive their inbox recipients and counters
+        from src.utils.lead_inbox import rebuild_lead_counters
+        
+        started = time.perf_counter()
+        with self.engine.begin() as connection:
+            counters = rebuild_lead_counters(connection)
+        summary['lead_counter'] = {'rows': counters, 'seconds': round(time.perf_counter() - started, 2)}
+
+        return summary
+
+def tune_sqlite_for_bulk_load(engine):
+    """Relax durability on SQLite connections while generating throwaway data"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_bulk_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=OFF')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.close()
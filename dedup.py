@@ -0,0 +1,320 @@
+import hashlib
+import math
+import random
+import re
+import struct
+import threading
+from collections import defaultdict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, load_only, object_session
+from src.models.user import db
+from src.models.property import Property
+from src.utils.listing_generation import GenerationTracker, consistent_scan
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+
+# Decision thresholds on the estimated Jaccard similarity of title + description
+TEXT_DUPLICATE_THRESHOLD = 0.85
+TEXT_WITH_LAYOUT_THRESHOLD = 0.5
+AREA_TOLERANCE = 0.05
+DISTANCE_TOLERANCE_M = 150
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)  # Fixed so signatures are stable across workers and restarts
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+DEDUP_COLUMNS = (
+    Property.title, Property.description, Property.address, Property.location, Property.latitude,
+    Property.longitude, Property.area, Property.bedrooms, Property.active
+)
+
+def normalize_text(value):
+    return _NON_WORD.sub(' ', (value or '').lower()).strip()
+
+def _shingles(text):
+    words = text.split()
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash(text):
+    """MinHash signature of the word shingles of text"""
+    hashes = [
+        struct.unpack('<Q', hashlib.blake2b(shingle.encode(), digest_size=8).digest())[0]
+        for shingle in _shingles(text)
+    ]
+    if not hashes:
+        return None
+    return tuple(
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def _band_keys(signature):
+    return [
+        (band, hash(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))
+        for band in range(BANDS)
+    ]
+
+def _layout_key(values):
+    """Exact signature: normalized address, ~100 m rounded coordinates, area and bedrooms
+
+    None unless the listing has a street address or coordinates; an area name alone would make every
+    same-sized listing in the area an exact duplicate.
+    """
+    latitude, longitude = values.get('latitude'), values.get('longitude')
+    address = normalize_text(values.get('address'))
+    if not address and (latitude is None or longitude is None):
+        return None
+    return (
+        address,
+        round(latitude, 3) if latitude is not None else None,
+        round(longitude, 3) if longitude is not None else None,
+        int(round((values.get('area') or 0) / 10.0)),
+        values.get('bedrooms')
+    )
+
+def _distance_m(a, b):
+    if None in (a.get('latitude'), a.get('longitude'), b.get('latitude'), b.get('longitude')):
+        return None
+    lat1, lng1, lat2, lng2 = map(math.radians, (a['latitude'], a['longitude'], b['latitude'], b['longitude']))
+    x = (lng2 - lng1) * math.cos((lat1 + lat2) / 2)
+    return math.hypot(x, lat2 - lat1) * 6371000
+
+def _same_layout(a, b):
+    if a.get('bedrooms') != b.get('bedrooms'):
+        return False
+    area_a, area_b = a.get('area') or 0, b.get('area') or 0
+    if area_a and area_b and abs(area_a - area_b) > AREA_TOLERANCE * max(area_a, area_b):
+        return False
+    distance = _distance_m(a, b)
+    if distance is not None:
+        return distance <= DISTANCE_TOLERANCE_M
+    address = normalize_text(a.get('address'))
+    return bool(address) and address == normalize_text(b.get('address'))
+
+def _signature_entry(values):
+    return {
+        'signature': minhash(normalize_text(f"{values.get('title') or ''} {values.get('description') or ''}")),
+        'layout_key': _layout_key(values),
+        'latitude': values.get('latitude'),
+        'longitude': values.get('longitude'),
+        'address': values.get('address'),
+        'area': values.get('area'),
+        'bedrooms': values.get('bedrooms')
+    }
+
+class DuplicateIndex:
+    """Exact layout signatures plus a MinHash LSH index over active listings
+
+    This worker's committed writes are applied in listing generation order; writes by other workers show up
+    as a newer shared generation and trigger a rebuild, which runs in a background thread once start() has
+    been called.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.entries = {}
+        self.layout_index = defaultdict(set)
+        self.band_index = defaultdict(set)
+        self.tracker = GenerationTracker()
+        self.built = False
+        self._app = None
+        self._rebuilding = False
+        self._ready = threading.Event()
+
+    def _add(self, key, entry):
+        self._remove(key)
+        self.entries[key] = entry
+        if entry['layout_key'] is not None:
+            self.layout_index[entry['layout_key']].add(key)
+        if entry['signature']:
+            for band_key in _band_keys(entry['signature']):
+                self.band_index[band_key].add(key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        if entry['layout_key'] is not None:
+            self.layout_index[entry['layout_key']].discard(key)
+        if entry['signature']:
+            for band_key in _band_keys(entry['signature']):
+                self.band_index[band_key].discard(key)
+
+    @staticmethod
+    def _scan():
+        index = DuplicateIndex()
+        rows = Property.query.options(load_only(*DEDUP_COLUMNS)).filter(Property.active == True).yield_per(2000)
+        for prop in rows:
+            index._add(prop.id, _signature_entry(_property_values(prop)))
+        return index
+
+    def build(self):
+        """Signature every active listing outside the lock, then swap the new index in"""
+        with self._build_lock:
+            index, generation, consistent = consistent_scan(self._scan)
+            with self._lock:
+                self.entries = index.entries
+                self.layout_index = index.layout_index
+                self.band_index = index.band_index
+                self.tracker.reset(generation, stale=not consistent)
+                for changes in self.tracker.drain():
+                    self._apply_changes(changes)
+                self.built = True
+
+    def start(self, app):
+        """Build in a daemon thread so no request pays for the MinHash pass over every listing"""
+        self._app = app
+        self._rebuild_in_background()
+
+    def _rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            with self._app.app_context():
+                try:
+                    self.build()
+                except Exception as e:
+                    self._app.logger.error('Duplicate index build failed: %s', e)
+                finally:
+                    self._rebuilding = False
+                    self._ready.set()
+                    db.session.remove()
+
+        threading.Thread(target=run, name='dedup-build', daemon=True).start()
+
+    def ensure_built(self):
+        if self.built:
+            if self.tracker.needs_rebuild():
+                # Other workers wrote listings: keep answering from this index while a new one is built
+                if self._app is not None:
+                    self._rebuild_in_background()
+                else:
+                    self.build()
+            return
+
+        if self._app is not None:
+            # Started at boot: wait for that build rather than running a second one here
+            self._ready.wait(timeout=60)
+        if not self.built:
+            self.build()
+
+    def _apply_changes(self, changes):
+        for property_id, values in changes:
+            if values is None or not values.get('active', True):
+                self._remove(property_id)
+            else:
+                self._add(property_id, _signature_entry(values))
+
+    def apply_changes(self, changes, generation=None):
+        """Apply one committed transaction's (property_id, values) changes"""
+        if not self.built:
+            return
+        with self._lock:
+            for due in self.tracker.commit(generation, changes):
+                self._apply_changes(due)
+
+    def _match(self, entry, candidate_keys):
+        matches = []
+        for key in candidate_keys:
+            other = self.entries.get(key)
+            if other is None:
+                continue
+            similarity = 0.0
+            if entry['signature'] and other['signature']:
+                similarity = sum(
+                    1 for x, y in zip(entry['signature'], other['signature']) if x == y
+                ) / NUM_PERMUTATIONS
+
+            exact = entry['layout_key'] is not None and entry['layout_key'] == other['layout_key']
+            if exact or similarity >= TEXT_DUPLICATE_THRESHOLD or (
+                similarity >= TEXT_WITH_LAYOUT_THRESHOLD and _same_layout(entry, other)
+            ):
+                matches.append({
+                    'property_id': key,
+                    'text_similarity': round(similarity, 3),
+                    'same_layout': exact or _same_layout(entry, other)
+                })
+
+        matches.sort(key=lambda match: (match['same_layout'], match['text_similarity']), reverse=True)
+        return matches
+
+    def find_duplicates(self, values, exclude_id=None):
+        """Near-duplicates of a listing; candidates come only from shared signatures or LSH bands"""
+        self.ensure_built()
+        entry = _signature_entry(values)
+        with self._lock:
+            candidates = set(self.layout_index.get(entry['layout_key'], ())) if entry['layout_key'] is not None else set()
+            if entry['signature']:
+                for band_key in _band_keys(entry['signature']):
+                    candidates |= self.band_index.get(band_key, set())
+            candidates.discard(exclude_id)
+            return self._match(entry, candidates)
+
+    def find_batch_duplicates(self, items):
+        """Check a bulk upload against existing listings and against earlier rows of the batch"""
+        self.ensure_built()
+        batch_index = DuplicateIndex()
+        batch_index.built = True
+        results = []
+
+        for position, values in enumerate(items):
+            batch_matches = batch_index.find_duplicates(values)
+            for match in batch_matches:
+                match['index'] = match.pop('property_id')
+            results.append({
+                'index': position,
+                'duplicates': self.find_duplicates(values),
+                'batch_duplicates': batch_matches
+            })
+            with batch_index._lock:
+                batch_index._add(position, _signature_entry(values))
+
+        return results
+
+duplicate_index = DuplicateIndex()
+
+def _property_values(prop):
+    return {
+        'title': prop.title, 'description': prop.description, 'address': prop.address,
+        'location': prop.location, 'latitude': prop.latitude, 'longitude': prop.longitude,
+        'area': prop.area, 'bedrooms': prop.bedrooms, 'active': prop.active
+    }
+
+def _queue_change(target, values):
+    # Applied only when the surrounding transaction commits
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('dedup_changes', []).append((target.id, values))
+
+@event.listens_for(Property, 'after_insert')
+@event.listens_for(Property, 'after_update')
+def _property_saved(mapper, connection, target):
+    _queue_change(target, _property_values(target))
+
+@event.listens_for(Property, 'after_delete')
+def _property_deleted(mapper, connection, target):
+    _queue_change(target, None)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_changes(session):
+    changes = session.info.pop('dedup_changes', None)
+    if changes:
+        duplicate_index.apply_changes(changes, session.info.get('listing_generation'))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_changes(session):
+    session.info.pop('dedup_changes', None)
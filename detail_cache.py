@@ -0,0 +1,286 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from src.models.user import User
+from src.models.property import Property
+
+AGENT_CONTACT_ATTRIBUTES = ('full_name', 'phone', 'email')
+# Changes to only these leave the cached detail in place; the shown count catches up within the TTL
+VIEW_ONLY_ATTRIBUTES = frozenset(['views'])
+
+class DetailCache:
+    """Serialized property details in an in-process LRU (L1) over an optional shared SQLite file (L2)"""
+
+    def __init__(self, max_entries=5000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.app = None
+        self.l2_path = None
+        self.lease_seconds = 5
+        self.sync_interval = 0.5
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (payload, expires_at)
+        # key -> clock value of its last invalidation, so in-flight builds cannot store stale data. Keys not
+        # listed count as invalidated at the floor; the map is dropped (and the floor raised) when it grows large
+        self._generations = {}
+        self._clock = 0
+        self._generation_floor = 0
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        self._last_sync = 0
+        self._last_invalidation = 0
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'waits': 0}
+        self._local = threading.local()
+
+    def init_app(self, app, l2_path=None, max_entries=5000, ttl=300, lease_seconds=5, sync_interval=0.5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lease_seconds = lease_seconds
+        self.sync_interval = sync_interval
+        self.app = app
+        self.l2_path = l2_path
+        if l2_path:
+            os.makedirs(os.path.dirname(l2_path), exist_ok=True)
+            connection = self._l2()
+            connection.executescript(
+                'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, payload BLOB NOT NULL, expires_at REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS invalidations (seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, '
+                'created_at REAL NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS ix_invalidations_key ON invalidations (key, seq);'
+            )
+            self._last_invalidation = connection.execute(
+                'SELECT COALESCE(MAX(seq), 0) FROM invalidations'
+            ).fetchone()[0]
+
+    def _l2(self):
+        """This thread's L2 connection, opened once; a miss touches L2 several times"""
+        pid, connection = getattr(self._local, 'l2', (None, None))
+        if connection is None or pid != os.getpid():
+            # A connection inherited across fork must not be used by the child
+            connection = sqlite3.connect(self.l2_path, timeout=2, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')  # A lost cache write only costs a rebuild
+            self._local.l2 = (os.getpid(), connection)
+        return connection
+
+    # L1
+
+    def _l1_get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _generation(self, key):
+        """Called with the lock held"""
+        return self._generations.get(key, self._generation_floor)
+
+    def _forget_generations(self):
+        # Conservative: builds that started before this cannot store their result
+        self._clock += 1
+        self._generation_floor = self._clock
+        self._generations.clear()
+
+    def _l1_set(self, key, payload, generation):
+        with self._lock:
+            if self._generation(key) != generation:
+                return False
+            self._entries[key] = (payload, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def _sync_invalidations(self):
+        """Evict keys other workers invalidated; runs at most once per sync_interval"""
+        if not self.l2_path or time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = time.monotonic()
+        connection = self._l2()
+        rows = connection.execute(
+            'SELECT seq, key FROM invalidations WHERE seq > ? ORDER BY seq', (self._last_invalidation,)
+        ).fetchall()
+        if rows:
+            self._last_invalidation = rows[-1][0]
+            self._evict_local(key for _, key in rows)
+
+    # L2
+
+    def _l2_get(self, key):
+        row = self._l2().execute(
+            'SELECT payload FROM entries WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def _invalidation_seq(self):
+        return self._l2().execute('SELECT COALESCE(MAX(seq), 0) FROM invalidations').fetchone()[0]
+
+    def _l2_set(self, key, payload, invalidation_seq):
+        """Store unless the key was invalidated (by any worker) after the build started"""
+        self._l2().execute(
+            'INSERT OR REPLACE INTO entries (key, payload, expires_at) SELECT ?, ?, ? '
+            'WHERE NOT EXISTS (SELECT 1 FROM invalidations WHERE key = ? AND seq > ?)',
+            (key, payload, time.time() + self.ttl, key, invalidation_seq)
+        )
+
+    def _acquire_lease(self, key):
+        """Cross-worker lease so only one worker rebuilds a missing key"""
+        now = time.time()
+        connection = self._l2()
+        connection.execute('DELETE FROM leases WHERE key = ? AND expires_at < ?', (key, now))
+        cursor = connection.execute(
+            'INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)', (key, now + self.lease_seconds)
+        )
+        return cursor.rowcount == 1
+
+    def _release_lease(self, key):
+        self._l2().execute('DELETE FROM leases WHERE key = ?', (key,))
+
+    def _wait_for_l2(self, key):
+        """Poll L2 until the lease holder stores the key, releases the lease empty-handed or times out"""
+        deadline = time.monotonic() + self.lease_seconds
+        connection = self._l2()
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            row = connection.execute(
+                'SELECT payload FROM entries WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+            if row:
+                return bytes(row[0])
+            if not connection.execute('SELECT 1 FROM leases WHERE key = ?', (key,)).fetchone():
+                return None
+        return None
+
+    # Public API
+
+    def get_or_build(self, key, builder):
+        """Cached payload for key, calling builder() (returns bytes or None) on a miss; returns (payload, source)"""
+        self._sync_invalidations()
+        payload = self._l1_get(key)
+        if payload is not None:
+            self.stats['l1_hits'] += 1
+            return payload, 'l1'
+
+        # Only one thread per worker rebuilds a key; the rest wait here and then hit L1
+        with self._key_locks[hash(key) % len(self._key_locks)]:
+            payload = self._l1_get(key)
+            if payload is not None:
+                self.stats['l1_hits'] += 1
+                return payload, 'l1'
+
+            with self._lock:
+                generation = self._generation(key)
+
+            leased = False
+            if self.l2_path:
+                payload = self._l2_get(key)
+                if payload is None:
+                    leased = self._acquire_lease(key)
+                    if not leased:
+                        # Another worker is rebuilding; use its result unless the lease runs out
+                        self.stats['waits'] += 1
+                        payload = self._wait_for_l2(key)
+                if payload is not None:
+                    self.stats['l2_hits'] += 1
+                    self._l1_set(key, payload, generation)
+                    return payload, 'l2'
+
+            try:
+                invalidation_seq = self._invalidation_seq() if leased else None
+                self.stats['misses'] += 1
+                payload = builder()
+                if payload is not None and self._l1_set(key, payload, generation) and leased:
+                    self._l2_set(key, payload, invalidation_seq)
+                return payload, 'miss'
+            finally:
+                if leased:
+                    self._release_lease(key)
+
+    def _evict_local(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._clock += 1
+                self._generations[key] = self._clock
+            if len(self._generations) > 2 * self.max_entries:
+                self._forget_generations()
+
+    def invalidate(self, keys):
+        """Write-through invalidation of L1, L2 and (via the invalidation log) other workers' L1"""
+        keys = list(keys)
+        if not keys:
+            return
+        self._evict_local(keys)
+        if not self.l2_path:
+            return
+        now = time.time()
+        try:
+            connection = self._l2()
+            connection.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in keys])
+            connection.executemany(
+                'INSERT INTO invalidations (key, created_at) VALUES (?, ?)', [(key, now) for key in keys]
+            )
+            connection.execute('DELETE FROM invalidations WHERE created_at < ?', (now - 3600,))
+        except sqlite3.Error as e:
+            # Runs after the data has committed, so it must not fail the request; L2 and the other
+            # workers' copies then expire by TTL instead
+            self.app.logger.error('Detail cache invalidation of %s keys failed: %s', len(keys), e)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._forget_generations()
+
+detail_cache = DetailCache()
+
+def property_key(property_id):
+    return f'property:{property_id}'
+
+def invalidate_properties(property_ids):
+    """For Core UPDATEs that bypass the ORM events below (popularity scores)"""
+    detail_cache.invalidate(property_key(property_id) for property_id in property_ids)
+
+def _queue_invalidation(target, keys):
+    # Applied once the change is committed
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('detail_cache_invalidations', set()).update(keys)
+
+@event.listens_for(Property, 'after_update')
+def _property_updated(mapper, connection, target):
+    state = inspect(target)
+    changed = {attr.key for attr in state.attrs if attr.history.has_changes()}
+    if changed and changed <= VIEW_ONLY_ATTRIBUTES:
+        return
+    _queue_invalidation(target, [property_key(target.id)])
+
+@event.listens_for(Property, 'after_delete')
+def _property_deleted(mapper, connection, target):
+    _queue_invalidation(target, [property_key(target.id)])
+
+@event.listens_for(User, 'after_update')
+def _agent_contact_changed(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.deleted for name in AGENT_CONTACT_ATTRIBUTES):
+        return
+    property_ids = connection.execute(select(Property.id).where(Property.agent_id == target.id)).scalars()
+    _queue_invalidation(target, [property_key(property_id) for property_id in property_ids])
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    keys = session.info.pop('detail_cache_invalidations', None)
+    if keys:
+        detail_cache.invalidate(keys)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('detail_cache_invalidations', None)
@@ -0,0 +1,199 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from itertools import count
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from src.models.subscription import MarketingCampaign
+
+SUBSCRIBER_QUEUE_SIZE = 256
+BROKER_RETENTION_SECONDS = 300
+BROKER_PURGE_INTERVAL_SECONDS = 60
+
+CAMPAIGN_METRIC_ATTRIBUTES = ('impressions', 'clicks', 'leads', 'cost_spent', 'status')
+
+class Subscription:
+    """One connected client's bounded event queue"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # A stalled client must not hold memory or block publishers; it reconnects and refetches
+            self.dropped = True
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class EventBus:
+    """In-process pub/sub keyed by user id, optionally bridged across workers through a SQLite file"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.subscribers = {}
+        self.pid = os.getpid()
+        self._ids = count(1)
+        self.app = None
+        self.broker_path = None
+        self.poll_interval = 0.5
+        self.last_broker_id = 0
+        self._last_purge = 0
+        self._local = threading.local()
+
+    def init_app(self, app, broker_path=None, poll_interval=0.5):
+        """Use a shared SQLite file as the broker so events reach clients connected to other workers"""
+        self.pid = os.getpid()
+        self.app = app
+        self.broker_path = broker_path
+        self.poll_interval = poll_interval
+        if broker_path:
+            os.makedirs(os.path.dirname(broker_path), exist_ok=True)
+            connection = self._broker()
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, origin INTEGER NOT NULL, '
+                'message TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            self.last_broker_id = connection.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    def _broker(self):
+        """This thread's broker connection, opened once; publishing runs in every committing request"""
+        pid, connection = getattr(self._local, 'broker', (None, None))
+        if connection is None or pid != os.getpid():
+            # A connection inherited across fork must not be used by the child
+            connection = sqlite3.connect(self.broker_path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')  # WAL stays consistent; relay events are short-lived anyway
+            self._local.broker = (os.getpid(), connection)
+        return connection
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self.subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self.subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscribers[subscription.user_id]
+
+    def _deliver(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self.subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def publish(self, user_id, event_type, data):
+        """Send an event to every stream the user has open, in this worker and (via the broker) the others"""
+        if not user_id:
+            return
+        message = {'id': f'{self.pid}-{next(self._ids)}', 'event': event_type, 'data': data}
+        self._deliver(user_id, message)
+
+        if self.broker_path:
+            try:
+                self._broker().execute(
+                    'INSERT INTO events (user_id, origin, message, created_at) VALUES (?, ?, ?, ?)',
+                    (user_id, self.pid, json.dumps(message, default=str), time.time())
+                )
+            except sqlite3.Error as e:
+                # Publishing follows a committed write; clients on other workers miss this event and refetch later
+                self.app.logger.error('Event broker publish failed: %s', e)
+
+    def poll_broker(self):
+        """Deliver events other workers published since the last poll; returns how many"""
+        connection = self._broker()
+        rows = connection.execute(
+            'SELECT id, user_id, origin, message FROM events WHERE id > ? ORDER BY id',
+            (self.last_broker_id,)
+        ).fetchall()
+        if rows:
+            self.last_broker_id = rows[-1][0]
+
+        if time.monotonic() - self._last_purge >= BROKER_PURGE_INTERVAL_SECONDS:
+            self._last_purge = time.monotonic()
+            connection.execute('DELETE FROM events WHERE created_at < ?', (time.time() - BROKER_RETENTION_SECONDS,))
+
+        delivered = 0
+        for _, user_id, origin, message in rows:
+            if origin != self.pid and user_id in self.subscribers:
+                self._deliver(user_id, json.loads(message))
+                delivered += 1
+        return delivered
+
+    def start(self, app):
+        """Poll the broker in a daemon thread (only when a broker is configured)"""
+        if not self.broker_path:
+            return None
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.wait(self.poll_interval):
+                try:
+                    self.poll_broker()
+                except Exception as e:
+                    app.logger.error('Event broker poll failed: %s', e)
+
+        thread = threading.Thread(target=run, name='event-broker', daemon=True)
+        thread.start()
+        return stop_event
+
+event_bus = EventBus()
+
+def format_sse(message):
+    """Encode a message as one Server-Sent Events frame"""
+    data = json.dumps(message['data'], default=str)
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {data}\n\n"
+
+def publish_inquiries(app, notifications):
+    """Inquiry intake notifier: push each new inquiry to its owner and agent"""
+    for notification in notifications:
+        event_bus.publish(notification['recipient_id'], 'inquiry.created', dict(
+            notification['inquiry'], role=notification['role']
+        ))
+
+def _metric_delta(target):
+    state = inspect(target)
+    changes = {}
+    for name in CAMPAIGN_METRIC_ATTRIBUTES:
+        history = state.attrs[name].history
+        if history.deleted and history.deleted[0] != getattr(target, name):
+            previous, current = history.deleted[0], getattr(target, name)
+            changes[name] = current if name == 'status' else (current or 0) - (previous or 0)
+    return changes
+
+@event.listens_for(MarketingCampaign, 'after_update')
+def _campaign_updated(mapper, connection, target):
+    changes = _metric_delta(target)
+    session = object_session(target)
+    if changes and session is not None:
+        session.info.setdefault('campaign_metric_events', []).append((target.user_id, {
+            'campaign_id': target.id,
+            'delta': changes,
+            'metrics': {name: getattr(target, name) for name in CAMPAIGN_METRIC_ATTRIBUTES}
+        }))
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed_metrics(session):
+    # Published only once the change is durable
+    for user_id, data in session.info.pop('campaign_metric_events', None) or ():
+        event_bus.publish(user_id, 'campaign.metrics', data)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_metrics(session):
+    session.info.pop('campaign_metric_events', None)
@@ -0,0 +1,208 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+VARIANT_WIDTHS = (320, 640, 1024, 1600)
+FALLBACK_WIDTH = 1024  # JPEG for browsers without WebP/AVIF
+PLACEHOLDER_WIDTH = 16
+QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 80}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_PIXELS = 50_000_000
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_CACHE_SIZE = 10000
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+def _pillow():
+    # Pillow is optional; only load it when images are processed
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise RuntimeError('Image processing requires Pillow to be installed')
+    try:
+        import pillow_avif  # noqa: F401 - registers the AVIF plugin on older Pillow releases
+    except ImportError:
+        pass
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    return Image, ImageOps
+
+class ImagePipeline:
+    """Resizes uploads into WebP/AVIF variants on a worker pool and stores them by content hash"""
+
+    def __init__(self):
+        self.store_dir = None
+        self.url_prefix = '/api/media'
+        self.executor = None
+        self._lock = threading.Lock()
+        self._manifests = {}
+
+    def init_app(self, app, store_dir, url_prefix='/api/media', workers=None):
+        self.store_dir = store_dir
+        self.url_prefix = url_prefix.rstrip('/')
+        os.makedirs(store_dir, exist_ok=True)
+        # Pillow releases the GIL while decoding, resizing and encoding, so threads scale across cores
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix='image-pipeline'
+        )
+
+    def submit(self, data):
+        """Queue an upload for processing; the future resolves to its manifest"""
+        if self.executor is None:
+            raise RuntimeError('Image pipeline is not configured')
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise ValueError('Image is too large')
+        return self.executor.submit(self.process, data)
+
+    def process(self, data):
+        """Generate every variant of an image, or return the stored manifest if it already exists"""
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        manifest = self.manifest(digest)
+        if manifest is not None:
+            return manifest
+
+        Image, ImageOps = _pillow()
+        formats = [fmt for fmt in ('avif', 'webp') if fmt.upper() in Image.SAVE]
+
+        directory = os.path.join(self.store_dir, digest)
+        staging = f'{directory}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(staging, exist_ok=True)
+
+        try:
+            try:
+                with Image.open(io.BytesIO(data)) as source:
+                    image = ImageOps.exif_transpose(source)
+                    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+            except Image.DecompressionBombError:
+                raise ValueError('Image has too many pixels')
+            width, height = image.size
+
+            widths = sorted({target for target in VARIANT_WIDTHS if target < width} | {min(width, VARIANT_WIDTHS[-1])})
+            resized = {}
+            for target in widths:
+                resized[target] = image if target == width else image.resize(
+                    (target, max(1, round(height * target / width))), Image.LANCZOS
+                )
+
+            variants = []
+            for target, variant in resized.items():
+                for fmt in formats:
+                    variants.append(self._save(staging, variant, fmt, f'{target}w.{fmt}'))
+
+            fallback_width = max([target for target in widths if target <= FALLBACK_WIDTH] or widths[:1])
+            fallback = self._save(staging, resized[fallback_width].convert('RGB'), 'jpeg', f'{fallback_width}w.jpg')
+
+            placeholder = image.convert('RGB')
+            placeholder.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+            buffer = io.BytesIO()
+            placeholder.save(buffer, 'JPEG', quality=40)
+
+            manifest = {
+                'digest': digest,
+                'width': width,
+                'height': height,
+                'fallback': fallback,
+                'variants': variants,
+                'placeholder': 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+            }
+            with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f)
+
+            try:
+                # The manifest becomes visible together with its files
+                os.rename(staging, directory)
+            except OSError:
+                # Another worker stored the same image first
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return self.manifest(digest)
+
+    @staticmethod
+    def _save(directory, image, fmt, filename):
+        path = os.path.join(directory, filename)
+        options = {'quality': QUALITY[fmt]}
+        if fmt == 'jpeg':
+            options.update(optimize=True, progressive=True)
+        elif fmt == 'webp':
+            options['method'] = 4
+        image.save(path, fmt.upper(), **options)
+        return {
+            'format': fmt,
+            'width': image.width,
+            'height': image.height,
+            'file': filename,
+            'bytes': os.path.getsize(path)
+        }
+
+    def manifest(self, digest):
+        """Manifest of a stored image; manifests never change, so they are cached indefinitely"""
+        if self.store_dir is None or not DIGEST_PATTERN.match(digest or ''):
+            return None
+
+        manifest = self._manifests.get(digest)
+        if manifest is not None:
+            return manifest
+
+        try:
+            with open(os.path.join(self.store_dir, digest, MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            if len(self._manifests) >= MANIFEST_CACHE_SIZE:
+                self._manifests.clear()
+            self._manifests[digest] = manifest
+        return manifest
+
+    def file_path(self, digest, filename):
+        """Path of a stored file, or None if it is not part of the image"""
+        manifest = self.manifest(digest)
+        if manifest is None:
+            return None
+        files = {variant['file'] for variant in manifest['variants']} | {manifest['fallback']['file']}
+        return os.path.join(self.store_dir, digest, filename) if filename in files else None
+
+    def url(self, digest, filename):
+        return f'{self.url_prefix}/{digest}/{filename}'
+
+    def _digest_of(self, url):
+        if not isinstance(url, str) or not url.startswith(self.url_prefix + '/'):
+            return None
+        return url[len(self.url_prefix) + 1:].split('/', 1)[0]
+
+    def responsive(self, manifest):
+        """srcset-ready description of a stored image"""
+        digest = manifest['digest']
+        sources = []
+        for fmt in ('avif', 'webp'):
+            variants = [variant for variant in manifest['variants'] if variant['format'] == fmt]
+            if variants:
+                sources.append({
+                    'type': MIME_TYPES[fmt],
+                    'srcset': ', '.join(f"{self.url(digest, v['file'])} {v['width']}w" for v in variants)
+                })
+        return {
+            'src': self.url(digest, manifest['fallback']['file']),
+            'width': manifest['width'],
+            'height': manifest['height'],
+            'placeholder': manifest['placeholder'],
+            'sources': sources
+        }
+
+    def variants_for(self, url):
+        """Responsive variants of an image URL, or None for images that are not in the store"""
+        manifest = self.manifest(self._digest_of(url))
+        return self.responsive(manifest) if manifest else None
+
+image_pipeline = ImagePipeline()
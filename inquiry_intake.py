@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from src.models.user import db
+from src.models.property import Property, PropertyInquiry
+from src.utils.lead_inbox import apply_counter_deltas, counter_deltas
+from src.utils.append_log import AppendLog
+
+INCREMENT_CAMPAIGN_LEADS_SQL = text(
+    'UPDATE marketing_campaign SET leads = COALESCE(leads, 0) + :increment WHERE id = :campaign_id'
+)
+
+# Flushes an inquiry may fail before it is moved to the dead-letter file instead of retried
+MAX_FLUSH_ATTEMPTS = 5
+
+INQUIRY_COLUMNS = ('property_id', 'user_id', 'name', 'email', 'phone', 'message', 'inquiry_type', 'created_at')
+
+def log_notifier(app, notifications):
+    """Default notifier: one log line per recipient"""
+    for notification in notifications:
+        app.logger.info(
+            'New inquiry %s for property %s -> user %s (%s)',
+            notification['inquiry']['id'], notification['inquiry']['property_id'],
+            notification['recipient_id'], notification['role']
+        )
+
+class InquiryIntake:
+    """Accepts inquiries into a deduplicated append buffer and commits them in batches"""
+
+    def __init__(self):
+        self.log_dir = None
+        self.flush_interval = 1
+        self.dedup_window = timedelta(minutes=10)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.pending = []
+        self.recent = {}  # (email, property_id) -> time.monotonic() of the last accepted submission
+        self._log = None
+        self.notifiers = [log_notifier]
+        self.fanout = None
+        self.app = None
+
+    def init_app(self, app, log_dir, flush_interval=1, dedup_window_seconds=600, fanout_workers=2):
+        """Configure only; start() adopts orphaned logs and runs the flusher"""
+        self.app = app
+        self.log_dir = log_dir
+        self.flush_interval = flush_interval
+        self.dedup_window = timedelta(seconds=dedup_window_seconds)
+        self.fanout = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix='inquiry-fanout')
+
+    def add_notifier(self, notifier):
+        """Register a callable(app, notifications) run after each committed batch"""
+        self.notifiers.append(notifier)
+
+    def submit(self, inquiry):
+        """Buffer an inquiry; returns False if it duplicates a recent submission"""
+        key = (inquiry['email'].lower(), inquiry['property_id'])
+        now = time.monotonic()
+        window = self.dedup_window.total_seconds()
+
+        with self._lock:
+            last_seen = self.recent.get(key)
+            if last_seen is not None and now - last_seen < window:
+                return False
+            self.recent[key] = now
+
+            inquiry = dict(inquiry, created_at=datetime.utcnow().isoformat())
+            self.pending.append(inquiry)
+            log = self._append_log()
+            if log is not None:
+                log.append(json.dumps(inquiry))
+            return True
+
+    def _append_log(self):
+        """This worker's append log, opened by the first submission or start(); None before init_app (lock held)"""
+        if self._log is None and self.log_dir is not None:
+            self._log = AppendLog(self.log_dir, 'inquiries')
+        return self._log
+
+    def recover(self):
+        """Adopt logs left behind by workers that exited before flushing"""
+        recovered = []
+        with self._lock:
+            log = self._append_log()
+        for line in log.recover():
+            try:
+                recovered.append(json.loads(line))
+            except ValueError:
+                continue  # Torn final line from a crash
+
+        if recovered:
+            with self._lock:
+                self.pending.extend(recovered)
+        return len(recovered)
+
+    def sync_log(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.sync()
+
+    def _prune_recent(self):
+        cutoff = time.monotonic() - self.dedup_window.total_seconds()
+        with self._lock:
+            self.recent = {key: seen for key, seen in self.recent.items() if seen >= cutoff}
+
+    def _deduplicate(self, batch):
+        """Drop submissions already stored (possibly by another worker) within the window"""
+        property_ids = {inquiry['property_id'] for inquiry in batch}
+        earliest = min(datetime.fromisoformat(inquiry['created_at']) for inquiry in batch) - self.dedup_window
+
+        properties = {
+            row.id: row for row in db.session.query(Property.id, Property.owner_id, Property.agent_id).filter(
+                Property.id.in_(property_ids)
+            )
+        }
+        stored = {}
+        for email, property_id, created_at in db.session.query(
+            PropertyInquiry.email, PropertyInquiry.property_id, PropertyInquiry.created_at
+        ).filter(PropertyInquiry.property_id.in_(property_ids), PropertyInquiry.created_at >= earliest):
+            key = (email.lower(), property_id)
+            stored[key] = max(stored.get(key, created_at), created_at)
+
+        accepted = []
+        for inquiry in sorted(batch, key=lambda inquiry: inquiry['created_at']):
+            if inquiry['property_id'] not in properties:
+                continue
+            key = (inquiry['email'].lower(), inquiry['property_id'])
+            created_at = datetime.fromisoformat(inquiry['created_at'])
+            if key in stored and created_at - stored[key] < self.dedup_window:
+                continue
+            stored[key] = created_at
+            accepted.append(dict(inquiry, created_at=created_at))
+        return accepted, properties
+
+    def flush(self):
+        """Insert buffered inquiries in one batch and hand them to the notifiers; returns rows inserted"""
+        with self._flush_lock:
+            with self._lock:
+                if not self.pending:
+                    return 0
+                batch = self.pending
+                self.pending = []
+                if self._log is not None:
+                    self._log.rotate()
+
+            try:
+                accepted, properties = self._deduplicate(batch)
+                inserted = self._insert(accepted, properties)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # Keep the inquiries for the next flush, except ones that keep failing it
+                retry, dead = [], []
+                for inquiry in batch:
+                    inquiry = dict(inquiry, attempts=inquiry.get('attempts', 0) + 1)
+                    (dead if inquiry['attempts'] >= MAX_FLUSH_ATTEMPTS else retry).append(inquiry)
+                if dead:
+                    self._dead_letter(dead)
+                with self._lock:
+                    self.pending[:0] = retry
+                if not retry:
+                    self._remove_unconfirmed()
+                raise
+
+            self._remove_unconfirmed()
+            self._prune_recent()
+
+            if inserted and self.fanout is not None:
+                self.fanout.submit(self._notify, self._notifications(inserted, properties))
+            return len(inserted)
+
+    def _remove_unconfirmed(self):
+        if self._log is not None:
+            self._log.confirm()
+
+    def _dead_letter(self, inquiries):
+        """Set aside inquiries that keep failing the flush, for inspection and manual replay"""
+        path = os.path.join(self.log_dir, f'dead-inquiries-{self._log.owner}.jsonl')
+        with open(path, 'a') as f:
+            for inquiry in inquiries:
+                f.write(json.dumps(inquiry, default=str) + '\n')
+        self.app.logger.error('Moved %s inquiries to %s after %s failed flushes', len(inquiries), path, MAX_FLUSH_ATTEMPTS)
+
+    def _insert(self, accepted, properties):
+        """Batched INSERT plus lead counter updates; returns the inserted rows with their ids"""
+        if not accepted:
+            return []
+
+        rows = [{column: inquiry.get(column) for column in INQUIRY_COLUMNS} for inquiry in accepted]
+        for row in rows:
+            prop = properties[row['property_id']]
+            row['status'] = 'New'
+            row['inquiry_type'] = row['inquiry_type'] or 'General'
+            row['owner_id'], row['agent_id'] = prop.owner_id, prop.agent_id
+
+        table = PropertyInquiry.__table__
+        result = db.session.execute(table.insert().returning(table.c.id, sort_by_parameter_order=True), rows)
+        for row, inquiry_id in zip(rows, result.scalars()):
+            row['id'] = inquiry_id
+
+        apply_counter_deltas(db.session, counter_deltas(
+            (row['owner_id'], row['agent_id'], 'New', 1) for row in rows
+        ))
+
+        leads = {}
+        for inquiry in accepted:
+            if inquiry.get('campaign_id'):
+                leads[inquiry['campaign_id']] = leads.get(inquiry['campaign_id'], 0) + 1
+        if leads:
+            db.session.execute(INCREMENT_CAMPAIGN_LEADS_SQL, [
+                {'campaign_id': campaign_id, 'increment': increment} for campaign_id, increment in leads.items()
+            ])
+        return rows
+
+    @staticmethod
+    def _notifications(inserted, properties):
+        notifications = []
+        for row in inserted:
+            prop = properties[row['property_id']]
+            for recipient_id, role in ((prop.owner_id, 'owner'), (prop.agent_id, 'agent')):
+                if recipient_id and (role == 'owner' or recipient_id != prop.owner_id):
+                    notifications.append({'recipient_id': recipient_id, 'role': role, 'inquiry': row})
+        return notifications
+
+    def _notify(self, notifications):
+        for notifier in self.notifiers:
+            try:
+                notifier(self.app, notifications)
+            except Exception as e:
+                self.app.logger.error('Inquiry notifier %s failed: %s', getattr(notifier, '__name__', notifier), e)
+
+    def start(self, app):
+        """Adopt orphaned logs and flush periodically in a daemon thread (not at all when the interval is 0)"""
+        if self.flush_interval <= 0:
+            return None
+        self.recover()
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.wait(self.flush_interval):
+                with app.app_context():
+                    try:
+                        self.sync_log()
+                        self.flush()
+                    except Exception as e:
+                        app.logger.error('Inquiry intake flush failed: %s', e)
+                    finally:
+                        db.session.remove()
+
+        thread = threading.Thread(target=run, name='inquiry-intake', daemon=True)
+        thread.start()
+        return stop_event
+
+inquiry_intake = InquiryIntake()
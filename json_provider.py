@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+def _default(o):
+    """Serialize values the encoder does not handle natively"""
+    if isinstance(o, (datetime, date)):
+        # Match orjson's output so both backends emit ISO 8601
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that uses orjson when available and ISO 8601 datetimes everywhere"""
+
+    default = staticmethod(_default)
+    sort_keys = False
+
+    @property
+    def backend(self):
+        return 'orjson' if orjson is not None else 'json'
+
+    def _orjson_option(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # orjson has no equivalents for arbitrary json.dumps kwargs
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option()).decode()
+
+    def dumps_bytes(self, obj, pretty=False):
+        """Serialize straight to UTF-8 bytes, skipping the str round-trip"""
+        if orjson is None:
+            indent = 2 if pretty else None
+            separators = None if pretty else (',', ':')
+            return json.dumps(
+                obj, default=self.default, ensure_ascii=self.ensure_ascii,
+                sort_keys=self.sort_keys, indent=indent, separators=separators
+            ).encode('utf-8')
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option(pretty))
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            self.dumps_bytes(obj, pretty=pretty) + b'\n',
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,221 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import and_, event, func, inspect, or_, select, text, update
+from sqlalchemy.orm import joinedload
+from src.models.user import db
+from src.models.property import Property, PropertyInquiry, LeadCounter
+
+ROLES = ('owner', 'agent')
+MAX_PAGE_SIZE = 100
+MAX_TRANSITION_BATCH = 1000
+
+BACKFILL_RECIPIENTS_SQL = text(
+    'UPDATE property_inquiry SET '
+    'owner_id = (SELECT owner_id FROM property WHERE property.id = property_inquiry.property_id), '
+    'agent_id = (SELECT agent_id FROM property WHERE property.id = property_inquiry.property_id) '
+    'WHERE owner_id IS NULL'
+)
+
+def counter_deltas(rows):
+    """Counter deltas for (owner_id, agent_id, status, change) rows"""
+    deltas = Counter()
+    for owner_id, agent_id, status, change in rows:
+        status = status or 'New'
+        if owner_id:
+            deltas[(owner_id, 'owner', status)] += change
+        if agent_id and agent_id != owner_id:
+            deltas[(agent_id, 'agent', status)] += change
+    return deltas
+
+def _upsert_statement(bind):
+    table = LeadCounter.__table__
+    dialect = bind.dialect.name if hasattr(bind, 'dialect') else bind.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=['user_id', 'role', 'status'],
+        set_={'count': table.c.count + statement.excluded['count']}
+    )
+
+def apply_counter_deltas(bind, deltas):
+    """Apply deltas in the caller's transaction (bind is a session or connection)"""
+    params = [
+        {'user_id': user_id, 'role': role, 'status': status, 'count': change}
+        for (user_id, role, status), change in deltas.items() if change
+    ]
+    if not params:
+        return
+
+    statement = _upsert_statement(bind)
+    if statement is not None:
+        bind.execute(statement, params)
+        return
+
+    table = LeadCounter.__table__
+    for row in params:
+        result = bind.execute(
+            update(table).where(
+                table.c.user_id == row['user_id'], table.c.role == row['role'], table.c.status == row['status']
+            ).values(count=table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            bind.execute(table.insert(), row)
+
+def rebuild_lead_counters(bind):
+    """Backfill inquiry recipients and recompute every counter from the inquiries"""
+    bind.execute(BACKFILL_RECIPIENTS_SQL)
+    bind.execute(LeadCounter.__table__.delete())
+    rows = bind.execute(
+        select(PropertyInquiry.owner_id, PropertyInquiry.agent_id, PropertyInquiry.status, func.count())
+        .group_by(PropertyInquiry.owner_id, PropertyInquiry.agent_id, PropertyInquiry.status)
+    )
+    deltas = counter_deltas(rows)
+    apply_counter_deltas(bind, deltas)
+    return len(deltas)
+
+def backfill_lead_inbox():
+    """Fill recipients and counters on databases whose inquiries predate the lead inbox"""
+    missing = db.session.query(PropertyInquiry.id).join(Property, Property.id == PropertyInquiry.property_id).filter(
+        PropertyInquiry.owner_id.is_(None)
+    ).first()
+    if not missing:
+        return 0
+    rebuilt = rebuild_lead_counters(db.session)
+    db.session.commit()
+    return rebuilt
+
+def get_counters(user_id):
+    """Counts by status for the listings a user owns and the ones they manage as agent"""
+    counters = {role: {status: 0 for status in PropertyInquiry.STATUSES} for role in ROLES}
+    for role, status, count in db.session.query(LeadCounter.role, LeadCounter.status, LeadCounter.count).filter(
+        LeadCounter.user_id == user_id
+    ):
+        counters[role][status] = count
+    counters['unread'] = counters['owner']['New'] + counters['agent']['New']
+    return counters
+
+def encode_cursor(inquiry):
+    return f'{inquiry.created_at.isoformat()}_{inquiry.id}'
+
+def decode_cursor(cursor):
+    created_at, inquiry_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(inquiry_id)
+
+def get_queue(user_id, role, status=None, cursor=None, limit=20):
+    """One page of a user's inbox, newest first; returns (inquiries, next_cursor)"""
+    column = PropertyInquiry.owner_id if role == 'owner' else PropertyInquiry.agent_id
+    query = PropertyInquiry.query.options(
+        joinedload(PropertyInquiry.property).load_only(Property.title, Property.location)
+    ).filter(column == user_id)
+    if role == 'agent':
+        # Same rule as counter_deltas: on listings the agent also owns, inquiries count (and show) as owner
+        query = query.filter(or_(PropertyInquiry.owner_id.is_(None), PropertyInquiry.owner_id != user_id))
+
+    if status:
+        query = query.filter(PropertyInquiry.status == status)
+    if cursor:
+        created_at, inquiry_id = decode_cursor(cursor)
+        # Keyset pagination: stable under inserts and no OFFSET scan
+        query = query.filter(or_(
+            PropertyInquiry.created_at < created_at,
+            and_(PropertyInquiry.created_at == created_at, PropertyInquiry.id < inquiry_id)
+        ))
+
+    inquiries = query.order_by(PropertyInquiry.created_at.desc(), PropertyInquiry.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(inquiries[limit - 1]) if len(inquiries) > limit else None
+    return inquiries[:limit], next_cursor
+
+def transition_inquiries(user, inquiry_ids, new_status):
+    """Move a user's inquiries to a new status, one UPDATE per previous status; returns the number moved"""
+    visible = [PropertyInquiry.id.in_(inquiry_ids), PropertyInquiry.status != new_status]
+    if user.role != 'admin':
+        visible.append(or_(PropertyInquiry.owner_id == user.id, PropertyInquiry.agent_id == user.id))
+
+    try:
+        # Deltas come from the rows each UPDATE actually changed (RETURNING), so concurrent transitions of the
+        # same inquiries cannot double-count even where row locks are unavailable (SQLite). Counters touched
+        # by any other path can always be repaired with `flask rebuild-lead-counters`.
+        moved = 0
+        deltas = Counter()
+        for old_status in PropertyInquiry.STATUSES:
+            if old_status == new_status:
+                continue
+            changed = db.session.execute(
+                update(PropertyInquiry).where(*visible, PropertyInquiry.status == old_status)
+                .values(status=new_status).returning(PropertyInquiry.owner_id, PropertyInquiry.agent_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            moved += len(changed)
+            deltas.update(counter_deltas((owner_id, agent_id, old_status, -1) for owner_id, agent_id in changed))
+            deltas.update(counter_deltas((owner_id, agent_id, new_status, 1) for owner_id, agent_id in changed))
+        apply_counter_deltas(db.session, deltas)
+
+        db.session.commit()
+        return moved
+    except Exception:
+        db.session.rollback()
+        raise
+
+# Inquiries written through the ORM keep their counters in the same flush; batched
+# Core writes (inquiry intake, bulk transitions) call apply_counter_deltas themselves
+
+@event.listens_for(PropertyInquiry, 'before_insert')
+def _fill_recipients(mapper, connection, target):
+    if target.owner_id is None and target.property_id is not None:
+        row = connection.execute(
+            select(Property.owner_id, Property.agent_id).where(Property.id == target.property_id)
+        ).first()
+        if row:
+            target.owner_id, target.agent_id = row
+
+@event.listens_for(PropertyInquiry, 'after_insert')
+def _inquiry_inserted(mapper, connection, target):
+    apply_counter_deltas(connection, counter_deltas([(target.owner_id, target.agent_id, target.status, 1)]))
+
+@event.listens_for(PropertyInquiry, 'after_update')
+def _inquiry_updated(mapper, connection, target):
+    state = inspect(target)
+    previous = {}
+    for name in ('owner_id', 'agent_id', 'status'):
+        history = state.attrs[name].history
+        previous[name] = history.deleted[0] if history.deleted else getattr(target, name)
+    if previous == {name: getattr(target, name) for name in previous}:
+        return
+
+    deltas = counter_deltas([(previous['owner_id'], previous['agent_id'], previous['status'], -1)])
+    deltas.update(counter_deltas([(target.owner_id, target.agent_id, target.status, 1)]))
+    apply_counter_deltas(connection, deltas)
+
+@event.listens_for(PropertyInquiry, 'after_delete')
+def _inquiry_deleted(mapper, connection, target):
+    apply_counter_deltas(connection, counter_deltas([(target.owner_id, target.agent_id, target.status, -1)]))
+
+@event.listens_for(Property, 'after_update')
+def _property_reassigned(mapper, connection, target):
+    """Move a listing's inquiries and their counts when its owner or agent changes"""
+    state = inspect(target)
+    owner_history, agent_history = state.attrs.owner_id.history, state.attrs.agent_id.history
+    if not (owner_history.deleted or agent_history.deleted):
+        return
+
+    table = PropertyInquiry.__table__
+    rows = connection.execute(
+        select(table.c.owner_id, table.c.agent_id, table.c.status, func.count())
+        .where(table.c.property_id == target.id)
+        .group_by(table.c.owner_id, table.c.agent_id, table.c.status)
+    ).all()
+    if not rows:
+        return
+
+    connection.execute(
+        update(table).where(table.c.property_id == target.id)
+        .values(owner_id=target.owner_id, agent_id=target.agent_id)
+    )
+    deltas = counter_deltas((owner_id, agent_id, status, -count) for owner_id, agent_id, status, count in rows)
+    deltas.update(counter_deltas((target.owner_id, target.agent_id, status, count) for _, _, status, count in rows))
+    apply_counter_deltas(connection, deltas)
@@ -0,0 +1,129 @@
+from flask import Blueprint, request, jsonify
+from src.models.property import PropertyInquiry
+from src.models.subscription import MarketingCampaign
+from src.routes.auth import authenticate_request, require_auth, validate_email
+from src.utils.inquiry_intake import inquiry_intake
+from src.utils.lead_inbox import (
+    MAX_PAGE_SIZE, MAX_TRANSITION_BATCH, ROLES, get_counters, get_queue, transition_inquiries
+)
+
+leads_bp = Blueprint('leads', __name__)
+
+INQUIRY_LIMITS = {'name': 100, 'email': 120, 'phone': 20, 'inquiry_type': 50, 'message': 5000}
+
+@leads_bp.route('/inquiries', methods=['POST'])
+def submit_inquiry():
+    """Accept a property inquiry; it is stored by the next batch flush"""
+    try:
+        data = request.get_json(silent=True) or {}
+
+        try:
+            property_id = int(data.get('property_id'))
+            campaign_id = int(data['campaign_id']) if data.get('campaign_id') else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'property_id and campaign_id must be integers'}), 400
+
+        # Only an active campaign promoting this property may be credited with the lead
+        if campaign_id is not None and not MarketingCampaign.query.filter_by(
+            id=campaign_id, property_id=property_id, status='active'
+        ).first():
+            campaign_id = None
+
+        # Inquiries are public; a signed-in inquirer is linked to the inquiry
+        user_id = None
+        if request.headers.get('Authorization'):
+            session, error_response = authenticate_request()
+            if error_response is not None:
+                return error_response
+            user_id = session.user_id
+
+        inquiry = {'property_id': property_id, 'campaign_id': campaign_id, 'user_id': user_id}
+        for field, limit in INQUIRY_LIMITS.items():
+            value = data.get(field)
+            value = str(value).strip() if value is not None else None
+            if value and len(value) > limit:
+                return jsonify({'error': f'{field} must be at most {limit} characters'}), 400
+            inquiry[field] = value or None
+
+        if not inquiry['name'] or not inquiry['email']:
+            return jsonify({'error': 'name and email are required'}), 400
+        if not validate_email(inquiry['email']):
+            return jsonify({'error': 'Invalid email format'}), 400
+
+        accepted = inquiry_intake.submit(inquiry)
+        return jsonify({
+            'message': 'Inquiry received' if accepted else 'Inquiry already received',
+            'duplicate': not accepted
+        }), 202
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to submit inquiry', 'details': str(e)}), 500
+
+@leads_bp.route('/inbox/counts', methods=['GET'])
+@require_auth
+def get_inbox_counts():
+    """Get the current user's lead counts by status, as owner and as agent"""
+    try:
+        return jsonify({'counts': get_counters(request.current_user.id)}), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch lead counts', 'details': str(e)}), 500
+
+@leads_bp.route('/inbox', methods=['GET'])
+@require_auth
+def get_inbox():
+    """Get one page of the current user's leads, newest first"""
+    try:
+        role = request.args.get('role', 'owner')
+        status = request.args.get('status') or None
+        limit = max(1, min(request.args.get('limit', 20, type=int), MAX_PAGE_SIZE))
+
+        if role not in ROLES:
+            return jsonify({'error': f"role must be one of {', '.join(ROLES)}"}), 400
+        if status and status not in PropertyInquiry.STATUSES:
+            return jsonify({'error': f"status must be one of {', '.join(PropertyInquiry.STATUSES)}"}), 400
+
+        try:
+            inquiries, next_cursor = get_queue(
+                request.current_user.id, role, status=status, cursor=request.args.get('cursor'), limit=limit
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'inquiries': [inquiry.to_dict() for inquiry in inquiries],
+            'next_cursor': next_cursor
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch leads', 'details': str(e)}), 500
+
+@leads_bp.route('/inbox/status', methods=['POST'])
+@require_auth
+def update_inbox_status():
+    """Move several leads to a new status at once"""
+    try:
+        data = request.get_json() or {}
+        inquiry_ids = data.get('ids') or []
+        status = data.get('status')
+
+        if status not in PropertyInquiry.STATUSES:
+            return jsonify({'error': f"status must be one of {', '.join(PropertyInquiry.STATUSES)}"}), 400
+        if not isinstance(inquiry_ids, list) or not inquiry_ids:
+            return jsonify({'error': 'No inquiries provided'}), 400
+        if len(inquiry_ids) > MAX_TRANSITION_BATCH:
+            return jsonify({'error': f'At most {MAX_TRANSITION_BATCH} inquiries per update'}), 400
+
+        try:
+            inquiry_ids = [int(inquiry_id) for inquiry_id in inquiry_ids]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'ids must be integers'}), 400
+
+        updated = transition_inquiries(request.current_user, inquiry_ids, status)
+        return jsonify({
+            'updated': updated,
+            'counts': get_counters(request.current_user.id)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to update leads', 'details': str(e)}), 500
@@ -0,0 +1,119 @@
+import time
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, object_session
+from src.models.user import db
+from src.models.property import Property, ListingGeneration
+
+GENERATION_ID = 1
+
+def current_generation(bind=None):
+    """The committed listing generation, or None before migrate_schema has created its row"""
+    return (bind or db.session).execute(
+        select(ListingGeneration.value).where(ListingGeneration.id == GENERATION_ID)
+    ).scalar()
+
+def bump_generation(connection):
+    """Advance the generation in the caller's transaction; returns the new value (None without the row)
+
+    The row stays locked until the transaction ends, so every listing-writing commit gets its own value.
+    """
+    result = connection.execute(
+        update(ListingGeneration.__table__).where(ListingGeneration.id == GENERATION_ID)
+        .values(value=ListingGeneration.value + 1)
+    )
+    if not result.rowcount:
+        return None
+    return current_generation(connection)
+
+def ensure_generation_row():
+    """Create the generation row on databases that predate it; returns rows created"""
+    if db.session.get(ListingGeneration, GENERATION_ID) is not None:
+        return 0
+    db.session.add(ListingGeneration(id=GENERATION_ID, value=0))
+    db.session.commit()
+    return 1
+
+class GenerationTracker:
+    """Which listing generation an in-memory index reflects, plus this process's commits not yet applied to it
+
+    Own commits are applied strictly in generation order. A generation the process never saw committed means
+    another worker wrote listings, which the index can only pick up by rebuilding (at most every
+    rebuild_interval seconds). Callers hold their own lock around commit() and reset().
+    """
+
+    def __init__(self, check_interval=1.0, rebuild_interval=5.0):
+        self.check_interval = check_interval
+        self.rebuild_interval = rebuild_interval
+        self.generation = None
+        self.pending = {}  # generation -> that commit's changes
+        self.stale = False
+        self._last_check = 0
+        self._last_build = 0
+
+    def reset(self, generation, stale=False):
+        """Record a rebuild from a scan consistent with generation"""
+        self.generation = generation
+        self.pending = {
+            pending_generation: changes for pending_generation, changes in self.pending.items()
+            if generation is not None and pending_generation > generation
+        }
+        self.stale = stale
+        self._last_build = time.monotonic()
+
+    def commit(self, generation, changes):
+        """Queue one committed transaction's changes; returns the change lists that are now due, in order"""
+        if generation is None or self.generation is None:
+            return [changes]  # No shared generation (unmigrated database): local changes only
+        if generation > self.generation:
+            self.pending[generation] = changes
+        return self.drain()
+
+    def drain(self):
+        """Pop the queued change lists that directly follow the current generation"""
+        due = []
+        while self.generation is not None and self.generation + 1 in self.pending:
+            self.generation += 1
+            due.append(self.pending.pop(self.generation))
+        return due
+
+    def needs_rebuild(self):
+        """Whether the index misses writes (checks the shared generation at most every check_interval)"""
+        now = time.monotonic()
+        if now - self._last_build < self.rebuild_interval:
+            return False
+        if self.stale:
+            return True
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        current = current_generation()
+        return current is not None and self.generation is not None and current > self.generation
+
+def consistent_scan(scan, attempts=3):
+    """Run scan() between two reads of the generation; returns (result, generation, consistent)
+
+    If no listing write committed in between, the scan saw exactly that generation. Otherwise the scan may
+    include some of those writes and not others, so the caller marks the result stale.
+    """
+    for _ in range(attempts):
+        before = current_generation()
+        result = scan()
+        after = current_generation()
+        if before == after:
+            return result, before, True
+    return result, after, False
+
+@event.listens_for(Property, 'after_insert')
+@event.listens_for(Property, 'after_update')
+@event.listens_for(Property, 'after_delete')
+def _bump_on_listing_write(mapper, connection, target):
+    # Once per transaction that writes listing rows; the indexes' own row events fire for the same writes
+    session = object_session(target)
+    if session is not None and 'listing_generation' not in session.info:
+        session.info['listing_generation'] = bump_generation(connection)
+
+@event.listens_for(Session, 'after_begin')
+@event.listens_for(Session, 'after_rollback')
+def _forget_generation(session, *args):
+    # Read by the indexes' after_commit hooks, so it is only cleared when the next transaction starts
+    session.info.pop('listing_generation', None)
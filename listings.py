@@ -0,0 +1,209 @@
+from flask import Blueprint, Response, current_app, request, jsonify
+from sqlalchemy.orm import joinedload, load_only
+from src.models.user import db, User
+from src.models.property import Property
+from src.routes.auth import require_auth
+from src.utils.dedup import duplicate_index
+from src.utils.detail_cache import detail_cache, property_key
+from src.utils.projection import parse_fields
+from src.utils.property_search import feature_condition, search_condition
+from src.utils.ranking import TOP_K, trending_index, trending_property_ids
+from src.utils.recommender import similarity_index
+from src.utils.view_counter import view_counter
+
+listings_bp = Blueprint('listings', __name__)
+
+MAX_DUPLICATE_CHECK_BATCH = 1000
+MAX_SEARCH_RESULTS = 100
+
+def _listing_values(data):
+    values = {key: data.get(key) for key in ('title', 'description', 'address', 'location')}
+    for key, cast in (('latitude', float), ('longitude', float), ('area', float), ('bedrooms', int)):
+        value = data.get(key)
+        values[key] = cast(value) if value not in (None, '') else None
+    return values
+
+def _with_listing_summaries(results):
+    """Attach id, title and address of every matched existing listing"""
+    property_ids = {match['property_id'] for result in results for match in result['duplicates']}
+    if not property_ids:
+        return results
+    rows = Property.query.options(load_only(Property.title, Property.address, Property.location)).filter(
+        Property.id.in_(property_ids)
+    ).all()
+    summaries = {row.id: {'title': row.title, 'address': row.address, 'location': row.location} for row in rows}
+    for result in results:
+        for match in result['duplicates']:
+            match.update(summaries.get(match['property_id'], {}))
+    return results
+
+@listings_bp.route('/properties/<int:property_id>/view', methods=['POST'])
+def record_property_view(property_id):
+    """Record a property detail view (buffered, applied in batches)"""
+    try:
+        if not db.session.query(Property.id).filter(Property.id == property_id, Property.active == True).first():
+            return jsonify({'error': 'Property not found'}), 404
+
+        # Repeat views from one client count once per window, and each client is rate limited
+        counted = view_counter.record(property_id, client=request.remote_addr)
+        return jsonify({'message': 'View recorded', 'counted': counted}), 202
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to record view', 'details': str(e)}), 500
+
+@listings_bp.route('/properties/check-duplicates', methods=['POST'])
+@require_auth
+def check_duplicate_properties():
+    """Check one listing, or a bulk upload under 'properties', for near-duplicates"""
+    try:
+        data = request.get_json() or {}
+        items = data.get('properties') if 'properties' in data else [data]
+
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'No listings provided'}), 400
+        if len(items) > MAX_DUPLICATE_CHECK_BATCH:
+            return jsonify({'error': f'At most {MAX_DUPLICATE_CHECK_BATCH} listings per check'}), 400
+
+        try:
+            values = [_listing_values(item) for item in items]
+        except (AttributeError, TypeError, ValueError):
+            return jsonify({'error': 'Invalid listing data'}), 400
+
+        results = _with_listing_summaries(duplicate_index.find_batch_duplicates(values))
+        return jsonify({
+            'results': results,
+            'duplicates_found': sum(1 for result in results if result['duplicates'] or result['batch_duplicates'])
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to check for duplicates', 'details': str(e)}), 500
+
+def _build_property_detail(property_id):
+    prop = Property.query.options(
+        joinedload(Property.agent).load_only(User.full_name, User.phone, User.email)
+    ).get(property_id)
+    if prop is None or not prop.active:
+        return None
+    return current_app.json.dumps({'property': prop.to_dict()}).encode()
+
+@listings_bp.route('/properties/<int:property_id>/detail', methods=['GET'])
+def get_property_detail(property_id):
+    """Get a property with its agent, served from the detail cache, and record the view"""
+    try:
+        payload, source = detail_cache.get_or_build(
+            property_key(property_id), lambda: _build_property_detail(property_id)
+        )
+        if payload is None:
+            return jsonify({'error': 'Property not found'}), 404
+
+        view_counter.record(property_id, client=request.remote_addr)
+
+        response = Response(payload, mimetype='application/json')
+        response.headers['X-Cache'] = source.upper()
+        return response
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch property', 'details': str(e)}), 500
+
+@listings_bp.route('/properties/search', methods=['GET'])
+def search_properties():
+    """Full-text listing search (tsvector/GIN on Postgres, LIKE on SQLite), optionally filtered by feature"""
+    try:
+        query_text = (request.args.get('q') or '').strip()
+        features = request.args.getlist('feature')
+        if not query_text and not features:
+            return jsonify({'error': 'q or feature is required'}), 400
+        limit = min(request.args.get('limit', 20, type=int), MAX_SEARCH_RESULTS)
+
+        try:
+            fields = parse_fields(request.args.get('fields'), Property.FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        dialect = db.session.get_bind().dialect.name
+        query = Property.query.filter(Property.active == True)
+        rank = None
+        if query_text:
+            condition, rank = search_condition(dialect, query_text)
+            query = query.filter(condition)
+        for feature in features:
+            query = query.filter(feature_condition(dialect, feature))
+        if request.args.get('location'):
+            query = query.filter(Property.location == request.args['location'])
+        if fields:
+            query = query.options(*Property.projection_options(fields))
+
+        order_by = (rank.desc(), Property.popularity_score.desc()) if rank is not None else (Property.popularity_score.desc(),)
+        properties = query.order_by(*order_by, Property.id.desc()).limit(limit).all()
+
+        return jsonify({
+            'query': query_text,
+            'features': features,
+            'properties': [prop.to_dict(fields=fields) for prop in properties]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to search properties', 'details': str(e)}), 500
+
+@listings_bp.route('/properties/trending', methods=['GET'])
+def get_trending_properties():
+    """Get trending properties, optionally within one location"""
+    try:
+        location = request.args.get('location') or None
+        limit = min(request.args.get('limit', 10, type=int), TOP_K)
+
+        try:
+            fields = parse_fields(request.args.get('fields'), Property.FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        property_ids = trending_property_ids(location, limit)
+
+        # The index is only refreshed periodically; listings deactivated since then are skipped
+        query = Property.query.filter(Property.id.in_(property_ids), Property.active == True)
+        if fields:
+            query = query.options(*Property.projection_options(fields))
+        by_id = {prop.id: prop for prop in query.all()}
+
+        return jsonify({
+            'location': location,
+            'properties': [by_id[pid].to_dict(fields=fields) for pid in property_ids if pid in by_id],
+            'computed_at': trending_index.computed_at
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch trending properties', 'details': str(e)}), 500
+
+@listings_bp.route('/properties/<int:property_id>/similar', methods=['GET'])
+def get_similar_properties(property_id):
+    """Get listings similar to a property"""
+    try:
+        limit = min(request.args.get('limit', 6, type=int), 50)
+
+        try:
+            fields = parse_fields(request.args.get('fields'), Property.FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            matches = similarity_index.similar(property_id, limit)
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 503
+        if matches is None:
+            return jsonify({'error': 'Property not found'}), 404
+
+        query = Property.query.filter(Property.id.in_([match[0] for match in matches]))
+        if fields:
+            query = query.options(*Property.projection_options(fields))
+        by_id = {prop.id: prop for prop in query.all()}
+
+        return jsonify({
+            'property_id': property_id,
+            'similar': [
+                dict(by_id[match_id].to_dict(fields=fields), similarity=score)
+                for match_id, score in matches if match_id in by_id
+            ]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch similar properties', 'details': str(e)}), 500
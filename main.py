@@ -3,40 +3,93 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import click
+from flask import Flask, request
 from flask_cors import CORS
+from src.utils.startup import timed_import, import_time_report
 from src.models.user import db
 from src.models.property import Property, PropertyInquiry, PropertyFavorite
 from src.models.subscription import SubscriptionPlan, Payment, MarketingCampaign
-from src.routes.user import user_bp
-from src.routes.auth import auth_bp
-from src.routes.property import property_bp
-from src.routes.subscription import subscription_bp
-from src.routes.marketing import marketing_bp
+from src.utils.json_provider import FastJSONProvider
+from src.utils.database import database_uri, engine_options, init_sqlite_pragmas
+from src.utils.property_search import create_search_indexes
+from src.utils.schema_migrations import migrate_schema
+from src.utils.static_assets import StaticManifest, send_asset
+from src.utils.compression import init_compression
+from src.utils.perf import init_perf
+from src.utils.query_log import init_query_log
+from src.utils.view_counter import view_counter
+from src.utils.images import image_pipeline
+from src.utils.inquiry_intake import inquiry_intake
+from src.utils.outbox import outbox_dispatcher
+from src.utils.events import event_bus, publish_inquiries
+from src.utils.detail_cache import detail_cache
+from src.utils.sharding import shard_router
+from src.utils.ranking import start_ranking_job
+from src.utils.dedup import duplicate_index
+from src.utils.subscription_sweeper import sweep_expired_subscriptions, start_subscription_sweeper
+from src.utils.payment_reconciliation import (
+    FakePaymentProvider, process_webhook_inbox, reconcile_pending_payments, start_payment_reconciler
+)
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'luxury_real_estate_secret_key_2024'
 
+# Fast JSON encoding (orjson when installed) with ISO 8601 datetimes
+app.json = FastJSONProvider(app)
+
 # Enable CORS for all routes
 CORS(app, origins=['*'], supports_credentials=True)
 
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(property_bp, url_prefix='/api')
-app.register_blueprint(subscription_bp, url_prefix='/api/subscription')
-app.register_blueprint(marketing_bp, url_prefix='/api/marketing')
+# Compress large dynamic responses (JSON API pages)
+init_compression(app, min_size=int(os.environ.get('COMPRESSION_MIN_SIZE', '1024')))
+
+# Per-request query counts, DB time and latency (Server-Timing + /api/admin/perf)
+init_perf(app)
+
+# Slow-query log with fingerprinting and N+1 detection (/api/admin/queries)
+init_query_log(
+    app,
+    log_path=os.path.join(os.path.dirname(__file__), 'logs', 'slow_queries.log'),
+    slow_ms=float(os.environ.get('SLOW_QUERY_MS', '100')),
+    n_plus_one_threshold=int(os.environ.get('N_PLUS_ONE_THRESHOLD', '10'))
+)
+
+# Register blueprints (import time of each is recorded for the start-up report)
+BLUEPRINTS = [
+    ('src.routes.user', 'user_bp', '/api'),
+    ('src.routes.auth', 'auth_bp', '/api/auth'),
+    ('src.routes.property', 'property_bp', '/api'),
+    ('src.routes.subscription', 'subscription_bp', '/api/subscription'),
+    ('src.routes.marketing', 'marketing_bp', '/api/marketing'),
+    ('src.routes.webhooks', 'webhooks_bp', '/api/webhooks'),
+    ('src.routes.admin', 'admin_bp', '/api/admin'),
+    ('src.routes.listings', 'listings_bp', '/api'),
+    ('src.routes.analytics', 'analytics_bp', '/api/analytics'),
+    ('src.routes.media', 'media_bp', '/api/media'),
+    ('src.routes.leads', 'leads_bp', '/api/leads'),
+    ('src.routes.stream', 'stream_bp', '/api/stream'),
+    ('src.routes.batch', 'batch_bp', '/api/batch')
+]
+for module_name, blueprint_name, url_prefix in BLUEPRINTS:
+    app.register_blueprint(timed_import(module_name, blueprint_name), url_prefix=url_prefix)
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# DATABASE_URL selects the backend (postgresql://... or the SQLite file by default); pool sizing via DB_* variables
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(os.path.join(os.path.dirname(__file__), 'database', 'app.db'))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
+with app.app_context():
+    init_sqlite_pragmas(db.engine)
 
 def init_database():
     """Initialize database with sample data"""
     with app.app_context():
         # Create all tables
         db.create_all()
+        app.logger.info('Schema migration: %s', migrate_schema())
+        create_search_indexes(db.engine)
         
         # Create default subscription plans if they don't exist
         if not SubscriptionPlan.query.first():
@@ -97,42 +150,210 @@ def init_database():
             db.session.commit()
             print("Created default subscription plans")
 
-# Initialize database
-init_database()
+# Schema creation and seeding is a one-shot command, not per-worker start-up work.
+# Set INIT_DB_ON_STARTUP=1 to keep the old behaviour (e.g. single-process development).
+if os.environ.get('INIT_DB_ON_STARTUP') == '1':
+    init_database()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create tables, migrate existing ones and create default subscription plans"""
+    init_database()
+    print("Database initialized")
+
+@app.cli.command('import-report')
+@click.option('--limit', default=25, help='Number of modules to show')
+def import_report_command(limit):
+    """Show the slowest imports when loading the app in a fresh interpreter"""
+    import json
+    
+    print(json.dumps(import_time_report('src.main', limit=limit), indent=2))
+
+@app.cli.command('sweep-subscriptions')
+def sweep_subscriptions_command():
+    """Expire lapsed subscriptions once and print a summary"""
+    print(sweep_expired_subscriptions())
+
+@app.cli.command('generate-data')
+@click.option('--properties', default=10000, help='Number of properties to generate')
+@click.option('--seed', default=42, help='Random seed; the same seed reproduces the same data')
+@click.option('--now', type=click.DateTime(), default=None,
+              help='Reference time for generated timestamps (default: start of today, UTC); reuse it to reproduce a run')
+def generate_data_command(properties, seed, now):
+    """Bulk-generate a production-shaped synthetic dataset"""
+    from src.utils.datagen import DataGenerator
+    
+    generator = DataGenerator(db.engine, seed=seed, now=now)
+    print(generator.generate(
+        users=max(properties // 10, 10),
+        properties=properties,
+        campaigns=max(properties // 2, 10),
+        sessions=max(properties // 5, 10),
+        payments=max(properties // 5, 10),
+        inquiries=max(properties // 2, 10),
+        favorites=properties
+    ))
+
+# Shared secret for payment webhook signatures; webhooks are refused until it is set
+app.config['PAYMENT_WEBHOOK_SECRET'] = os.environ.get('PAYMENT_WEBHOOK_SECRET')
+
+# Payment provider used for reconciliation (the local stub stands in until a real provider is configured)
+app.config['PAYMENT_PROVIDER'] = FakePaymentProvider() if os.environ.get('PAYMENT_PROVIDER') == 'fake' else None
+
+@app.cli.command('reconcile-payments')
+def reconcile_payments_command():
+    """Drain the webhook inbox and reconcile pending payments once"""
+    print(process_webhook_inbox())
+    provider = app.config['PAYMENT_PROVIDER']
+    if provider is not None:
+        print(reconcile_pending_payments(provider))
+
+# Transactional outbox for emails, social posts and ad platform calls (OUTBOX_INTERVAL=0 disables the dispatcher)
+outbox_dispatcher.init_app(
+    app,
+    interval=float(os.environ.get('OUTBOX_INTERVAL', '2')),
+    batch_size=int(os.environ.get('OUTBOX_BATCH_SIZE', '100')),
+    max_attempts=int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '10'))
+)
+
+@app.cli.command('dispatch-outbox')
+def dispatch_outbox_command():
+    """Dispatch every due outbox event once"""
+    print(outbox_dispatcher.drain())
+
+# Buffered property view counts, flushed as one batched UPDATE per interval
+view_counter.init_app(
+    app,
+    log_dir=os.path.join(os.path.dirname(__file__), 'database', 'view_logs'),
+    flush_interval=int(os.environ.get('VIEW_FLUSH_INTERVAL', '5'))
+)
+
+# Optional per-tenant read copies of properties, inquiries, campaigns and payments (SHARD_COUNT=0 disables).
+# Writes stay on the main database; SHARD_READS=1 points reports at the copies as of the last shard-data run.
+shard_router.init_app(
+    app,
+    shard_dir=os.path.join(os.path.dirname(__file__), 'database', 'shards'),
+    shard_count=int(os.environ.get('SHARD_COUNT', '0')),
+    serve_reads=os.environ.get('SHARD_READS') == '1'
+)
+
+@app.cli.command('shard-data')
+def shard_data_command():
+    """Refresh the shard copies of tenant-owned rows from the main database"""
+    if not shard_router.enabled:
+        print('Sharding is disabled; set SHARD_COUNT')
+        return
+    print(shard_router.copy_from(db.engine))
+
+# Property detail cache: per-worker LRU over a shared SQLite file (set DETAIL_CACHE_PATH= for L1 only)
+detail_cache.init_app(
+    app,
+    l2_path=os.environ.get('DETAIL_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'database', 'detail_cache.db')) or None,
+    max_entries=int(os.environ.get('DETAIL_CACHE_ENTRIES', '5000')),
+    ttl=int(os.environ.get('DETAIL_CACHE_TTL', '300'))
+)
+
+# Public inquiries go to a deduplicated append buffer, committed in batches with async owner/agent fan-out
+inquiry_intake.init_app(
+    app,
+    log_dir=os.path.join(os.path.dirname(__file__), 'database', 'inquiry_logs'),
+    flush_interval=float(os.environ.get('INQUIRY_FLUSH_INTERVAL', '1')),
+    dedup_window_seconds=int(os.environ.get('INQUIRY_DEDUP_WINDOW', '600'))
+)
+
+# Server-Sent Events; the SQLite file relays events between workers (set EVENT_BROKER_PATH= to disable)
+event_bus.init_app(
+    app,
+    broker_path=os.environ.get('EVENT_BROKER_PATH', os.path.join(os.path.dirname(__file__), 'database', 'events.db')) or None
+)
+inquiry_intake.add_notifier(publish_inquiries)
+
+@app.cli.command('backfill-user-search')
+def backfill_user_search_command():
+    """Fill the normalized username and phone columns used by the admin user search"""
+    from src.utils.user_search import backfill_search_columns
+    
+    print(backfill_search_columns())
+
+@app.cli.command('rebuild-lead-counters')
+def rebuild_lead_counters_command():
+    """Backfill inquiry recipients and recompute the lead inbox counters"""
+    from src.utils.lead_inbox import rebuild_lead_counters
+    
+    print(rebuild_lead_counters(db.session))
+    db.session.commit()
+
+# Uploaded images are resized into WebP/AVIF variants on a worker pool and stored by content hash
+image_pipeline.init_app(
+    app,
+    store_dir=os.environ.get('MEDIA_STORE_DIR', os.path.join(os.path.dirname(__file__), 'database', 'media')),
+    workers=int(os.environ.get('IMAGE_WORKERS', '0')) or None
+)
+
+@app.cli.command('compute-trending')
+def compute_trending_command():
+    """Recompute popularity scores once"""
+    from src.utils.ranking import refresh_rankings
+    
+    print(refresh_rankings())
+
+def start_background_jobs():
+    """Start the periodic jobs in daemon threads; called by the server entry points, never at import
+
+    CLI commands, benchmarks and tests import the app without them. Set BACKGROUND_JOBS=0 to run a web
+    process without jobs (intervals in seconds, 0 disables a single job).
+    """
+    if os.environ.get('BACKGROUND_JOBS', '1') == '0':
+        return
+
+    sweeper_interval = int(os.environ.get('SUBSCRIPTION_SWEEP_INTERVAL', '300'))
+    if sweeper_interval > 0:
+        start_subscription_sweeper(app, interval_seconds=sweeper_interval)
+
+    reconcile_interval = int(os.environ.get('PAYMENT_RECONCILE_INTERVAL', '60'))
+    if reconcile_interval > 0:
+        start_payment_reconciler(app, provider=app.config['PAYMENT_PROVIDER'], interval_seconds=reconcile_interval)
+
+    # Precomputed trending rankings
+    ranking_interval = int(os.environ.get('RANKING_INTERVAL', '600'))
+    if ranking_interval > 0:
+        start_ranking_job(app, interval_seconds=ranking_interval)
+
+    outbox_dispatcher.start(app)
+    view_counter.start(app)
+    inquiry_intake.start(app)
+    event_bus.start(app)
+    duplicate_index.start(app)
+
+# Static asset manifest, built once at startup instead of stat-ing files per request
+frontend_build_path = os.path.join(app.static_folder, 'frontend', 'dist')
+static_manifest = StaticManifest(frontend_build_path)
+if not static_manifest:
+    # Fallback to development React app
+    static_manifest = StaticManifest(app.static_folder)
+
+def serve_index():
+    """Serve the React app shell"""
+    index_entry = static_manifest.get('index.html')
+    if index_entry is None:
+        return "Frontend not found. Please build the React app first.", 404
+    return send_asset(index_entry)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
     """Serve React frontend"""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-
-    # Check if it's a built React app
-    frontend_build_path = os.path.join(static_folder_path, 'frontend', 'dist')
-    if os.path.exists(frontend_build_path):
-        # Serve from built React app
-        if path != "" and os.path.exists(os.path.join(frontend_build_path, path)):
-            return send_from_directory(frontend_build_path, path)
-        else:
-            index_path = os.path.join(frontend_build_path, 'index.html')
-            if os.path.exists(index_path):
-                return send_from_directory(frontend_build_path, 'index.html')
-    
-    # Fallback to development React app
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "Frontend not found. Please build the React app first.", 404
+    entry = static_manifest.get(path) if path else None
+    if entry is not None:
+        return send_asset(entry)
+    return serve_index()
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors by serving React app"""
-    return serve('')
+    if request.path.startswith('/api/'):
+        return {"error": "Not found"}, 404
+    return serve_index()
 
 @app.errorhandler(500)
 def internal_error(error):
@@ -151,5 +372,9 @@ def health_check():
     }, 200
 
 if __name__ == '__main__':
+    init_database()
+    # The reloader re-runs this file in a child process; only that child serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
     app.run(host='0.0.0.0', port=5000, debug=True)
 
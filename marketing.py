@@ -1,11 +1,14 @@
 from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import case, func, select
 from src.models.user import db, User
 from src.models.property import Property
 from src.models.subscription import MarketingCampaign
 from src.routes.auth import require_auth, require_role
+from src.utils.outbox import enqueue
+from src.utils.projection import parse_fields
+from src.utils.sharding import shard_router
 from datetime import datetime, timedelta
 import json
-import requests
 import os
 
 marketing_bp = Blueprint('marketing', __name__)
@@ -40,8 +43,17 @@ def get_campaigns():
         platform = request.args.get('platform')
         status = request.args.get('status')
         
+        # Optional sparse fieldset, e.g. ?fields=name,status,performance
+        try:
+            fields = parse_fields(request.args.get('fields'), MarketingCampaign.FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         query = MarketingCampaign.query.filter_by(user_id=user.id)
         
+        if fields:
+            query = query.options(*MarketingCampaign.projection_options(fields))
+        
         if platform:
             query = query.filter_by(platform=platform)
         
@@ -55,7 +67,7 @@ def get_campaigns():
         )
         
         return jsonify({
-            'campaigns': [campaign.to_dict() for campaign in campaigns.items],
+            'campaigns': [campaign.to_dict(fields=fields) for campaign in campaigns.items],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -202,35 +214,29 @@ def launch_campaign(campaign_id):
         if campaign.status != 'draft':
             return jsonify({'error': 'Only draft campaigns can be launched'}), 400
         
-        # For demo purposes, we'll simulate campaign launch
-        # In production, you would integrate with actual ad platforms
+        # Update campaign status; the ad platform is notified from the outbox and fills in platform_campaign_id
+        campaign.status = 'active'
+        campaign.start_date = datetime.utcnow()
+        
+        # Set end date based on budget and daily budget
+        if campaign.daily_budget:
+            days_duration = campaign.budget // campaign.daily_budget
+            campaign.end_date = datetime.utcnow() + timedelta(days=days_duration)
+        
+        enqueue('campaign.launched', 'campaign', campaign.id, {
+            'campaign_id': campaign.id,
+            'platform': campaign.platform,
+            'budget': campaign.budget,
+            'daily_budget': campaign.daily_budget,
+            'start_date': campaign.start_date,
+            'end_date': campaign.end_date
+        })
+        db.session.commit()
         
-        try:
-            # Simulate platform API call
-            platform_campaign_id = f"{campaign.platform}_{campaign.id}_{datetime.utcnow().timestamp()}"
-            
-            # Update campaign status
-            campaign.status = 'active'
-            campaign.platform_campaign_id = platform_campaign_id
-            campaign.start_date = datetime.utcnow()
-            
-            # Set end date based on budget and daily budget
-            if campaign.daily_budget:
-                days_duration = campaign.budget // campaign.daily_budget
-                campaign.end_date = datetime.utcnow() + timedelta(days=days_duration)
-            
-            db.session.commit()
-            
-            return jsonify({
-                'message': 'Campaign launched successfully',
-                'campaign': campaign.to_dict()
-            }), 200
-            
-        except Exception as platform_error:
-            return jsonify({
-                'error': 'Failed to launch campaign on platform',
-                'details': str(platform_error)
-            }), 400
+        return jsonify({
+            'message': 'Campaign launched successfully',
+            'campaign': campaign.to_dict()
+        }), 200
         
     except Exception as e:
         db.session.rollback()
@@ -256,6 +262,7 @@ def pause_campaign(campaign_id):
         
         # Update campaign status
         campaign.status = 'paused'
+        enqueue('campaign.paused', 'campaign', campaign.id, {'campaign_id': campaign.id, 'platform': campaign.platform})
         db.session.commit()
         
         return jsonify({
@@ -347,45 +354,41 @@ def share_property():
         if not user.social_media_promotion and user.role != 'admin':
             return jsonify({'error': 'Social media promotion not enabled in your plan'}), 403
         
+        # Posting happens from the outbox; the request only records one event per platform
         results = []
-        
         for platform in platforms:
-            try:
-                # For demo purposes, simulate social media posting
-                # In production, you would use actual social media APIs
-                
-                post_data = {
-                    'platform': platform,
-                    'property_id': property_id,
-                    'message': message,
-                    'property_title': property.title,
-                    'property_price': property.price,
-                    'property_location': property.location,
-                    'property_image': property.main_image,
-                    'posted_at': datetime.utcnow().isoformat(),
-                    'post_id': f"{platform}_{property_id}_{datetime.utcnow().timestamp()}"
-                }
-                
-                results.append({
-                    'platform': platform,
-                    'status': 'success',
-                    'post_id': post_data['post_id'],
-                    'message': f'Successfully posted to {platform}'
-                })
-                
-            except Exception as platform_error:
+            if platform not in SOCIAL_PLATFORMS:
                 results.append({
                     'platform': platform,
                     'status': 'error',
-                    'message': f'Failed to post to {platform}: {str(platform_error)}'
+                    'message': f'Unsupported platform {platform}'
                 })
+                continue
+            
+            enqueue('property.social_share_requested', 'property', property_id, {
+                'platform': platform,
+                'property_id': property_id,
+                'user_id': user.id,
+                'message': message,
+                'property_title': property.title,
+                'property_price': property.price,
+                'property_location': property.location,
+                'property_image': property.main_image
+            })
+            results.append({
+                'platform': platform,
+                'status': 'queued',
+                'message': f'Post to {platform} queued'
+            })
+        db.session.commit()
         
         return jsonify({
-            'message': 'Social media sharing completed',
+            'message': 'Social media sharing queued',
             'results': results
-        }), 200
+        }), 202
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Failed to share property', 'details': str(e)}), 500
 
 @marketing_bp.route('/platforms', methods=['GET'])
@@ -500,8 +503,17 @@ def get_all_campaigns():
         platform = request.args.get('platform')
         status = request.args.get('status')
         
+        # Optional sparse fieldset, e.g. ?fields=name,status,performance
+        try:
+            fields = parse_fields(request.args.get('fields'), MarketingCampaign.FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         query = MarketingCampaign.query
         
+        if fields:
+            query = query.options(*MarketingCampaign.projection_options(fields))
+        
         if platform:
             query = query.filter_by(platform=platform)
         
@@ -515,7 +527,7 @@ def get_all_campaigns():
         )
         
         return jsonify({
-            'campaigns': [campaign.to_dict() for campaign in campaigns.items],
+            'campaigns': [campaign.to_dict(fields=fields) for campaign in campaigns.items],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -529,26 +541,42 @@ def get_all_campaigns():
     except Exception as e:
         return jsonify({'error': 'Failed to fetch campaigns', 'details': str(e)}), 500
 
+def _campaign_stats(bind):
+    """Campaign totals and per-platform counts from one database (session or connection)"""
+    table = MarketingCampaign.__table__
+    overview = bind.execute(select(
+        func.count(),
+        func.sum(case((table.c.status == 'active', 1), else_=0)),
+        func.sum(table.c.cost_spent)
+    )).one()
+    platforms = bind.execute(
+        select(table.c.platform, func.count(), func.sum(table.c.cost_spent)).group_by(table.c.platform)
+    ).all()
+    return overview, platforms
+
 @marketing_bp.route('/admin/stats', methods=['GET'])
 @require_role('admin')
 def get_marketing_stats():
     """Get marketing statistics (admin only)"""
     try:
-        # Get overall statistics
-        total_campaigns = MarketingCampaign.query.count()
-        active_campaigns = MarketingCampaign.query.filter_by(status='active').count()
-        
-        # Get total spend
-        total_spent = db.session.query(
-            db.func.sum(MarketingCampaign.cost_spent)
-        ).scalar() or 0
-        
-        # Get platform distribution
-        platform_stats = db.session.query(
-            MarketingCampaign.platform,
-            db.func.count(MarketingCampaign.id).label('count'),
-            db.func.sum(MarketingCampaign.cost_spent).label('spent')
-        ).group_by(MarketingCampaign.platform).all()
+        # One aggregate pass per database; with SHARD_READS every shard copy runs it in parallel
+        if shard_router.reads_enabled:
+            results = shard_router.fan_out(_campaign_stats)
+        else:
+            results = [_campaign_stats(db.session)]
+        
+        total_campaigns = sum(overview[0] or 0 for overview, _ in results)
+        active_campaigns = sum(overview[1] or 0 for overview, _ in results)
+        total_spent = sum(overview[2] or 0 for overview, _ in results)
+        
+        # Merge platform distribution across shards
+        merged_platforms = {}
+        for _, platforms in results:
+            for platform, count, spent in platforms:
+                merged = merged_platforms.setdefault(platform, [0, 0])
+                merged[0] += count or 0
+                merged[1] += spent or 0
+        platform_stats = [(platform, count, spent) for platform, (count, spent) in merged_platforms.items()]
         
         return jsonify({
             'overview': {
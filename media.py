@@ -0,0 +1,55 @@
+from flask import Blueprint, request, jsonify, send_file
+from src.routes.auth import require_auth
+from src.utils.images import MAX_UPLOAD_BYTES, image_pipeline
+from src.utils.static_assets import IMMUTABLE_MAX_AGE
+
+media_bp = Blueprint('media', __name__)
+
+MAX_FILES_PER_UPLOAD = 20
+
+@media_bp.route('/images', methods=['POST'])
+@require_auth
+def upload_images():
+    """Upload property images; variants are generated in parallel before responding"""
+    try:
+        files = request.files.getlist('images')
+        if not files:
+            return jsonify({'error': 'No images provided'}), 400
+        if len(files) > MAX_FILES_PER_UPLOAD:
+            return jsonify({'error': f'At most {MAX_FILES_PER_UPLOAD} images per upload'}), 400
+
+        payloads = [upload.read(MAX_UPLOAD_BYTES + 1) for upload in files]
+        if any(len(data) > MAX_UPLOAD_BYTES for data in payloads):
+            return jsonify({'error': 'Image is too large'}), 413
+
+        try:
+            futures = [image_pipeline.submit(data) for data in payloads]
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 503
+
+        images = []
+        for upload, future in zip(files, futures):
+            try:
+                manifest = future.result()
+            except RuntimeError as e:
+                return jsonify({'error': str(e)}), 503
+            except (OSError, ValueError):
+                return jsonify({'error': f'{upload.filename} is not a valid image'}), 400
+            images.append(image_pipeline.responsive(manifest))
+
+        # Store 'src' in main_image / gallery_images; to_dict expands it back to the variants
+        return jsonify({'images': images}), 201
+
+    except Exception as e:
+        return jsonify({'error': 'Image upload failed', 'details': str(e)}), 500
+
+@media_bp.route('/<digest>/<filename>', methods=['GET'])
+def serve_image(digest, filename):
+    """Serve a stored variant; paths are content-addressed so they never change"""
+    path = image_pipeline.file_path(digest, filename)
+    if path is None:
+        return jsonify({'error': 'Image not found'}), 404
+
+    response = send_file(path, conditional=True, etag=f'{digest}-{filename}', max_age=IMMUTABLE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
@@ -0,0 +1,305 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session, aliased
+from src.models.user import db, User
+from src.models.subscription import MarketingCampaign, OutboxEvent
+
+MAX_ERROR_LENGTH = 2000
+
+def enqueue(event_type, aggregate_type, aggregate_id, payload, session=None):
+    """Record a side effect in the caller's transaction; it is dispatched only once that transaction commits"""
+    session = session or db.session
+    session.add(OutboxEvent(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=str(aggregate_id),
+        payload=json.dumps(payload, default=str),
+        status='pending',
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    ))
+    session.info['outbox_pending'] = True
+
+# Default handlers. They stand in for the mail, social and ad platform integrations and, like every handler,
+# must be idempotent: a dispatcher that dies mid-batch leaves its events to be delivered again
+
+def send_password_reset_email(app, outbox_event):
+    # Secrets never go into the outbox; a token that was used or replaced since is simply not sent
+    user = db.session.get(User, outbox_event['payload']['user_id'])
+    if user is None or not user.is_reset_token_valid():
+        return
+    app.logger.info('Password reset email for user %s sent to %s', user.id, user.email)
+
+def post_to_social_platform(app, outbox_event):
+    payload = outbox_event['payload']
+    app.logger.info('Posted property %s to %s (post %s_%s)', payload['property_id'], payload['platform'],
+                    payload['platform'], outbox_event['id'])
+
+def create_platform_campaign(app, outbox_event):
+    payload = outbox_event['payload']
+    # The event id keeps the platform campaign id stable across retries
+    platform_campaign_id = f"{payload['platform']}_{payload['campaign_id']}_{outbox_event['id']}"
+    MarketingCampaign.query.filter(
+        MarketingCampaign.id == payload['campaign_id'],
+        MarketingCampaign.platform_campaign_id.is_(None)
+    ).update({'platform_campaign_id': platform_campaign_id}, synchronize_session=False)
+    db.session.commit()
+    app.logger.info('Launched campaign %s on %s', payload['campaign_id'], payload['platform'])
+
+def pause_platform_campaign(app, outbox_event):
+    payload = outbox_event['payload']
+    app.logger.info('Paused campaign %s on %s', payload['campaign_id'], payload['platform'])
+
+def notify_payment_status(app, outbox_event):
+    payload = outbox_event['payload']
+    app.logger.info('Payment %s is %s', payload['stripe_payment_id'], payload['status'])
+
+class OutboxDispatcher:
+    """Drains the outbox in batches with retries, keeping each aggregate's events in order"""
+
+    def __init__(self):
+        self.app = None
+        self.interval = 2
+        self.batch_size = 100
+        self.max_attempts = 10
+        self.lease = timedelta(seconds=60)
+        self.retry_base = 5
+        self.retry_max = 3600
+        self.retention = timedelta(days=7)
+        self.failed_retention = timedelta(days=30)
+        self.executor = None
+        self.worker_id = None
+        self._wake = threading.Event()
+        self._dispatch_lock = threading.Lock()
+        self._last_purge = 0
+        self.handlers = {
+            'user.password_reset_requested': send_password_reset_email,
+            'property.social_share_requested': post_to_social_platform,
+            'campaign.launched': create_platform_campaign,
+            'campaign.paused': pause_platform_campaign,
+            'payment.completed': notify_payment_status,
+            'payment.failed': notify_payment_status,
+            'payment.refunded': notify_payment_status
+        }
+        self.stats = {'dispatched': 0, 'retried': 0, 'failed': 0}
+
+    def init_app(self, app, interval=2, batch_size=100, max_attempts=10, lease_seconds=60, workers=4):
+        """Configure the dispatcher; interval 0 leaves dispatching to the dispatch-outbox command"""
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lease = timedelta(seconds=lease_seconds)
+        self.worker_id = f'{socket.gethostname()}-{os.getpid()}'
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='outbox')
+
+    def register(self, event_type, handler):
+        """Register a callable(app, event) for event_type; raising schedules a retry"""
+        self.handlers[event_type] = handler
+
+    def wake(self):
+        """Dispatch now instead of at the next interval (called after a commit that enqueued events)"""
+        self._wake.set()
+
+    def _claim(self, now):
+        """Lease a batch of due events whose earlier events (per aggregate) are all due and unclaimed"""
+        earlier = aliased(OutboxEvent)
+        blocked = select(earlier.id).where(
+            earlier.aggregate_type == OutboxEvent.aggregate_type,
+            earlier.aggregate_id == OutboxEvent.aggregate_id,
+            earlier.status == 'pending',
+            earlier.id < OutboxEvent.id,
+            or_(earlier.next_attempt_at > now, earlier.locked_until > now)
+        ).exists()
+        unlocked = or_(OutboxEvent.locked_until.is_(None), OutboxEvent.locked_until <= now)
+        candidate_ids = db.session.execute(
+            select(OutboxEvent.id).where(
+                OutboxEvent.status == 'pending', OutboxEvent.next_attempt_at <= now, unlocked, ~blocked
+            ).order_by(OutboxEvent.id).limit(self.batch_size)
+        ).scalars().all()
+        if not candidate_ids:
+            return []
+
+        # The lock guard makes the claim safe against other workers claiming the same rows
+        token = f'{self.worker_id}-{uuid.uuid4().hex[:12]}'
+        OutboxEvent.query.filter(OutboxEvent.id.in_(candidate_ids), OutboxEvent.status == 'pending', unlocked).update(
+            {'locked_by': token, 'locked_until': now + self.lease}, synchronize_session=False
+        )
+        db.session.commit()
+
+        claimed = OutboxEvent.query.filter(OutboxEvent.locked_by == token).order_by(OutboxEvent.id).all()
+        if not claimed:
+            return []
+
+        # Another worker may have claimed (or a late commit inserted) an earlier event of one of these aggregates
+        # between the select and the claim; give back everything queued behind it
+        first_foreign = {
+            (aggregate_type, aggregate_id): first_id
+            for aggregate_type, aggregate_id, first_id in db.session.execute(
+                select(OutboxEvent.aggregate_type, OutboxEvent.aggregate_id, func.min(OutboxEvent.id)).where(
+                    OutboxEvent.status == 'pending',
+                    OutboxEvent.aggregate_id.in_(list({row.aggregate_id for row in claimed})),
+                    or_(OutboxEvent.locked_by.is_(None), OutboxEvent.locked_by != token),
+                    OutboxEvent.id < claimed[-1].id
+                ).group_by(OutboxEvent.aggregate_type, OutboxEvent.aggregate_id)
+            )
+        }
+        events, released = [], []
+        for row in claimed:
+            first_id = first_foreign.get((row.aggregate_type, row.aggregate_id))
+            if first_id is not None and first_id < row.id:
+                released.append(row.id)
+                continue
+            events.append({
+                'id': row.id,
+                'event_type': row.event_type,
+                'aggregate_type': row.aggregate_type,
+                'aggregate_id': row.aggregate_id,
+                'payload': json.loads(row.payload),
+                'attempts': row.attempts,
+                'created_at': row.created_at
+            })
+        if released:
+            self._release(released)
+            db.session.commit()
+        return events
+
+    def _dispatch_aggregate(self, events):
+        """Run one aggregate's events in order, stopping at the first failure; returns (dispatched, failures, released)"""
+        dispatched, failures, released = [], [], []
+        with self.app.app_context():
+            try:
+                for index, outbox_event in enumerate(events):
+                    handler = self.handlers.get(outbox_event['event_type'])
+                    try:
+                        if handler is None:
+                            raise LookupError(f"No handler for {outbox_event['event_type']}")
+                        handler(self.app, outbox_event)
+                    except Exception as e:
+                        db.session.rollback()
+                        failures.append((outbox_event, str(e)))
+                        released.extend(later['id'] for later in events[index + 1:])
+                        break
+                    dispatched.append(outbox_event['id'])
+            finally:
+                db.session.remove()
+        return dispatched, failures, released
+
+    def _release(self, event_ids):
+        OutboxEvent.query.filter(OutboxEvent.id.in_(event_ids)).update(
+            {'locked_by': None, 'locked_until': None}, synchronize_session=False
+        )
+
+    def _record(self, dispatched, failures, released, now):
+        """Write back a batch's outcome in one transaction"""
+        if dispatched:
+            OutboxEvent.query.filter(OutboxEvent.id.in_(dispatched)).update(
+                {'status': 'dispatched', 'dispatched_at': now, 'locked_by': None, 'locked_until': None},
+                synchronize_session=False
+            )
+        if released:
+            self._release(released)
+        for outbox_event, error in failures:
+            attempts = outbox_event['attempts'] + 1
+            values = {'attempts': attempts, 'last_error': error[:MAX_ERROR_LENGTH], 'locked_by': None, 'locked_until': None}
+            if attempts >= self.max_attempts:
+                # Dead-lettered; later events of the aggregate are no longer held back by it
+                values['status'] = 'failed'
+                self.app.logger.error('Outbox event %s (%s) failed permanently: %s',
+                                      outbox_event['id'], outbox_event['event_type'], error)
+            else:
+                values['next_attempt_at'] = now + timedelta(seconds=min(self.retry_base * 2 ** (attempts - 1), self.retry_max))
+            OutboxEvent.query.filter(OutboxEvent.id == outbox_event['id']).update(values, synchronize_session=False)
+        db.session.commit()
+
+        self.stats['dispatched'] += len(dispatched)
+        self.stats['failed'] += sum(1 for outbox_event, _ in failures if outbox_event['attempts'] + 1 >= self.max_attempts)
+        self.stats['retried'] += sum(1 for outbox_event, _ in failures if outbox_event['attempts'] + 1 < self.max_attempts)
+
+    def dispatch_pending(self, now=None):
+        """Claim and dispatch one batch (aggregates in parallel); returns the number of events claimed"""
+        with self._dispatch_lock:
+            events = self._claim(now or datetime.utcnow())
+            if not events:
+                return 0
+
+            by_aggregate = {}
+            for outbox_event in events:
+                by_aggregate.setdefault((outbox_event['aggregate_type'], outbox_event['aggregate_id']), []).append(outbox_event)
+
+            dispatched, failures, released = [], [], []
+            for aggregate_dispatched, aggregate_failures, aggregate_released in self.executor.map(
+                self._dispatch_aggregate, by_aggregate.values()
+            ):
+                dispatched.extend(aggregate_dispatched)
+                failures.extend(aggregate_failures)
+                released.extend(aggregate_released)
+
+            self._record(dispatched, failures, released, datetime.utcnow())
+            return len(events)
+
+    def drain(self):
+        """Dispatch until no due events remain; returns the number of events claimed"""
+        total = 0
+        while True:
+            claimed = self.dispatch_pending()
+            total += claimed
+            if claimed < self.batch_size:
+                return total
+
+    def purge(self, now=None):
+        """Delete dispatched events past the retention period and dead-lettered ones past the failed retention"""
+        now = now or datetime.utcnow()
+        deleted = OutboxEvent.query.filter(
+            OutboxEvent.status == 'dispatched', OutboxEvent.dispatched_at < now - self.retention
+        ).delete(synchronize_session=False)
+        deleted += OutboxEvent.query.filter(
+            OutboxEvent.status == 'failed', OutboxEvent.created_at < now - self.failed_retention
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def start(self, app):
+        """Dispatch every interval seconds, or as soon as a commit enqueues events, in a daemon thread"""
+        if self.interval <= 0:
+            return None
+        interval = self.interval
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.is_set():
+                self._wake.wait(interval)
+                self._wake.clear()
+                with app.app_context():
+                    try:
+                        self.drain()
+                        if time.monotonic() - self._last_purge > 3600:
+                            self._last_purge = time.monotonic()
+                            self.purge()
+                    except Exception as e:
+                        db.session.rollback()
+                        app.logger.error('Outbox dispatch failed: %s', e)
+                    finally:
+                        db.session.remove()
+
+        thread = threading.Thread(target=run, name='outbox-dispatcher', daemon=True)
+        thread.start()
+        return stop_event
+
+outbox_dispatcher = OutboxDispatcher()
+
+@event.listens_for(Session, 'after_commit')
+def _wake_dispatcher(session):
+    if session.info.pop('outbox_pending', False):
+        outbox_dispatcher.wake()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_wake(session):
+    session.info.pop('outbox_pending', None)
@@ -0,0 +1,297 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import func, select
+from src.models.user import db, User
+from src.models.subscription import MarketingCampaign, Payment, PaymentWebhookEvent
+from src.utils.outbox import enqueue
+
+# Allowed transitions: new status -> statuses it may be reached from
+PAYMENT_TRANSITIONS = {
+    'completed': ('pending',),
+    'failed': ('pending',),
+    'refunded': ('completed',)
+}
+
+# Provider webhook event types mapped to local payment statuses
+WEBHOOK_EVENT_STATUSES = {
+    'payment_intent.succeeded': 'completed',
+    'payment_intent.payment_failed': 'failed',
+    'payment_intent.canceled': 'failed',
+    'charge.refunded': 'refunded'
+}
+
+class PaymentProvider:
+    """Interface for querying payment status from a provider"""
+
+    # Provider statuses mapped to local payment statuses (None = still pending)
+    STATUS_MAP = {
+        'succeeded': 'completed',
+        'canceled': 'failed',
+        'requires_payment_method': 'failed',
+        'refunded': 'refunded',
+        'processing': None,
+        'requires_action': None,
+        'requires_confirmation': None
+    }
+
+    def fetch_statuses(self, provider_payment_ids):
+        """Return {provider_payment_id: provider_status} for the given ids"""
+        raise NotImplementedError
+
+    def get_payment_statuses(self, provider_payment_ids):
+        """Return {provider_payment_id: local_status} for payments that settled"""
+        statuses = {}
+        for payment_id, provider_status in self.fetch_statuses(provider_payment_ids).items():
+            local_status = self.STATUS_MAP.get(provider_status)
+            if local_status:
+                statuses[payment_id] = local_status
+        return statuses
+
+class FakePaymentProvider(PaymentProvider):
+    """In-memory provider stub for local development and tests"""
+
+    def __init__(self, statuses=None, default_status='processing'):
+        self.statuses = dict(statuses or {})
+        self.default_status = default_status
+        self.calls = 0
+
+    def set_status(self, provider_payment_id, provider_status):
+        self.statuses[provider_payment_id] = provider_status
+
+    def fetch_statuses(self, provider_payment_ids):
+        self.calls += 1
+        return {
+            payment_id: self.statuses.get(payment_id, self.default_status)
+            for payment_id in provider_payment_ids
+        }
+
+def apply_payment_transition(stripe_payment_id, new_status, now=None):
+    """Conditionally move a payment to new_status; returns True if this call changed it"""
+    allowed_from = PAYMENT_TRANSITIONS.get(new_status)
+    if not allowed_from:
+        return False
+
+    values = {'status': new_status}
+    if new_status == 'completed':
+        values['completed_at'] = now or datetime.utcnow()
+
+    # The status guard in the WHERE clause makes replays no-ops
+    changed = Payment.query.filter(
+        Payment.stripe_payment_id == stripe_payment_id,
+        Payment.status.in_(allowed_from)
+    ).update(values, synchronize_session=False)
+
+    if changed:
+        if new_status == 'completed':
+            _activate_subscription(stripe_payment_id)
+        elif new_status == 'refunded':
+            _revoke_subscription(stripe_payment_id, now or datetime.utcnow())
+        # Committed with the transition by the caller; the outbox keeps one payment's notifications in order
+        enqueue(f'payment.{new_status}', 'payment', stripe_payment_id, {
+            'stripe_payment_id': stripe_payment_id,
+            'status': new_status,
+            'at': values.get('completed_at') or now or datetime.utcnow()
+        })
+
+    return bool(changed)
+
+def _activate_subscription(stripe_payment_id):
+    """Upgrade the payer's subscription once their payment completes"""
+    payment = Payment.query.filter_by(stripe_payment_id=stripe_payment_id).first()
+    if payment and payment.subscription_plan:
+        duration_months = 12 if payment.billing_cycle == 'yearly' else 1
+        payment.user.upgrade_subscription(payment.subscription_plan.name, duration_months, payment_id=payment.id)
+
+def _revoke_subscription(stripe_payment_id, now):
+    """Expire the subscription a refunded payment paid for and pause the payer's active campaigns"""
+    payment = Payment.query.filter_by(stripe_payment_id=stripe_payment_id).first()
+    if not payment or not payment.subscription_plan:
+        return
+    user = payment.user
+    # A later payment (a renewal of the same plan included) may have bought the current subscription
+    if user.subscription_payment_id != payment.id or user.subscription_state != 'active':
+        return
+    user.expire_subscription(now)
+    MarketingCampaign.query.filter(
+        MarketingCampaign.user_id == user.id,
+        MarketingCampaign.status == 'active'
+    ).update({'status': 'paused'}, synchronize_session=False)
+
+def verify_webhook_signature(payload, header, secret, tolerance=300, now=None):
+    """Check a 't=<unix time>,v1=<hex HMAC-SHA256 of "t.payload">' signature header; returns True if valid"""
+    if not header or not secret:
+        return False
+    timestamp = None
+    signatures = []
+    for part in header.split(','):
+        key, _, value = part.strip().partition('=')
+        if key == 't':
+            timestamp = value
+        elif key == 'v1':
+            signatures.append(value)
+    if not timestamp or not signatures or not timestamp.isdigit():
+        return False
+    # Rejects replays of a captured request outside the tolerance window
+    if abs((now or time.time()) - int(timestamp)) > tolerance:
+        return False
+
+    expected = hmac.new(secret.encode(), timestamp.encode() + b'.' + payload, hashlib.sha256).hexdigest()
+    return any(hmac.compare_digest(expected, signature) for signature in signatures)
+
+def reconcile_pending_payments(provider, batch_size=200, now=None):
+    """Page through pending payments and apply settled provider statuses"""
+    now = now or datetime.utcnow()
+    summary = {'checked': 0, 'completed': 0, 'failed': 0, 'refunded': 0, 'batches': 0}
+    last_id = 0
+
+    while True:
+        # Keyset pagination keeps each page an index range scan
+        rows = db.session.query(Payment.id, Payment.stripe_payment_id).filter(
+            Payment.status == 'pending',
+            Payment.stripe_payment_id.isnot(None),
+            Payment.id > last_id
+        ).order_by(Payment.id).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        last_id = rows[-1][0]
+        statuses = provider.get_payment_statuses([row[1] for row in rows])
+
+        try:
+            for stripe_payment_id, new_status in statuses.items():
+                if apply_payment_transition(stripe_payment_id, new_status, now=now):
+                    summary[new_status] += 1
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        summary['checked'] += len(rows)
+        summary['batches'] += 1
+
+        if len(rows) < batch_size:
+            break
+
+    return summary
+
+def record_webhook_events(events):
+    """Insert provider events into the inbox, ignoring ones already received"""
+    rows = []
+    seen = set()
+    for event in events:
+        event_id = event.get('id')
+        if not event_id or event_id in seen:
+            continue
+        seen.add(event_id)
+        data = event.get('data')
+        data_object = data.get('object') if isinstance(data, dict) else None
+        if not isinstance(data_object, dict):
+            data_object = {}
+        rows.append({
+            'event_id': event_id,
+            'event_type': event.get('type', ''),
+            'stripe_payment_id': data_object.get('payment_intent') or data_object.get('id'),
+            'payload': json.dumps(event),
+            'processed': False,
+            'received_at': datetime.utcnow()
+        })
+
+    if not rows:
+        return 0
+
+    table = PaymentWebhookEvent.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).on_conflict_do_nothing(index_elements=['event_id'])
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).on_conflict_do_nothing(index_elements=['event_id'])
+    else:
+        existing = {row[0] for row in db.session.query(PaymentWebhookEvent.event_id).filter(
+            PaymentWebhookEvent.event_id.in_([row['event_id'] for row in rows])
+        )}
+        rows = [row for row in rows if row['event_id'] not in existing]
+        statement = table.insert()
+
+    inserted = 0
+    if rows:
+        result = db.session.execute(statement, rows)
+        inserted = result.rowcount if result.rowcount >= 0 else len(rows)
+    db.session.commit()
+    return inserted
+
+def backfill_subscription_payments():
+    """Link active subscriptions that predate subscription_payment_id to the payer's latest completed plan payment"""
+    latest_payment = select(func.max(Payment.id)).where(
+        Payment.user_id == User.id,
+        Payment.status == 'completed',
+        Payment.subscription_plan_id.isnot(None)
+    ).scalar_subquery()
+    updated = User.query.filter(
+        User.subscription_state == 'active',
+        User.subscription_payment_id.is_(None)
+    ).update({'subscription_payment_id': latest_payment}, synchronize_session=False)
+    db.session.commit()
+    return updated
+
+def process_webhook_inbox(batch_size=500, now=None):
+    """Apply unprocessed inbox events in id order, one transaction per batch"""
+    now = now or datetime.utcnow()
+    summary = {'processed': 0, 'applied': 0, 'batches': 0}
+
+    while True:
+        events = PaymentWebhookEvent.query.filter_by(processed=False).order_by(
+            PaymentWebhookEvent.id
+        ).limit(batch_size).all()
+
+        if not events:
+            break
+
+        try:
+            for event in events:
+                new_status = WEBHOOK_EVENT_STATUSES.get(event.event_type)
+                if new_status and event.stripe_payment_id:
+                    if apply_payment_transition(event.stripe_payment_id, new_status, now=now):
+                        summary['applied'] += 1
+
+            PaymentWebhookEvent.query.filter(
+                PaymentWebhookEvent.id.in_([event.id for event in events])
+            ).update({'processed': True, 'processed_at': now}, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        summary['processed'] += len(events)
+        summary['batches'] += 1
+
+        if len(events) < batch_size:
+            break
+
+    return summary
+
+def start_payment_reconciler(app, provider=None, interval_seconds=60):
+    """Drain the webhook inbox and reconcile pending payments in a daemon thread"""
+    stop_event = threading.Event()
+
+    def run():
+        while not stop_event.wait(interval_seconds):
+            with app.app_context():
+                try:
+                    process_webhook_inbox()
+                    if provider is not None:
+                        reconcile_pending_payments(provider)
+                except Exception as e:
+                    app.logger.error('Payment reconciliation failed: %s', e)
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='payment-reconciler', daemon=True)
+    thread.start()
+    return stop_event
@@ -0,0 +1,206 @@
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+class EndpointStats:
+    """Cumulative histogram and totals for one endpoint"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.queries = 0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+    def observe(self, total_ms, db_ms, serialize_ms, queries):
+        self.count += 1
+        self.total_ms += total_ms
+        self.db_ms += db_ms
+        self.serialize_ms += serialize_ms
+        self.queries += queries
+        self.max_ms = max(self.max_ms, total_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if total_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction):
+        """Approximate a latency percentile from the histogram buckets"""
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return self.max_ms if bound == float('inf') else bound
+        return self.max_ms
+
+    def to_dict(self):
+        count = self.count or 1
+        return {
+            'requests': self.count,
+            'avg_ms': round(self.total_ms / count, 2),
+            'avg_db_ms': round(self.db_ms / count, 2),
+            'avg_serialize_ms': round(self.serialize_ms / count, 2),
+            'avg_queries': round(self.queries / count, 2),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 2)
+        }
+
+class PerfRegistry:
+    """Per-endpoint request statistics shared by the worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, endpoint, total_ms, db_ms, serialize_ms, queries):
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.observe(total_ms, db_ms, serialize_ms, queries)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in sorted(self.endpoints.items())}
+
+    def prometheus_text(self):
+        """Render the registry in Prometheus text exposition format"""
+        lines = [
+            '# HELP http_request_duration_ms Request latency in milliseconds',
+            '# TYPE http_request_duration_ms histogram'
+        ]
+        totals = []
+
+        with self._lock:
+            for endpoint, stats in sorted(self.endpoints.items()):
+                method, _, rule = endpoint.partition(' ')
+                labels = f'method="{method}",endpoint="{rule}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS_MS, stats.buckets):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else str(bound)
+                    lines.append(f'http_request_duration_ms_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'http_request_duration_ms_sum{{{labels}}} {stats.total_ms:.3f}')
+                lines.append(f'http_request_duration_ms_count{{{labels}}} {stats.count}')
+                totals.append((labels, stats))
+
+        lines.append('# HELP http_request_db_duration_ms_total Cumulative database time in milliseconds')
+        lines.append('# TYPE http_request_db_duration_ms_total counter')
+        for labels, stats in totals:
+            lines.append(f'http_request_db_duration_ms_total{{{labels}}} {stats.db_ms:.3f}')
+
+        lines.append('# HELP http_request_serialize_duration_ms_total Cumulative JSON serialization time in milliseconds')
+        lines.append('# TYPE http_request_serialize_duration_ms_total counter')
+        for labels, stats in totals:
+            lines.append(f'http_request_serialize_duration_ms_total{{{labels}}} {stats.serialize_ms:.3f}')
+
+        lines.append('# HELP http_request_queries_total SQL statements executed')
+        lines.append('# TYPE http_request_queries_total counter')
+        for labels, stats in totals:
+            lines.append(f'http_request_queries_total{{{labels}}} {stats.queries}')
+
+        return '\n'.join(lines) + '\n'
+
+registry = PerfRegistry()
+
+# Callables(statement, seconds) run for every SQL statement, fed by the same cursor listeners as the perf counters
+_query_observers = []
+
+def _request_perf():
+    """Perf state for the current request, or None outside instrumented requests"""
+    if not has_request_context():
+        return None
+    return g.get('_perf')
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('perf_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('perf_query_start')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    perf = _request_perf()
+    if perf is not None:
+        perf['queries'] += 1
+        perf['db'] += elapsed
+
+    for observer in _query_observers:
+        observer(statement, elapsed)
+
+def instrument_engines():
+    """Install the statement timing listeners once for every engine"""
+    if not getattr(Engine, '_perf_instrumented', False):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        Engine._perf_instrumented = True
+
+def add_query_observer(observer):
+    """Also pass every statement and its duration to observer, reusing the perf timing"""
+    instrument_engines()
+    if observer not in _query_observers:
+        _query_observers.append(observer)
+
+def init_perf(app):
+    """Instrument requests with query counts, DB time, serialization time and latency"""
+    instrument_engines()
+
+    # Time JSON encoding of every response body
+    json_response = app.json.response
+
+    def timed_json_response(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return json_response(*args, **kwargs)
+        finally:
+            perf = _request_perf()
+            if perf is not None:
+                perf['serialize'] += time.perf_counter() - started
+
+    app.json.response = timed_json_response
+
+    @app.before_request
+    def start_request_timer():
+        g._perf = {'start': time.perf_counter(), 'queries': 0, 'db': 0.0, 'serialize': 0.0}
+
+    @app.after_request
+    def record_request_timing(response):
+        perf = g.pop('_perf', None)
+        if perf is None:
+            return response
+
+        total_ms = (time.perf_counter() - perf['start']) * 1000
+        db_ms = perf['db'] * 1000
+        serialize_ms = perf['serialize'] * 1000
+        app_ms = max(total_ms - db_ms - serialize_ms, 0)
+
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.2f};desc="{perf["queries"]} queries"',
+            f'serialize;dur={serialize_ms:.2f}',
+            f'app;dur={app_ms:.2f}',
+            f'total;dur={total_ms:.2f}'
+        ])
+        response.headers['X-Query-Count'] = str(perf['queries'])
+
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        registry.observe(f'{request.method} {rule}', total_ms, db_ms, serialize_ms, perf['queries'])
+        return response
+
+    return registry
@@ -0,0 +1,278 @@
+import math
+import threading
+from collections import defaultdict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from src.models.user import db
+from src.models.property import Property
+from src.utils.listing_generation import GenerationTracker, consistent_scan
+
+RELATIVE_ACCURACY = 0.01  # Quantiles are within 1% of the true value
+ANY = '*'
+
+TRACKED_ATTRIBUTES = ('price', 'area', 'location', 'property_type', 'status', 'active', 'created_at')
+
+class LogSketch:
+    """Log-bucketed quantile sketch (DDSketch style) that supports deletes"""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = defaultdict(int)
+        self.count = 0
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value, count=1):
+        if value <= 0:
+            return
+        key = self._key(value)
+        self.buckets[key] += count
+        if self.buckets[key] == 0:
+            del self.buckets[key]
+        self.count += count
+
+    def remove(self, value):
+        self.add(value, -1)
+
+    def quantile(self, q):
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return None
+
+class PriceAggregate:
+    """Running totals, quantile sketches and a monthly trend for one segment"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum_price = 0
+        self.sum_area = 0
+        self.price = LogSketch()
+        self.price_per_sqft = LogSketch()
+        self.monthly = defaultdict(lambda: [0, 0.0])  # 'YYYY-MM' -> [count, sum of price per sq ft]
+
+    def apply(self, row, sign):
+        price, area, month = row['price'], row['area'], row['month']
+        self.count += sign
+        self.sum_price += sign * price
+        self.sum_area += sign * area
+        self.price.add(price, sign)
+        if area:
+            ppsf = price / area
+            self.price_per_sqft.add(ppsf, sign)
+            if month:
+                bucket = self.monthly[month]
+                bucket[0] += sign
+                bucket[1] += sign * ppsf
+                if bucket[0] == 0:
+                    del self.monthly[month]
+
+    def summary(self):
+        def rounded(value):
+            return round(value, 2) if value is not None else None
+
+        return {
+            'listings': self.count,
+            'avg_price': rounded(self.sum_price / self.count) if self.count else None,
+            'median_price': rounded(self.price.quantile(0.5)),
+            'avg_price_per_sqft': rounded(self.sum_price / self.sum_area) if self.sum_area else None,
+            'median_price_per_sqft': rounded(self.price_per_sqft.quantile(0.5)),
+            'p25_price_per_sqft': rounded(self.price_per_sqft.quantile(0.25)),
+            'p75_price_per_sqft': rounded(self.price_per_sqft.quantile(0.75))
+        }
+
+    def trend(self):
+        return [
+            {'month': month, 'listings': count, 'avg_price_per_sqft': round(total / count, 2)}
+            for month, (count, total) in sorted(self.monthly.items()) if count
+        ]
+
+def _row(values):
+    """Normalized analytics row for a listing, or None if it should not be counted"""
+    if not values['active'] or not values['price'] or values['price'] <= 0:
+        return None
+    created_at = values['created_at']
+    return {
+        'status': values['status'] or 'For Sale',
+        'location': values['location'],
+        'property_type': values['property_type'],
+        'price': values['price'],
+        'area': values['area'] or 0,
+        'month': created_at.strftime('%Y-%m') if created_at else None
+    }
+
+def _apply_to(segments, row, sign):
+    status, location, property_type = row['status'], row['location'], row['property_type']
+    for key in (
+        (status, location, property_type),
+        (status, location, ANY),
+        (status, ANY, property_type),
+        (status, ANY, ANY)
+    ):
+        segments[key].apply(row, sign)
+
+class PriceAnalytics:
+    """Per-location and per-type price statistics kept current from ORM events
+
+    This worker's commits are applied as deltas in listing generation order; other workers' writes show up
+    as a newer shared generation and trigger a rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.segments = defaultdict(PriceAggregate)
+        self.tracker = GenerationTracker()
+        self.built = False
+
+    def _apply(self, row, sign):
+        _apply_to(self.segments, row, sign)
+
+    def _scan(self):
+        segments = defaultdict(PriceAggregate)
+        query = db.session.query(*[getattr(Property, name) for name in TRACKED_ATTRIBUTES]).yield_per(5000)
+        for values in query:
+            row = _row(dict(zip(TRACKED_ATTRIBUTES, values)))
+            if row:
+                _apply_to(segments, row, 1)
+        return segments
+
+    def build(self):
+        """Rebuild every segment from one streamed scan of the listing columns
+
+        The scan runs outside the lock and is tied to the listing generation it saw, so commits that land
+        meanwhile are applied exactly once: those in the scan are skipped, later ones applied in order.
+        """
+        with self._build_lock:
+            segments, generation, consistent = consistent_scan(self._scan)
+            with self._lock:
+                self.segments = segments
+                self.tracker.reset(generation, stale=not consistent)
+                for changes in self.tracker.drain():
+                    self._apply_changes(changes)
+                self.built = True
+
+    def ensure_built(self):
+        if not self.built or self.tracker.needs_rebuild():
+            self.build()
+
+    def _apply_changes(self, changes):
+        for old_row, new_row in changes:
+            if old_row:
+                self._apply(old_row, -1)
+            if new_row:
+                self._apply(new_row, 1)
+
+    def apply_changes(self, changes, generation=None):
+        """Apply one committed transaction's (old_row, new_row) pairs"""
+        if not self.built:
+            return
+        with self._lock:
+            for due in self.tracker.commit(generation, changes):
+                self._apply_changes(due)
+
+    def mark_stale(self):
+        """A committed change could not be expressed as a delta; rebuild on the next read"""
+        with self._lock:
+            self.tracker.stale = True
+
+    def _segment(self, status, location, property_type):
+        return self.segments.get((status or 'For Sale', location or ANY, property_type or ANY))
+
+    def summary(self, status=None, location=None, property_type=None):
+        self.ensure_built()
+        with self._lock:
+            segment = self._segment(status, location, property_type)
+            return segment.summary() if segment else PriceAggregate().summary()
+
+    def trend(self, status=None, location=None, property_type=None):
+        self.ensure_built()
+        with self._lock:
+            segment = self._segment(status, location, property_type)
+            return segment.trend() if segment else []
+
+    def breakdown(self, status=None, dimension='location'):
+        """Summaries for every location (or property type) in one call"""
+        self.ensure_built()
+        status = status or 'For Sale'
+        with self._lock:
+            results = {}
+            for (segment_status, location, property_type), segment in self.segments.items():
+                if segment_status != status or not segment.count:
+                    continue
+                if dimension == 'location' and location != ANY and property_type == ANY:
+                    results[location] = segment.summary()
+                elif dimension == 'property_type' and location == ANY and property_type != ANY:
+                    results[property_type] = segment.summary()
+            return results
+
+price_analytics = PriceAnalytics()
+
+def _current_values(target):
+    return {name: getattr(target, name) for name in TRACKED_ATTRIBUTES}
+
+def _previous_values(target):
+    """Values as of the last load, or None when a changed attribute's old value was never loaded"""
+    state = inspect(target)
+    values = {}
+    for name in TRACKED_ATTRIBUTES:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]  # May itself be None, e.g. a listing without an area
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            return None
+    return values
+
+def _queue_change(target, old_row, new_row):
+    # Applied only when the surrounding transaction commits
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('price_analytics_changes', []).append((old_row, new_row))
+
+def _queue_resync(target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('price_analytics_changes', [])
+        session.info['price_analytics_resync'] = True
+
+@event.listens_for(Property, 'after_insert')
+def _property_inserted(mapper, connection, target):
+    _queue_change(target, None, _row(_current_values(target)))
+
+@event.listens_for(Property, 'after_update')
+def _property_updated(mapper, connection, target):
+    previous = _previous_values(target)
+    if previous is None:
+        _queue_resync(target)
+    else:
+        _queue_change(target, _row(previous), _row(_current_values(target)))
+
+@event.listens_for(Property, 'after_delete')
+def _property_deleted(mapper, connection, target):
+    previous = _previous_values(target)
+    if previous is None:
+        _queue_resync(target)
+    else:
+        _queue_change(target, _row(previous), None)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_changes(session):
+    changes = session.info.pop('price_analytics_changes', None)
+    if session.info.pop('price_analytics_resync', False):
+        price_analytics.mark_stale()
+    if changes is not None:
+        price_analytics.apply_changes(changes, session.info.get('listing_generation'))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_changes(session):
+    session.info.pop('price_analytics_changes', None)
+    session.info.pop('price_analytics_resync', None)
@@ -0,0 +1,38 @@
+from sqlalchemy.orm import load_only
+
+def parse_fields(raw_fields, allowed_fields):
+    """Parse a comma separated fields= argument into a validated list (None = all fields)"""
+    if not raw_fields:
+        return None
+
+    fields = []
+    for field in raw_fields.split(','):
+        field = field.strip()
+        if field and field not in fields:
+            fields.append(field)
+
+    unknown = [field for field in fields if field not in allowed_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    # Always include the primary key so clients can key rows
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+
+    return fields
+
+def projection_options(model, fields, field_columns, relationship_loaders=None):
+    """Build loader options that only SELECT the columns the requested fields need"""
+    columns = []
+    for field in fields:
+        for column_name in field_columns.get(field, (field,)):
+            if column_name not in columns:
+                columns.append(column_name)
+
+    options = [load_only(*[getattr(model, column_name) for column_name in columns])]
+
+    for field, loader in (relationship_loaders or {}).items():
+        if field in fields:
+            options.append(loader())
+
+    return options
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from src.models.user import db
+from src.utils.database import JSONText
 
 class Property(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -21,16 +22,17 @@ class Property(db.Model):
     status = db.Column(db.String(20), default='For Sale')  # For Sale, For Rent, Sold, etc.
     
     # Features and amenities
-    features = db.Column(db.Text, nullable=True)  # JSON string of features
+    features = db.Column(JSONText, nullable=True)  # JSON string of features (JSONB on Postgres)
     
     # Media
     main_image = db.Column(db.String(500), nullable=True)
-    gallery_images = db.Column(db.Text, nullable=True)  # JSON string of image URLs
+    gallery_images = db.Column(JSONText, nullable=True)  # JSON string of image URLs
     
     # Listing details
     featured = db.Column(db.Boolean, default=False)
     active = db.Column(db.Boolean, default=True)
     views = db.Column(db.Integer, default=0)
+    popularity_score = db.Column(db.Float, default=0, index=True)  # Time-decayed, recomputed on a schedule
     
     # Relationships
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -44,28 +46,82 @@ class Property(db.Model):
     owner = db.relationship('User', foreign_keys=[owner_id], backref='owned_properties')
     agent = db.relationship('User', foreign_keys=[agent_id], backref='managed_properties')
     
+    # "Trending in <location>" is an index range scan
+    __table_args__ = (db.Index('ix_property_location_popularity', 'location', 'popularity_score'),)
+    
     def __repr__(self):
         return f'<Property {self.title}>'
     
-    def to_dict(self):
-        import json
+    # Columns each projectable field needs (fields not listed map to the column of the same name)
+    PROJECTION_COLUMNS = {
+        'agent': ('agent_id',),
+        'main_image_variants': ('main_image',),
+        'gallery_image_variants': ('gallery_images',)
+    }
+    
+    FIELDS = (
+        'id', 'title', 'description', 'location', 'address', 'latitude', 'longitude',
+        'price', 'currency', 'bedrooms', 'bathrooms', 'area', 'property_type', 'status',
+        'features', 'main_image', 'gallery_images', 'main_image_variants', 'gallery_image_variants', 'featured', 'active', 'views', 'popularity_score',
+        'owner_id', 'agent_id', 'created_at', 'updated_at', 'agent'
+    )
+    
+    @classmethod
+    def projection_options(cls, fields):
+        """Loader options that only load the columns needed for the given fields"""
+        from sqlalchemy.orm import joinedload
+        from src.utils.projection import projection_options
+        from src.models.user import User
         
-        # Parse JSON fields safely
-        features_list = []
-        gallery_list = []
+        return projection_options(cls, fields, cls.PROJECTION_COLUMNS, {
+            'agent': lambda: joinedload(cls.agent).load_only(User.full_name, User.phone, User.email)
+        })
+    
+    @staticmethod
+    def _parse_json_list(value):
+        """Parse a JSON list column safely"""
+        import json
         
         try:
-            if self.features:
-                features_list = json.loads(self.features)
-        except:
-            features_list = []
-            
-        try:
-            if self.gallery_images:
-                gallery_list = json.loads(self.gallery_images)
+            if value:
+                return json.loads(value)
         except:
-            gallery_list = []
+            pass
+        return []
+    
+    def _agent_dict(self):
+        return {
+            'name': self.agent.full_name if self.agent else None,
+            'phone': self.agent.phone if self.agent else None,
+            'email': self.agent.email if self.agent else None
+        } if self.agent else None
+    
+    def _image_variants(self):
+        """srcset-ready variants of the main and gallery images that are in the media store"""
+        from src.utils.images import image_pipeline
+        
+        return (
+            image_pipeline.variants_for(self.main_image),
+            [image_pipeline.variants_for(url) for url in self._parse_json_list(self.gallery_images)]
+        )
+    
+    def _serialize_field(self, field):
+        """Serialize a single field for projected responses"""
+        if field in ('features', 'gallery_images'):
+            return self._parse_json_list(getattr(self, field))
+        if field == 'agent':
+            return self._agent_dict()
+        if field == 'main_image_variants':
+            return self._image_variants()[0]
+        if field == 'gallery_image_variants':
+            return self._image_variants()[1]
+        return getattr(self, field)
+    
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return {field: self._serialize_field(field) for field in fields}
         
+        main_image_variants, gallery_image_variants = self._image_variants()
         return {
             'id': self.id,
             'title': self.title,
@@ -81,21 +137,20 @@ class Property(db.Model):
             'area': self.area,
             'property_type': self.property_type,
             'status': self.status,
-            'features': features_list,
+            'features': self._parse_json_list(self.features),
             'main_image': self.main_image,
-            'gallery_images': gallery_list,
+            'gallery_images': self._parse_json_list(self.gallery_images),
+            'main_image_variants': main_image_variants,
+            'gallery_image_variants': gallery_image_variants,
             'featured': self.featured,
             'active': self.active,
             'views': self.views,
+            'popularity_score': self.popularity_score,
             'owner_id': self.owner_id,
             'agent_id': self.agent_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'agent': {
-                'name': self.agent.full_name if self.agent else None,
-                'phone': self.agent.phone if self.agent else None,
-                'email': self.agent.email if self.agent else None
-            } if self.agent else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'agent': self._agent_dict()
         }
 
 class PropertyInquiry(db.Model):
@@ -115,12 +170,23 @@ class PropertyInquiry(db.Model):
     # Status
     status = db.Column(db.String(20), default='New')  # New, Contacted, Closed
     
+    # Copied from the property so each owner's and agent's inbox is an index range scan
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    agent_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     property = db.relationship('Property', backref='inquiries')
-    user = db.relationship('User', backref='inquiries')
+    user = db.relationship('User', foreign_keys=[user_id], backref='inquiries')
+    
+    __table_args__ = (
+        db.Index('ix_inquiry_owner_status_created', 'owner_id', 'status', 'created_at'),
+        db.Index('ix_inquiry_agent_status_created', 'agent_id', 'status', 'created_at'),
+    )
+    
+    STATUSES = ('New', 'Contacted', 'Closed')
     
     def to_dict(self):
         return {
@@ -133,13 +199,41 @@ class PropertyInquiry(db.Model):
             'message': self.message,
             'inquiry_type': self.inquiry_type,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'owner_id': self.owner_id,
+            'agent_id': self.agent_id,
+            'created_at': self.created_at,
             'property': {
                 'title': self.property.title,
                 'location': self.property.location
             } if self.property else None
         }
 
+class LeadCounter(db.Model):
+    """Materialized inquiry counts per owner/agent and status, maintained with the inquiries"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    role = db.Column(db.String(10), primary_key=True)  # owner, agent
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<LeadCounter {self.user_id} {self.role} {self.status}={self.count}>'
+
+class ListingGeneration(db.Model):
+    """Single-row counter bumped by every transaction that writes listings, so per-worker indexes see other workers' writes"""
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ListingGeneration {self.value}>'
+
+class RankingRun(db.Model):
+    """Single row recording the last popularity score computation, so one worker per interval recomputes"""
+    id = db.Column(db.Integer, primary_key=True)
+    computed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<RankingRun {self.computed_at}>'
+
 class PropertyFavorite(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -153,12 +247,31 @@ class PropertyFavorite(db.Model):
     # Unique constraint to prevent duplicate favorites
     __table_args__ = (db.UniqueConstraint('user_id', 'property_id', name='unique_user_property_favorite'),)
     
+    @classmethod
+    def add(cls, user_id, property_id):
+        """Favorite a property in one statement, ignoring an existing favorite; returns True if one was created"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            if cls.query.filter_by(user_id=user_id, property_id=property_id).first():
+                return False
+            db.session.add(cls(user_id=user_id, property_id=property_id))
+            return True
+        
+        statement = insert(cls.__table__).values(
+            user_id=user_id, property_id=property_id, created_at=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=['user_id', 'property_id'])
+        return db.session.execute(statement).rowcount == 1
+    
     def to_dict(self):
         return {
             'id': self.id,
             'user_id': self.user_id,
             'property_id': self.property_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'property': self.property.to_dict() if self.property else None
         }
 
@@ -0,0 +1,53 @@
+import json
+from sqlalchemy import and_, cast, func, literal, literal_column, or_
+from sqlalchemy.schema import DDL
+from src.models.property import Property
+
+# Rendered inline rather than bound, so queries repeat the index expression exactly and the planner can use it
+SEARCH_CONFIG = literal_column("'english'")
+_EMPTY = literal_column("''")
+_SPACE = literal_column("' '")
+
+def search_document():
+    """tsvector of a listing's searchable text; the GIN index is built on exactly this expression"""
+    text = (
+        func.coalesce(Property.title, _EMPTY) + _SPACE + func.coalesce(Property.location, _EMPTY) + _SPACE
+        + func.coalesce(Property.address, _EMPTY) + _SPACE + func.coalesce(Property.description, _EMPTY)
+    )
+    return func.to_tsvector(SEARCH_CONFIG, text)
+
+def create_search_indexes(engine):
+    """Postgres-only GIN indexes (full-text document, features JSONB); a no-op on other backends"""
+    if engine.dialect.name != 'postgresql':
+        return
+    with engine.begin() as connection:
+        document = str(search_document().compile(dialect=connection.dialect))
+        connection.execute(DDL(f'CREATE INDEX IF NOT EXISTS ix_property_search ON property USING gin (({document}))'))
+        connection.execute(DDL(
+            'CREATE INDEX IF NOT EXISTS ix_property_features ON property USING gin (features jsonb_path_ops)'
+        ))
+
+def search_condition(dialect, query):
+    """Filter for listings matching every term of query; returns (condition, rank expression or None)"""
+    if dialect == 'postgresql':
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        document = search_document()
+        return document.op('@@')(tsquery), func.ts_rank(document, tsquery)
+
+    # SQLite: a LIKE per term; a scan, acceptable at development data sizes
+    conditions = []
+    for term in query.split():
+        pattern = f'%{term}%'
+        conditions.append(or_(
+            Property.title.ilike(pattern), Property.location.ilike(pattern),
+            Property.address.ilike(pattern), Property.description.ilike(pattern)
+        ))
+    return and_(*conditions), None
+
+def feature_condition(dialect, feature):
+    """Filter for listings whose features list contains feature"""
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import JSONB
+        # JSONB containment, served by the jsonb_path_ops GIN index
+        return Property.features.op('@>')(cast(literal(json.dumps([feature])), JSONB))
+    return Property.features.like('%' + json.dumps(feature) + '%')
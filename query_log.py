@@ -0,0 +1,163 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter, deque
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from flask import g, has_request_context, request
+from src.utils.perf import add_query_observer
+
+logger = logging.getLogger('slow_queries')
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_NAMED_PARAM = re.compile(r'%\(\w+\)s|:\w+|\$\d+|%s')
+_WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement):
+    """Normalize SQL so statements that differ only in literals share a fingerprint"""
+    sql = _COMMENT.sub(' ', statement)
+    sql = _STRING.sub('?', sql)
+    sql = _NAMED_PARAM.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+class FingerprintStats:
+    """Counts and a bounded sample of durations for one fingerprint"""
+
+    def __init__(self, sample_size):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=sample_size)
+
+    def observe(self, duration_ms):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.samples.append(duration_ms)
+
+    def to_dict(self):
+        ordered = sorted(self.samples)
+
+        def pct(fraction):
+            if not ordered:
+                return 0
+            return round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)], 3)
+
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'p99_ms': pct(0.99),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+class QueryLog:
+    """Aggregates statement fingerprints, slow queries and N+1 patterns"""
+
+    def __init__(self, slow_ms=100, n_plus_one_threshold=10, sample_size=1000):
+        self.slow_ms = slow_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self.fingerprints = {}
+        self.n_plus_one = {}
+
+    def observe(self, statement, duration_ms):
+        key = fingerprint(statement)
+        with self._lock:
+            stats = self.fingerprints.get(key)
+            if stats is None:
+                stats = self.fingerprints[key] = FingerprintStats(self.sample_size)
+            stats.observe(duration_ms)
+
+        if duration_ms >= self.slow_ms:
+            logger.warning('slow query %.1fms: %s', duration_ms, key)
+
+        return key
+
+    def observe_request(self, endpoint, fingerprint_counts):
+        """Flag fingerprints repeated more than the threshold within one request"""
+        for key, repeats in fingerprint_counts.items():
+            if repeats <= self.n_plus_one_threshold:
+                continue
+
+            logger.warning('possible N+1 on %s: %d x %s', endpoint, repeats, key)
+            with self._lock:
+                entry = self.n_plus_one.setdefault((endpoint, key), {'occurrences': 0, 'max_repeats': 0})
+                entry['occurrences'] += 1
+                entry['max_repeats'] = max(entry['max_repeats'], repeats)
+
+    def reset(self):
+        with self._lock:
+            self.fingerprints = {}
+            self.n_plus_one = {}
+
+    def report(self, limit=20):
+        with self._lock:
+            fingerprints = [
+                dict(stats.to_dict(), fingerprint=key)
+                for key, stats in self.fingerprints.items()
+            ]
+            n_plus_one = [
+                dict(entry, endpoint=endpoint, fingerprint=key)
+                for (endpoint, key), entry in self.n_plus_one.items()
+            ]
+
+        fingerprints.sort(key=lambda item: item['total_ms'], reverse=True)
+        n_plus_one.sort(key=lambda item: item['max_repeats'], reverse=True)
+
+        return {
+            'slow_ms': self.slow_ms,
+            'n_plus_one_threshold': self.n_plus_one_threshold,
+            'top_fingerprints': fingerprints[:limit],
+            'n_plus_one': n_plus_one[:limit]
+        }
+
+query_log = QueryLog()
+
+def _observe_query(statement, seconds):
+    key = query_log.observe(statement, seconds * 1000)
+
+    if has_request_context():
+        counts = g.get('_query_fingerprints')
+        if counts is not None:
+            counts[key] += 1
+
+def init_query_log(app, log_path, slow_ms=100, n_plus_one_threshold=10):
+    """Attach the slow-query log to every engine and N+1 detection to requests"""
+    query_log.slow_ms = slow_ms
+    query_log.n_plus_one_threshold = n_plus_one_threshold
+
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        handler = RotatingFileHandler(log_path, maxBytes=5 * 1024 * 1024, backupCount=5)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    # Timed by perf's cursor listeners; a second pair would keep its own timing stack for every statement
+    add_query_observer(_observe_query)
+
+    @app.before_request
+    def start_fingerprint_counts():
+        g._query_fingerprints = Counter()
+
+    @app.after_request
+    def detect_n_plus_one(response):
+        counts = g.pop('_query_fingerprints', None)
+        if counts:
+            rule = request.url_rule.rule if request.url_rule else 'unmatched'
+            query_log.observe_request(f'{request.method} {rule}', counts)
+        return response
+
+    return query_log
@@ -0,0 +1,185 @@
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import or_, text, update
+from src.models.user import db
+from src.models.property import Property, PropertyInquiry, PropertyFavorite, RankingRun
+from src.utils.detail_cache import invalidate_properties
+
+# Score weights
+VIEW_WEIGHT = 1.0          # Applied to log1p(views), so a viral listing cannot drown out engagement
+FAVORITE_WEIGHT = 4.0
+INQUIRY_WEIGHT = 10.0
+FEATURED_BONUS = 2.0
+
+HALF_LIFE_DAYS = 7
+WINDOW_DAYS = HALF_LIFE_DAYS * 4  # Events older than four half-lives contribute < 7%
+
+TOP_K = 100
+GLOBAL_KEY = None
+RANKING_RUN_ID = 1
+
+UPDATE_SCORE_SQL = text('UPDATE property SET popularity_score = :score WHERE id = :property_id')
+
+def _decay(age_seconds):
+    return 0.5 ** (age_seconds / (HALF_LIFE_DAYS * 86400))
+
+def compute_popularity_scores(now=None):
+    """Compute time-decayed popularity per active property with two streamed scans"""
+    now = now or datetime.utcnow()
+    since = now - timedelta(days=WINDOW_DAYS)
+    engagement = defaultdict(float)
+
+    for weight, model in ((FAVORITE_WEIGHT, PropertyFavorite), (INQUIRY_WEIGHT, PropertyInquiry)):
+        rows = db.session.query(model.property_id, model.created_at).filter(
+            model.created_at >= since
+        ).yield_per(5000)
+        for property_id, created_at in rows:
+            engagement[property_id] += weight * _decay((now - created_at).total_seconds())
+
+    scores = {}
+    rows = db.session.query(
+        Property.id, Property.location, Property.views, Property.featured, Property.popularity_score
+    ).filter(Property.active == True).yield_per(5000)
+
+    for property_id, location, views, featured, previous in rows:
+        score = (
+            VIEW_WEIGHT * math.log1p(views or 0)
+            + engagement.get(property_id, 0.0)
+            + (FEATURED_BONUS if featured else 0.0)
+        )
+        scores[property_id] = (round(score, 6), location, previous)
+
+    return scores
+
+class TrendingIndex:
+    """Precomputed top-k property ids per location, served without touching the database"""
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._rankings = {}
+        self.computed_at = None
+
+    def rebuild(self, scores, computed_at=None):
+        buckets = defaultdict(list)
+        for property_id, (score, location, _) in scores.items():
+            buckets[location].append((score, property_id))
+            buckets[GLOBAL_KEY].append((score, property_id))
+
+        rankings = {}
+        for location, entries in buckets.items():
+            entries.sort(reverse=True)
+            rankings[location] = [property_id for _, property_id in entries[:self.top_k]]
+
+        with self._lock:
+            self._rankings = rankings
+            self.computed_at = computed_at or datetime.utcnow()
+
+    def trending(self, location=None, limit=10):
+        """Top property ids for a location (None = everywhere), or None if not built yet"""
+        with self._lock:
+            if self.computed_at is None:
+                return None
+            return self._rankings.get(location, [])[:limit]
+
+trending_index = TrendingIndex()
+
+def refresh_rankings(now=None, batch_size=5000):
+    """Recompute scores, persist the ones that changed and rebuild the in-memory index"""
+    now = now or datetime.utcnow()
+    scores = compute_popularity_scores(now)
+
+    changed = [
+        {'property_id': property_id, 'score': score}
+        for property_id, (score, _, previous) in scores.items()
+        if previous is None or abs(previous - score) > 1e-6
+    ]
+
+    try:
+        for start in range(0, len(changed), batch_size):
+            db.session.execute(UPDATE_SCORE_SQL, changed[start:start + batch_size])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Core UPDATEs fire no ORM events; cached details carry popularity_score
+    invalidate_properties(row['property_id'] for row in changed)
+    trending_index.rebuild(scores, computed_at=now)
+    return {'scored': len(scores), 'updated': len(changed), 'computed_at': now.isoformat()}
+
+def claim_ranking_run(now, interval_seconds):
+    """Whether this worker should recompute now; at most one worker per interval wins the conditional UPDATE
+
+    True as well on databases without the ranking_run row (before migrate_schema), as before it existed.
+    """
+    claimed = db.session.execute(
+        update(RankingRun).where(
+            RankingRun.id == RANKING_RUN_ID,
+            or_(RankingRun.computed_at.is_(None), RankingRun.computed_at <= now - timedelta(seconds=interval_seconds))
+        ).values(computed_at=now)
+    ).rowcount
+    db.session.commit()
+    return bool(claimed) or db.session.get(RankingRun, RANKING_RUN_ID) is None
+
+def load_rankings():
+    """Rebuild the in-memory index from the scores the elected worker stored, without writing"""
+    run = db.session.get(RankingRun, RANKING_RUN_ID)
+    rows = db.session.query(Property.id, Property.location, Property.popularity_score).filter(
+        Property.active == True
+    ).yield_per(5000)
+    scores = {property_id: (score or 0.0, location, score) for property_id, location, score in rows}
+    trending_index.rebuild(scores, computed_at=run.computed_at if run else None)
+    return {'scored': len(scores), 'updated': 0, 'computed_at': trending_index.computed_at.isoformat()}
+
+def ensure_ranking_run_row():
+    """Create the ranking run row on databases that predate it; returns rows created"""
+    if db.session.get(RankingRun, RANKING_RUN_ID) is not None:
+        return 0
+    db.session.add(RankingRun(id=RANKING_RUN_ID))
+    db.session.commit()
+    return 1
+
+def backfill_popularity_scores():
+    """Score listings that have never been ranked (e.g. right after the column was added)"""
+    if not db.session.query(Property.id).filter(Property.popularity_score.is_(None)).first():
+        return 0
+    return refresh_rankings()['updated']
+
+def trending_property_ids(location=None, limit=10):
+    """Trending ids from memory, falling back to the (location, popularity_score) index"""
+    property_ids = trending_index.trending(location, limit)
+    if property_ids is not None:
+        return property_ids
+
+    query = db.session.query(Property.id).filter(Property.active == True)
+    if location:
+        query = query.filter(Property.location == location)
+    return [row[0] for row in query.order_by(Property.popularity_score.desc()).limit(limit)]
+
+def start_ranking_job(app, interval_seconds=600):
+    """Recompute rankings periodically in a daemon thread (first run is immediate); one worker writes per interval"""
+    stop_event = threading.Event()
+
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    now = datetime.utcnow()
+                    if claim_ranking_run(now, interval_seconds):
+                        refresh_rankings(now)
+                    else:
+                        # Another worker recomputed within the interval; only pick up its scores
+                        load_rankings()
+                except Exception as e:
+                    app.logger.error('Ranking refresh failed: %s', e)
+                finally:
+                    db.session.remove()
+            if stop_event.wait(interval_seconds):
+                break
+
+    thread = threading.Thread(target=run, name='ranking-job', daemon=True)
+    thread.start()
+    return stop_event
@@ -0,0 +1,243 @@
+import json
+import math
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session, load_only, object_session
+from src.models.property import Property
+from src.utils.listing_generation import GenerationTracker, consistent_scan
+
+# Relative weight of each feature block in the similarity
+NUMERIC_WEIGHT = 1.0
+TYPE_WEIGHT = 1.5
+STATUS_WEIGHT = 3.0  # Keep sale and rental listings apart
+LOCATION_WEIGHT = 1.2
+AMENITY_WEIGHT = 0.6
+
+FEATURE_COLUMNS = (
+    Property.id, Property.price, Property.area, Property.bedrooms, Property.bathrooms,
+    Property.property_type, Property.status, Property.location, Property.features, Property.active
+)
+
+def _numpy():
+    # NumPy is optional and heavy; only load it when recommendations are used
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError('Similar listings require numpy to be installed')
+    return numpy
+
+def _amenities(features):
+    try:
+        values = json.loads(features) if features else []
+    except (TypeError, ValueError):
+        return []
+    return [str(value).strip().lower() for value in values if value] if isinstance(values, list) else []
+
+def _numeric(prop):
+    return [
+        math.log1p(max(prop.price or 0, 0)),
+        math.log1p(max(prop.area or 0, 0)),
+        float(prop.bedrooms or 0),
+        float(prop.bathrooms or 0)
+    ]
+
+class SimilarityIndex:
+    """Normalized feature matrix of active listings answering top-k cosine queries
+
+    This worker's committed writes are reloaded by id; writes by other workers show up as a newer shared
+    listing generation and trigger a rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._dirty = set()
+        self.tracker = GenerationTracker()
+        self.built = False
+
+    def apply_commit(self, generation, property_ids):
+        """Queue the listings one committed transaction changed, in generation order"""
+        with self._lock:
+            for due in self.tracker.commit(generation, property_ids):
+                self._dirty.update(due)
+
+    def build(self):
+        """Load every active listing and build the matrix from scratch"""
+        with self._build_lock:
+            self._build()
+
+    def _build(self):
+        np = _numpy()
+        with self._lock:
+            # Anything committed from here on is either in the scan or reloaded again afterwards
+            self._dirty.clear()
+        rows, generation, consistent = consistent_scan(
+            lambda: Property.query.options(load_only(*FEATURE_COLUMNS[1:])).filter(Property.active == True).all()
+        )
+
+        types = sorted({row.property_type for row in rows})
+        statuses = sorted({row.status or '' for row in rows})
+        locations = sorted({row.location for row in rows})
+        amenities = sorted({amenity for row in rows for amenity in _amenities(row.features)})
+
+        with self._lock:
+            self.vocab = {
+                'type': {value: index for index, value in enumerate(types)},
+                'status': {value: index for index, value in enumerate(statuses)},
+                'location': {value: index for index, value in enumerate(locations)},
+                'amenity': {value: index for index, value in enumerate(amenities)}
+            }
+            self.offsets = {'type': 4}
+            self.offsets['status'] = self.offsets['type'] + len(types)
+            self.offsets['location'] = self.offsets['status'] + len(statuses)
+            self.offsets['amenity'] = self.offsets['location'] + len(locations)
+            self.width = self.offsets['amenity'] + len(amenities)
+
+            numeric = np.array([_numeric(row) for row in rows], dtype=np.float64).reshape(-1, 4)
+            self.mean = numeric.mean(axis=0) if len(rows) else np.zeros(4)
+            self.std = numeric.std(axis=0) if len(rows) else np.ones(4)
+            self.std[self.std == 0] = 1.0
+
+            capacity = max(len(rows) * 2, 64)
+            self.matrix = np.zeros((capacity, self.width), dtype=np.float32)
+            self.ids = np.zeros(capacity, dtype=np.int64)
+            self.valid = np.zeros(capacity, dtype=bool)
+            self.row_of = {}
+            self.size = 0
+
+            for row in rows:
+                self._upsert(row)
+
+            self.tracker.reset(generation, stale=not consistent)
+            for due in self.tracker.drain():
+                self._dirty.update(due)
+            self.built = True
+
+    def _vector(self, prop):
+        """Feature vector for one listing, or None if it uses an unseen category"""
+        np = _numpy()
+        vector = np.zeros(self.width, dtype=np.float32)
+        vector[:4] = NUMERIC_WEIGHT * (np.array(_numeric(prop)) - self.mean) / self.std
+
+        for block, value, weight in (
+            ('type', prop.property_type, TYPE_WEIGHT),
+            ('status', prop.status or '', STATUS_WEIGHT),
+            ('location', prop.location, LOCATION_WEIGHT)
+        ):
+            index = self.vocab[block].get(value)
+            if index is None:
+                return None
+            vector[self.offsets[block] + index] = weight
+
+        amenities = _amenities(prop.features)
+        if amenities:
+            weight = AMENITY_WEIGHT / math.sqrt(len(amenities))
+            for amenity in amenities:
+                index = self.vocab['amenity'].get(amenity)
+                if index is None:
+                    return None
+                vector[self.offsets['amenity'] + index] = weight
+
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _upsert(self, prop):
+        """Write one listing into the matrix; returns False if a rebuild is needed"""
+        np = _numpy()
+        vector = self._vector(prop)
+        if vector is None:
+            return False
+
+        row = self.row_of.get(prop.id)
+        if row is None:
+            if self.size == len(self.ids):
+                # Grow geometrically so appends stay amortized O(1)
+                self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+                self.ids = np.concatenate([self.ids, np.zeros_like(self.ids)])
+                self.valid = np.concatenate([self.valid, np.zeros_like(self.valid)])
+            row = self.size
+            self.size += 1
+            self.row_of[prop.id] = row
+            self.ids[row] = prop.id
+
+        self.matrix[row] = vector
+        self.valid[row] = True
+        return True
+
+    def _remove(self, property_id):
+        row = self.row_of.get(property_id)
+        if row is not None:
+            self.valid[row] = False
+
+    def refresh(self):
+        """Apply listings changed since the last query with one SELECT, or rebuild after other workers' writes"""
+        if not self.built or self.tracker.needs_rebuild():
+            self.build()
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            dirty = list(self._dirty)
+            self._dirty.clear()
+
+        rows = Property.query.options(load_only(*FEATURE_COLUMNS[1:])).filter(Property.id.in_(dirty)).all()
+        found = {row.id: row for row in rows}
+
+        layout_changed = False
+        with self._lock:
+            for property_id in dirty:
+                prop = found.get(property_id)
+                if prop is None or not prop.active:
+                    self._remove(property_id)
+                elif not self._upsert(prop):
+                    # New category or amenity: the column layout changes
+                    layout_changed = True
+                    break
+
+        if layout_changed:
+            self.build()
+
+    def similar(self, property_id, limit=6):
+        """(id, score) of the most similar active listings, best first; None if the listing is unknown or inactive"""
+        np = _numpy()
+        self.refresh()
+
+        with self._lock:
+            row = self.row_of.get(property_id)
+            if row is None or not self.valid[row]:
+                return None
+
+            scores = self.matrix[:self.size] @ self.matrix[row]
+            scores[~self.valid[:self.size]] = -np.inf
+            scores[row] = -np.inf
+
+            candidates = int(np.count_nonzero(np.isfinite(scores)))
+            limit = min(limit, candidates)
+            if limit <= 0:
+                return []
+
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self.ids[index]), round(float(scores[index]), 4)) for index in top]
+
+similarity_index = SimilarityIndex()
+
+@event.listens_for(Property, 'after_insert')
+@event.listens_for(Property, 'after_update')
+@event.listens_for(Property, 'after_delete')
+def _mark_property_dirty(mapper, connection, target):
+    # Reloaded only once the surrounding transaction commits
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('similarity_changes', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_changes(session):
+    property_ids = session.info.pop('similarity_changes', None)
+    if property_ids:
+        similarity_index.apply_commit(session.info.get('listing_generation'), property_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_changes(session):
+    session.info.pop('similarity_changes', None)
@@ -0,0 +1,61 @@
+from sqlalchemy import inspect, text
+from src.models.user import db
+from src.utils.lead_inbox import backfill_lead_inbox
+from src.utils.listing_generation import ensure_generation_row
+from src.utils.payment_reconciliation import backfill_subscription_payments
+from src.utils.ranking import backfill_popularity_scores, ensure_ranking_run_row
+from src.utils.subscription_sweeper import backfill_subscription_state
+from src.utils.user_search import backfill_search_columns
+
+# Columns added to tables that already existed; create_all() creates missing tables but never alters one
+ADDED_COLUMNS = [
+    ('user', 'subscription_state'),
+    ('property', 'popularity_score'),
+    ('property_inquiry', 'owner_id'),
+    ('property_inquiry', 'agent_id'),
+    ('user', 'username_lower'),
+    ('user', 'phone_digits'),
+    ('user', 'subscription_payment_id')
+]
+
+# Tables that gained indexes without gaining columns
+ADDED_INDEX_TABLES = ['payment']
+
+# Idempotent data fixes run after the columns exist; each commits its own work and returns rows changed
+BACKFILLS = [
+    ('subscription_state', backfill_subscription_state),
+    ('popularity_score', backfill_popularity_scores),
+    ('lead_inbox', backfill_lead_inbox),
+    ('user_search', backfill_search_columns),
+    ('listing_generation', ensure_generation_row),
+    ('subscription_payments', backfill_subscription_payments),
+    ('ranking_run', ensure_ranking_run_row)
+]
+
+def add_missing_columns(engine):
+    """ALTER TABLE ... ADD COLUMN for every added column the database lacks, then create missing indexes"""
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as connection:
+        preparer = connection.dialect.identifier_preparer
+        for table_name, column_name in ADDED_COLUMNS:
+            if column_name in {column['name'] for column in inspector.get_columns(table_name)}:
+                continue
+            column = db.metadata.tables[table_name].c[column_name]
+            connection.execute(text(
+                f'ALTER TABLE {preparer.format_table(column.table)} '
+                f'ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=connection.dialect)}'
+            ))
+            added.append(f'{table_name}.{column_name}')
+
+        for table_name in {table_name for table_name, _ in ADDED_COLUMNS} | set(ADDED_INDEX_TABLES):
+            for index in db.metadata.tables[table_name].indexes:
+                index.create(connection, checkfirst=True)
+    return added
+
+def migrate_schema():
+    """Bring an existing database up to the current models; safe to run repeatedly (needs an app context)"""
+    summary = {'added_columns': add_missing_columns(db.engine)}
+    for name, backfill in BACKFILLS:
+        summary[name] = backfill()
+    return summary
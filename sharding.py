@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event, select
+from src.models.user import db
+from src.models.property import Property, PropertyInquiry
+from src.models.subscription import MarketingCampaign, Payment
+
+# Tenant-owned tables and the column that names the tenant (the owning account; an agency is its owner account)
+SHARDED_MODELS = {
+    Property: 'owner_id',
+    PropertyInquiry: 'owner_id',
+    MarketingCampaign: 'user_id',
+    Payment: 'user_id'
+}
+
+def _tune_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
+class ShardRouter:
+    """Per-tenant SQLite copies of tenant-owned rows for parallel reporting reads
+
+    The main database stays the only place rows are written. shard-data refreshes the copies, and User, plans
+    and other global tables are not copied at all.
+    """
+
+    def __init__(self):
+        self.engines = []
+        self.executor = None
+        self.serve_reads = False
+
+    @property
+    def enabled(self):
+        return bool(self.engines)
+
+    @property
+    def reads_enabled(self):
+        """Whether reports fan out over the shard copies (as of the last shard-data run) instead of the main database"""
+        return self.enabled and self.serve_reads
+
+    def init_app(self, app, shard_dir, shard_count, workers=None, serve_reads=False):
+        """Open (and create) shard_count shard files; 0 leaves sharding disabled
+
+        The copies only change when shard-data runs, so serve_reads suits reports that may lag the main database.
+        """
+        self.serve_reads = serve_reads
+        if shard_count <= 0:
+            return
+        os.makedirs(shard_dir, exist_ok=True)
+
+        tables = [model.__table__ for model in SHARDED_MODELS]
+        for shard_id in range(shard_count):
+            engine = create_engine(f"sqlite:///{os.path.join(shard_dir, f'shard_{shard_id:03d}.db')}")
+            event.listen(engine, 'connect', _tune_sqlite)
+            # Foreign keys to global tables are declared but, as in SQLite generally, not enforced
+            db.metadata.create_all(engine, tables=tables)
+            self.engines.append(engine)
+
+        self.executor = ThreadPoolExecutor(max_workers=workers or min(shard_count, 8), thread_name_prefix='shard')
+
+    def shard_id(self, tenant_id):
+        # Fixed modulo placement: changing the shard count means re-running shard-data into new files
+        return tenant_id % len(self.engines)
+
+    def engine_for(self, tenant_id):
+        return self.engines[self.shard_id(tenant_id)]
+
+    def fan_out(self, query):
+        """Run query(connection) on every shard in parallel; returns the per-shard results"""
+        def run(engine):
+            with engine.connect() as connection:
+                return query(connection)
+
+        return list(self.executor.map(run, self.engines))
+
+    def copy_from(self, source_engine, batch_size=5000):
+        """Replace the shard copies with the main database's tenant-owned rows; returns rows copied per table"""
+        copied = {}
+        with source_engine.connect() as source:
+            for model, tenant_column in SHARDED_MODELS.items():
+                table = model.__table__
+                batches = [[] for _ in self.engines]
+                copied[table.name] = 0
+
+                # Rows deleted from the main database since the last run must not survive in the copies
+                for engine in self.engines:
+                    with engine.begin() as connection:
+                        connection.execute(table.delete())
+
+                def flush(shard_id):
+                    if batches[shard_id]:
+                        with self.engines[shard_id].begin() as connection:
+                            connection.execute(table.insert().prefix_with('OR REPLACE'), batches[shard_id])
+                        copied[table.name] += len(batches[shard_id])
+                        batches[shard_id] = []
+
+                for row in source.execution_options(yield_per=batch_size).execute(select(table)):
+                    row = row._asdict()
+                    tenant_id = row[tenant_column]
+                    if tenant_id is None:
+                        continue  # Rows with no tenant (e.g. legacy inquiries) stay in the main database
+                    shard_id = self.shard_id(tenant_id)
+                    batches[shard_id].append(row)
+                    if len(batches[shard_id]) >= batch_size:
+                        flush(shard_id)
+
+                for shard_id in range(len(self.engines)):
+                    flush(shard_id)
+        return copied
+
+shard_router = ShardRouter()
@@ -0,0 +1,57 @@
+import importlib
+import re
+import subprocess
+import sys
+import time
+
+# module name -> seconds spent importing it during app start-up, or None if an earlier import already loaded it
+IMPORT_TIMINGS = {}
+
+def timed_import(module_name, attribute=None):
+    """Import a module (optionally returning one attribute) and record how long it took"""
+    if module_name in sys.modules:
+        # Its cost is counted in whichever module imported it first; a ~0 ms timing would be misleading
+        IMPORT_TIMINGS[module_name] = None
+        module = sys.modules[module_name]
+    else:
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        IMPORT_TIMINGS[module_name] = time.perf_counter() - started
+    return getattr(module, attribute) if attribute else module
+
+def import_timings_ms():
+    return {
+        name: round(seconds * 1000, 2) if seconds is not None else 'already imported'
+        for name, seconds in IMPORT_TIMINGS.items()
+    }
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def import_time_report(target='src.main', limit=25):
+    """Import target in a fresh interpreter with -X importtime and return the slowest modules"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        capture_output=True, text=True
+    )
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                'module': name,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                'top_level': len(indent) <= 1
+            })
+
+    top_level = [module for module in modules if module['top_level']]
+    top_level.sort(key=lambda module: module['cumulative_ms'], reverse=True)
+
+    return {
+        'target': target,
+        'total_ms': round(sum(module['cumulative_ms'] for module in top_level), 2),
+        'slowest': top_level[:limit],
+        'returncode': result.returncode
+    }
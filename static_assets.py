@@ -0,0 +1,105 @@
+import json
+import mimetypes
+import os
+import re
+from flask import request, send_file
+
+# Vite's default output name for hashed files, e.g. assets/index-4f3a9c1b.js (used when the build has no manifest)
+HASHED_ASSET_PATTERN = re.compile(r'^assets/[^/]+-[0-9A-Za-z_-]{8}\.[0-9A-Za-z]+$')
+
+# Written by Vite when build.manifest is enabled (.vite/manifest.json since Vite 5)
+VITE_MANIFEST_PATHS = ('.vite/manifest.json', 'manifest.json')
+
+# Precompressed variants in order of preference
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_MAX_AGE = 31536000  # One year
+
+class StaticManifest:
+    """In-memory index of a static tree, built once at startup"""
+
+    def __init__(self, root):
+        self.root = root
+        self.entries = {}
+        if root and os.path.isdir(root):
+            self._build()
+
+    def _hashed_files(self):
+        """Files the Vite manifest lists as build output, or None when the build has no manifest"""
+        for manifest_path in VITE_MANIFEST_PATHS:
+            try:
+                with open(os.path.join(self.root, manifest_path)) as f:
+                    chunks = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            hashed = set()
+            for chunk in chunks.values():
+                if chunk.get('file'):
+                    hashed.add(chunk['file'])
+                hashed.update(chunk.get('css', ()))
+                hashed.update(chunk.get('assets', ()))
+            # The entry HTML is listed too but keeps its name across builds
+            return {path for path in hashed if not path.endswith('.html')}
+        return None
+
+    def _build(self):
+        hashed_files = self._hashed_files()
+        for directory, _, filenames in os.walk(self.root):
+            available = set(filenames)
+            for filename in filenames:
+                if filename.endswith(('.br', '.gz')):
+                    continue
+
+                absolute_path = os.path.join(directory, filename)
+                relative_path = os.path.relpath(absolute_path, self.root).replace(os.sep, '/')
+                variants = {
+                    encoding: absolute_path + suffix
+                    for encoding, suffix in PRECOMPRESSED_ENCODINGS
+                    if filename + suffix in available
+                }
+
+                self.entries[relative_path] = {
+                    'path': absolute_path,
+                    'mimetype': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                    'variants': variants,
+                    'immutable': relative_path in hashed_files if hashed_files is not None
+                    else bool(HASHED_ASSET_PATTERN.match(relative_path))
+                }
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def get(self, path):
+        return self.entries.get(path)
+
+def send_asset(entry):
+    """Send a manifest entry, preferring a precompressed variant the client accepts"""
+    path = entry['path']
+    encoding = None
+
+    for candidate, _ in PRECOMPRESSED_ENCODINGS:
+        if candidate in entry['variants'] and request.accept_encodings.quality(candidate) > 0:
+            encoding = candidate
+            path = entry['variants'][candidate]
+            break
+
+    response = send_file(
+        path,
+        mimetype=entry['mimetype'],
+        conditional=True,
+        max_age=IMMUTABLE_MAX_AGE if entry['immutable'] else 0
+    )
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if entry['variants']:
+        response.vary.add('Accept-Encoding')
+
+    if entry['immutable']:
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        # index.html and unhashed files must revalidate so new deploys are picked up
+        response.headers['Cache-Control'] = 'no-cache'
+
+    return response
@@ -0,0 +1,98 @@
+import hashlib
+import secrets
+import time
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy import delete
+from src.models.user import db, User, UserSession, StreamTicket
+from src.routes.auth import require_auth
+from src.utils.events import event_bus, format_sse
+
+stream_bp = Blueprint('stream', __name__)
+
+HEARTBEAT_SECONDS = 15
+MAX_STREAM_SECONDS = 3600  # Clients reconnect and re-authenticate at least hourly
+RETRY_MS = 3000
+TICKET_SECONDS = 30
+
+def _ticket_hash(ticket):
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+def _authenticate(session_token):
+    """User id for a valid session token, checked once when the stream opens"""
+    session = UserSession.query.filter_by(session_token=session_token, is_active=True).first()
+    if not session or not session.is_valid() or not session.user.is_active:
+        return None
+    return session.user_id
+
+def _redeem_ticket(ticket):
+    """User id for an unexpired stream ticket, deleted in the same statement so it cannot be replayed"""
+    table = StreamTicket.__table__
+    user_id = db.session.execute(
+        delete(table).where(table.c.ticket_hash == _ticket_hash(ticket), table.c.expires_at >= datetime.utcnow())
+        .returning(table.c.user_id)
+    ).scalar()
+    db.session.commit()
+    if user_id is None:
+        return None
+    user = db.session.get(User, user_id)
+    return user_id if user is not None and user.is_active else None
+
+@stream_bp.route('/ticket', methods=['POST'])
+@require_auth
+def create_stream_ticket():
+    """Issue a single-use ticket for opening the stream, so the session token never appears in a URL"""
+    try:
+        now = datetime.utcnow()
+        StreamTicket.query.filter(StreamTicket.expires_at < now).delete(synchronize_session=False)
+        ticket = secrets.token_urlsafe(32)
+        db.session.add(StreamTicket(
+            ticket_hash=_ticket_hash(ticket),
+            user_id=request.current_user.id,
+            expires_at=now + timedelta(seconds=TICKET_SECONDS)
+        ))
+        db.session.commit()
+        return jsonify({'ticket': ticket, 'expires_in': TICKET_SECONDS}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to create stream ticket', 'details': str(e)}), 500
+
+@stream_bp.route('', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of campaign metric deltas and new inquiries for the current user"""
+    # EventSource cannot set headers, so browsers pass a ticket from POST /ticket as ?ticket=
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    ticket = request.args.get('ticket', '')
+    if not session_token and not ticket:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    user_id = _authenticate(session_token) if session_token else _redeem_ticket(ticket)
+    # Release the connection now; it would otherwise be held for the life of the stream
+    db.session.remove()
+    if user_id is None:
+        return jsonify({'error': 'Invalid or expired session or ticket'}), 401
+
+    subscription = event_bus.subscribe(user_id)
+
+    def generate():
+        try:
+            yield f'retry: {RETRY_MS}\n: connected\n\n'
+            started = last_sent = time.monotonic()
+            while time.monotonic() - started < MAX_STREAM_SECONDS:
+                message = subscription.get(timeout=1)
+                if subscription.dropped:
+                    yield format_sse({'id': '', 'event': 'resync', 'data': {}})
+                    return
+                if message is not None:
+                    yield format_sse(message)
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                    yield ': heartbeat\n\n'
+                    last_sent = time.monotonic()
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from buffering the stream
+    return response
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+import json
 from datetime import datetime
 from src.models.user import db
 
@@ -79,7 +80,7 @@ class Payment(db.Model):
     description = db.Column(db.String(500), nullable=True)
     
     # Payment status
-    status = db.Column(db.String(20), default='pending')  # pending, completed, failed, refunded
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, completed, failed, refunded
     payment_method = db.Column(db.String(50), nullable=True)  # card, bank_transfer, etc.
     
     # Subscription details
@@ -112,11 +113,89 @@ class Payment(db.Model):
             'status': self.status,
             'payment_method': self.payment_method,
             'billing_cycle': self.billing_cycle,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at,
+            'completed_at': self.completed_at,
             'subscription_plan': self.subscription_plan.to_dict() if self.subscription_plan else None
         }
 
+class PaymentWebhookEvent(db.Model):
+    """Deduplicating inbox for payment provider webhooks"""
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(255), unique=True, nullable=False)  # Provider event id
+    event_type = db.Column(db.String(100), nullable=False)
+    stripe_payment_id = db.Column(db.String(255), nullable=True)
+    payload = db.Column(db.Text, nullable=True)  # JSON string
+    
+    # Processing state
+    processed = db.Column(db.Boolean, default=False, index=True)
+    
+    # Timestamps
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<PaymentWebhookEvent {self.event_id}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'event_type': self.event_type,
+            'stripe_payment_id': self.stripe_payment_id,
+            'processed': self.processed,
+            'received_at': self.received_at,
+            'processed_at': self.processed_at
+        }
+
+# Payload keys never returned by to_dict, whatever event wrote them
+OUTBOX_SECRET_KEYS = ('reset_token', 'password', 'auth_token', 'session_token', 'secret')
+
+class OutboxEvent(db.Model):
+    """Side effects (emails, social posts, ad platform calls) recorded in the same transaction as the change"""
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    aggregate_type = db.Column(db.String(50), nullable=False)  # user, property, campaign, payment
+    aggregate_id = db.Column(db.String(255), nullable=False)  # Events of one aggregate are dispatched in id order
+    payload = db.Column(db.Text, nullable=False)  # JSON string
+    
+    # Dispatch state
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, dispatched, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(64), nullable=True)  # Dispatcher holding the claim
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    dispatched_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_outbox_status_next_attempt', 'status', 'next_attempt_at', 'id'),
+        db.Index('ix_outbox_aggregate', 'aggregate_type', 'aggregate_id', 'status', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<OutboxEvent {self.id} {self.event_type}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'aggregate_type': self.aggregate_type,
+            'aggregate_id': self.aggregate_id,
+            'payload': {
+                key: '[redacted]' if key in OUTBOX_SECRET_KEYS else value
+                for key, value in json.loads(self.payload).items()
+            } if self.payload else None,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at,
+            'last_error': self.last_error,
+            'created_at': self.created_at,
+            'dispatched_at': self.dispatched_at
+        }
+
 class MarketingCampaign(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -174,15 +253,72 @@ class MarketingCampaign(db.Model):
             return 0
         return self.get_cost_spent_aed() / self.leads
     
-    def to_dict(self):
+    # Columns each projectable field needs (fields not listed map to the column of the same name)
+    PROJECTION_COLUMNS = {
+        'performance': ('impressions', 'clicks', 'leads', 'cost_spent'),
+        'property': ('property_id',)
+    }
+    
+    FIELDS = (
+        'id', 'user_id', 'property_id', 'name', 'platform', 'campaign_type', 'budget',
+        'daily_budget', 'target_audience', 'status', 'platform_campaign_id', 'performance',
+        'created_at', 'start_date', 'end_date', 'property'
+    )
+    
+    @classmethod
+    def projection_options(cls, fields):
+        """Loader options that only load the columns needed for the given fields"""
+        from sqlalchemy.orm import joinedload
+        from src.utils.projection import projection_options
+        from src.models.property import Property
+        
+        return projection_options(cls, fields, cls.PROJECTION_COLUMNS, {
+            'property': lambda: joinedload(cls.property).load_only(Property.title, Property.location)
+        })
+    
+    def _target_audience_data(self):
         import json
         
-        target_audience_data = {}
         try:
             if self.target_audience:
-                target_audience_data = json.loads(self.target_audience)
+                return json.loads(self.target_audience)
         except:
-            target_audience_data = {}
+            pass
+        return {}
+    
+    def _performance_dict(self):
+        return {
+            'impressions': self.impressions,
+            'clicks': self.clicks,
+            'leads': self.leads,
+            'cost_spent': self.get_cost_spent_aed(),
+            'ctr': round(self.get_ctr(), 2),
+            'cpl': round(self.get_cpl(), 2)
+        }
+    
+    def _property_dict(self):
+        return {
+            'title': self.property.title,
+            'location': self.property.location
+        } if self.property else None
+    
+    def _serialize_field(self, field):
+        """Serialize a single field for projected responses"""
+        if field == 'budget':
+            return self.get_budget_aed()
+        if field == 'daily_budget':
+            return self.daily_budget / 100 if self.daily_budget else None
+        if field == 'target_audience':
+            return self._target_audience_data()
+        if field == 'performance':
+            return self._performance_dict()
+        if field == 'property':
+            return self._property_dict()
+        return getattr(self, field)
+    
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return {field: self._serialize_field(field) for field in fields}
         
         return {
             'id': self.id,
@@ -193,23 +329,12 @@ class MarketingCampaign(db.Model):
             'campaign_type': self.campaign_type,
             'budget': self.get_budget_aed(),
             'daily_budget': self.daily_budget / 100 if self.daily_budget else None,
-            'target_audience': target_audience_data,
+            'target_audience': self._target_audience_data(),
             'status': self.status,
             'platform_campaign_id': self.platform_campaign_id,
-            'performance': {
-                'impressions': self.impressions,
-                'clicks': self.clicks,
-                'leads': self.leads,
-                'cost_spent': self.get_cost_spent_aed(),
-                'ctr': round(self.get_ctr(), 2),
-                'cpl': round(self.get_cpl(), 2)
-            },
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'property': {
-                'title': self.property.title,
-                'location': self.property.location
-            } if self.property else None
+            'performance': self._performance_dict(),
+            'created_at': self.created_at,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'property': self._property_dict()
         }
-
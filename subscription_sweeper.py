@@ -0,0 +1,86 @@
+import threading
+from datetime import datetime
+from sqlalchemy import and_, case, or_
+from src.models.user import db, User
+from src.models.subscription import MarketingCampaign
+
+# Subscription states the sweeper may expire
+SWEEPABLE_STATES = ('trial', 'active')
+
+def sweep_expired_subscriptions(now=None, batch_size=500):
+    """Expire lapsed subscriptions and pause their active campaigns in batches"""
+    now = now or datetime.utcnow()
+    summary = {
+        'swept_at': now.isoformat(),
+        'users_expired': 0,
+        'campaigns_paused': 0,
+        'batches': 0
+    }
+
+    while True:
+        # Range scan on (subscription_state, subscription_end)
+        user_ids = [row[0] for row in db.session.query(User.id).filter(
+            User.subscription_state.in_(SWEEPABLE_STATES),
+            User.subscription_end < now
+        ).order_by(User.subscription_end).limit(batch_size).all()]
+
+        if not user_ids:
+            break
+
+        try:
+            summary['users_expired'] += User.query.filter(
+                User.id.in_(user_ids)
+            ).update({'subscription_state': 'expired'}, synchronize_session=False)
+
+            summary['campaigns_paused'] += MarketingCampaign.query.filter(
+                MarketingCampaign.user_id.in_(user_ids),
+                MarketingCampaign.status == 'active'
+            ).update({'status': 'paused'}, synchronize_session=False)
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        summary['batches'] += 1
+
+        if len(user_ids) < batch_size:
+            break
+
+    return summary
+
+def backfill_subscription_state(now=None):
+    """Derive the stored state for rows that predate it or still carry the 'free' default while paying"""
+    now = now or datetime.utcnow()
+    state = case(
+        (or_(User.subscription_type.is_(None), User.subscription_type == 'free'), 'free'),
+        (or_(User.subscription_end.is_(None), User.subscription_end < now), 'expired'),
+        (User.subscription_type == 'trial', 'trial'),
+        else_='active'
+    )
+    updated = User.query.filter(or_(
+        User.subscription_state.is_(None),
+        and_(User.subscription_state == 'free', User.subscription_type != 'free')
+    )).update({'subscription_state': state}, synchronize_session=False)
+    db.session.commit()
+    return updated
+
+def start_subscription_sweeper(app, interval_seconds=300, batch_size=500):
+    """Run the sweeper periodically in a daemon thread"""
+    stop_event = threading.Event()
+
+    def run():
+        while not stop_event.wait(interval_seconds):
+            with app.app_context():
+                try:
+                    summary = sweep_expired_subscriptions(batch_size=batch_size)
+                    if summary['users_expired']:
+                        app.logger.info('Subscription sweep: %s', summary)
+                except Exception as e:
+                    app.logger.error('Subscription sweep failed: %s', e)
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='subscription-sweeper', daemon=True)
+    thread.start()
+    return stop_event
@@ -0,0 +1,108 @@
+import os
+import secrets
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+
+# Configured before src.main is imported: a throwaway database and files, and no background threads
+_DATA_DIR = tempfile.mkdtemp(prefix='app-tests-')
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(_DATA_DIR, 'app.db'),
+    'BACKGROUND_JOBS': '0',
+    'DETAIL_CACHE_PATH': '',
+    'EVENT_BROKER_PATH': '',
+    'MEDIA_STORE_DIR': os.path.join(_DATA_DIR, 'media'),
+    'VIEW_FLUSH_INTERVAL': '0',
+    'INQUIRY_FLUSH_INTERVAL': '0'
+})
+
+@pytest.fixture(scope='session')
+def app():
+    from src.main import app
+    from src.utils.inquiry_intake import inquiry_intake
+    from src.utils.view_counter import view_counter
+
+    app.config['TESTING'] = True
+    # Append logs are opened on the first view or inquiry; keep them out of the source tree
+    view_counter.log_dir = os.path.join(_DATA_DIR, 'view_logs')
+    inquiry_intake.log_dir = os.path.join(_DATA_DIR, 'inquiry_logs')
+    return app
+
+def _reset_in_memory_state():
+    # Per-worker indexes and caches outlive a test's database
+    from src.utils.dedup import duplicate_index
+    from src.utils.detail_cache import detail_cache
+    from src.utils.price_analytics import price_analytics
+    from src.utils.ranking import trending_index
+    from src.utils.recommender import similarity_index
+
+    for index in (duplicate_index, price_analytics, similarity_index, trending_index):
+        index.__init__()
+    detail_cache.clear()
+
+@pytest.fixture
+def db(app):
+    """A freshly created and migrated schema, inside an app context"""
+    from src.models.user import db
+    from src.utils.schema_migrations import migrate_schema
+
+    with app.app_context():
+        db.create_all()
+        migrate_schema()
+        _reset_in_memory_state()
+        yield db
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(db):
+    """Create a user with a live session; returns (user, session token)"""
+    from src.models.user import User, UserSession
+
+    def make_user(username=None, role='user', **values):
+        username = username or f'user{secrets.token_hex(4)}'
+        user = User(username=username, email=f'{username}@example.com', role=role, **values)
+        user.set_password('Passw0rd!')
+        db.session.add(user)
+        db.session.flush()
+        token = secrets.token_urlsafe(16)
+        db.session.add(UserSession(user_id=user.id, session_token=token, expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db.session.commit()
+        return user, token
+
+    return make_user
+
+@pytest.fixture
+def make_property(db, make_user):
+    from src.models.property import Property
+
+    owner = []
+
+    def make_property(**values):
+        if not owner and 'owner_id' not in values:
+            owner.append(make_user()[0])
+        fields = dict(
+            title='Sea view apartment', description='Bright two bedroom apartment with a balcony over the marina',
+            location='Dubai Marina, Dubai', price=1500000, bedrooms=2, bathrooms=2, area=1200,
+            property_type='Apartment', owner_id=owner[0].id if owner else None
+        )
+        fields.update(values)
+        prop = Property(**fields)
+        db.session.add(prop)
+        db.session.commit()
+        return prop
+
+    return make_property
+
+@pytest.fixture
+def other_worker(app):
+    """Commits through a separate engine, as another worker process would: no ORM events fire here"""
+    from sqlalchemy import create_engine
+
+    engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+    yield engine
+    engine.dispose()
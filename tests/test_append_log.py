@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+from src.models.property import Property
+from src.utils.append_log import AppendLog
+from src.utils.view_counter import ViewCounter
+
+_fork = multiprocessing.get_context('fork')
+
+def _crashing_worker(log_dir, rotate):
+    """Record views like a worker, then die without flushing"""
+    counter = ViewCounter()
+    counter.init_app(None, log_dir)
+    counter.record(1, 2)
+    counter.record(2)
+    if rotate:
+        # Crash mid-flush: the log is claimed but its UPDATE never committed
+        with counter._lock:
+            counter._log.rotate()
+        counter.record(1)
+    counter.sync_log()
+    os._exit(0)
+
+def _live_worker(log_dir, ready, done):
+    log = AppendLog(log_dir, 'views')
+    log.append('1 5')
+    log.sync()
+    ready.set()
+    done.wait(10)
+
+def _crash(log_dir, rotate=False):
+    process = _fork.Process(target=_crashing_worker, args=(log_dir, rotate))
+    process.start()
+    process.join(10)
+    assert process.exitcode == 0
+
+def test_init_app_opens_no_log_until_the_first_view(tmp_path):
+    log_dir = str(tmp_path / 'views')
+    counter = ViewCounter()
+    counter.init_app(None, log_dir)
+    assert not os.path.exists(log_dir)
+
+    counter.record(1)
+    assert sorted(name.rsplit('.', 1)[1] for name in os.listdir(log_dir)) == ['lock', 'log']
+
+def test_recover_adopts_a_dead_workers_log_exactly_once(tmp_path):
+    log_dir = str(tmp_path / 'views')
+    _crash(log_dir)
+
+    counter = ViewCounter()
+    counter.init_app(None, log_dir)
+    assert counter.recover() == 3
+    assert (counter.pending_for(1), counter.pending_for(2)) == (2, 1)
+
+    other = ViewCounter()
+    other.init_app(None, log_dir)
+    assert other.recover() == 0
+
+def test_recover_includes_logs_claimed_by_an_unfinished_flush(tmp_path):
+    log_dir = str(tmp_path / 'views')
+    _crash(log_dir, rotate=True)
+
+    counter = ViewCounter()
+    counter.init_app(None, log_dir)
+    assert counter.recover() == 4
+    assert counter.pending_for(1) == 3
+
+def test_recover_leaves_a_live_workers_log_alone(tmp_path):
+    log_dir = str(tmp_path / 'views')
+    ready, done = _fork.Event(), _fork.Event()
+    process = _fork.Process(target=_live_worker, args=(log_dir, ready, done))
+    process.start()
+    try:
+        assert ready.wait(10)
+        counter = ViewCounter()
+        counter.init_app(None, log_dir)
+        assert counter.recover() == 0
+    finally:
+        done.set()
+        process.join(10)
+
+    assert counter.recover() == 5
+
+def test_flush_applies_recovered_views_and_deletes_the_claimed_logs(tmp_path, db, make_property):
+    log_dir = str(tmp_path / 'views')
+    first, second = make_property(), make_property()
+    assert (first.id, second.id) == (1, 2)
+    _crash(log_dir)
+
+    counter = ViewCounter()
+    counter.init_app(None, log_dir)
+    counter.recover()
+    assert counter.flush() == 2
+
+    db.session.expire_all()
+    assert (db.session.get(Property, 1).views, db.session.get(Property, 2).views) == (2, 1)
+    assert not [name for name in os.listdir(log_dir) if not name.endswith(('.lock', '.log'))]
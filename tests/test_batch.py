@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from src.models.user import UserSession
+
+def _batch(client, sub_requests, token=None):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return client.post('/api/batch', json={'requests': sub_requests}, headers=headers)
+
+def _statuses(response):
+    assert response.status_code == 200
+    return [result['status'] for result in response.get_json()['responses']]
+
+def test_parallel_reads_run_as_the_batch_caller(client, make_user):
+    user, token = make_user()
+    make_user()
+
+    response = _batch(client, [{'id': i, 'method': 'GET', 'path': '/api/auth/me'} for i in range(6)], token)
+
+    results = response.get_json()['responses']
+    assert [result['id'] for result in results] == list(range(6))
+    assert {result['body']['user']['id'] for result in results} == {user.id}
+
+def test_sub_requests_after_a_logout_are_rejected(client, make_user):
+    _, token = make_user()
+
+    response = _batch(client, [
+        {'path': '/api/auth/me'},
+        {'method': 'POST', 'path': '/api/auth/logout'},
+        {'path': '/api/auth/me'}
+    ], token)
+
+    assert _statuses(response) == [200, 200, 401]
+
+def test_an_expired_session_cannot_start_a_batch(client, db, make_user):
+    user, token = make_user()
+    UserSession.query.filter_by(user_id=user.id).update({'expires_at': datetime.utcnow() - timedelta(minutes=1)})
+    db.session.commit()
+
+    assert _batch(client, [{'path': '/api/auth/me'}], token).status_code == 401
+
+def test_unauthenticated_batches_get_no_session(client, make_user):
+    make_user()
+    assert _statuses(_batch(client, [{'path': '/api/auth/me'}])) == [401]
+
+def test_streams_and_nested_batches_are_rejected(client, make_user):
+    _, token = make_user()
+
+    for path in ('/api/stream', '/api/stream/ticket', '/api/batch'):
+        assert _batch(client, [{'method': 'POST', 'path': path}], token).status_code == 400
@@ -0,0 +1,57 @@
+import time
+from sqlalchemy import text
+from src.utils.dedup import duplicate_index
+from src.utils.listing_generation import bump_generation, current_generation
+
+def _values(**values):
+    fields = dict(
+        title='Sea view apartment', description='Bright two bedroom apartment with a balcony over the marina',
+        location='Dubai Marina, Dubai', area=1200, bedrooms=2
+    )
+    fields.update(values)
+    return fields
+
+def _duplicate_ids(values, exclude_id=None):
+    return [match['property_id'] for match in duplicate_index.find_duplicates(values, exclude_id=exclude_id)]
+
+def _wait_for_rebuild(timeout=10):
+    deadline = time.monotonic() + timeout
+    while duplicate_index._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not duplicate_index._rebuilding
+
+def test_exact_duplicates_need_an_address_or_coordinates(db, make_property):
+    make_property(title='Marina studio', description='Compact studio near the tram')
+    make_property(address='12 Marina Walk', title='Marina loft', description='Open plan loft with a terrace')
+
+    assert _duplicate_ids(_values(title='Harbour flat', description='Quiet unit facing the park')) == []
+    assert _duplicate_ids(_values(address='12 marina walk', title='Harbour flat', description='Quiet unit')) != []
+
+def test_own_writes_are_applied_without_a_rebuild(db, make_property):
+    first, second = make_property(), make_property()
+    assert _duplicate_ids(_values(), exclude_id=first.id) == [second.id]
+    built_generation = duplicate_index.tracker.generation
+
+    second.active = False
+    db.session.commit()
+
+    assert _duplicate_ids(_values(), exclude_id=first.id) == []
+    assert duplicate_index.tracker.generation == built_generation + 1
+
+def test_other_workers_writes_are_picked_up_by_a_background_rebuild(app, db, make_property, other_worker):
+    first, second = make_property(), make_property()
+    duplicate_index.start(app)
+    assert duplicate_index._ready.wait(10)
+    assert _duplicate_ids(_values(), exclude_id=first.id) == [second.id]
+    duplicate_index.tracker.check_interval = duplicate_index.tracker.rebuild_interval = 0
+
+    with other_worker.begin() as connection:
+        connection.execute(text('UPDATE property SET active = 0 WHERE id = :id'), {'id': second.id})
+        bump_generation(connection)
+
+    # The request that notices the foreign write is answered from the current index
+    duplicate_index.find_duplicates(_values())
+    _wait_for_rebuild()
+
+    assert _duplicate_ids(_values(), exclude_id=first.id) == []
+    assert duplicate_index.tracker.generation == current_generation()
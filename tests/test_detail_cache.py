@@ -0,0 +1,67 @@
+import pytest
+from src.utils.detail_cache import DetailCache
+
+def _detail(client, prop):
+    response = client.get(f'/api/properties/{prop.id}/detail')
+    assert response.status_code == 200
+    return response.headers['X-Cache'], response.get_json()['property']
+
+@pytest.fixture
+def workers(app, tmp_path):
+    """Two detail caches sharing one L2 file, as two worker processes would"""
+    caches = []
+    for _ in range(2):
+        cache = DetailCache()
+        cache.init_app(app, str(tmp_path / 'cache' / 'detail.db'), sync_interval=0)
+        caches.append(cache)
+    return caches
+
+def test_committed_listing_changes_invalidate_the_cached_detail(client, db, make_property):
+    prop = make_property(price=1000000)
+    assert _detail(client, prop)[0] == 'MISS'
+    assert _detail(client, prop)[0] == 'L1'
+
+    prop.price = 900000
+    db.session.commit()
+
+    source, detail = _detail(client, prop)
+    assert (source, detail['price']) == ('MISS', 900000)
+
+def test_view_count_flushes_keep_the_cached_detail(client, db, make_property):
+    prop = make_property()
+    _detail(client, prop)
+
+    prop.views += 10
+    db.session.commit()
+
+    assert _detail(client, prop)[0] == 'L1'
+
+def test_rolled_back_changes_keep_the_cached_detail(client, db, make_property):
+    prop = make_property()
+    _detail(client, prop)
+
+    prop.price = 1
+    db.session.flush()
+    db.session.rollback()
+
+    assert _detail(client, prop)[0] == 'L1'
+
+def test_invalidation_reaches_other_workers(workers):
+    first, second = workers
+    assert first.get_or_build('property:1', lambda: b'old') == (b'old', 'miss')
+    assert second.get_or_build('property:1', lambda: b'unused') == (b'old', 'l2')
+
+    first.invalidate(['property:1'])
+
+    assert second.get_or_build('property:1', lambda: b'new') == (b'new', 'miss')
+    assert first.get_or_build('property:1', lambda: b'unused') == (b'new', 'l2')
+
+def test_a_failed_l2_invalidation_is_logged_and_still_evicts_locally(workers, caplog):
+    cache, _ = workers
+    cache.get_or_build('property:1', lambda: b'old')
+    cache._l2().execute('DROP TABLE invalidations')
+
+    cache.invalidate(['property:1'])
+
+    assert 'invalidation of 1 keys failed' in caplog.text
+    assert cache._l1_get('property:1') is None
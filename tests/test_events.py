@@ -0,0 +1,60 @@
+import sqlite3
+import pytest
+from src.utils.events import EventBus
+
+@pytest.fixture
+def workers(app, tmp_path):
+    """Two event buses sharing one broker file, as two worker processes would"""
+    broker_path = str(tmp_path / 'broker' / 'events.db')
+    buses = []
+    for pid in (101, 102):
+        bus = EventBus()
+        bus.init_app(app, broker_path)
+        bus.pid = pid
+        buses.append(bus)
+    return buses
+
+def test_events_reach_subscribers_on_other_workers_once(workers):
+    publisher, subscriber = workers
+    remote, local = subscriber.subscribe(7), publisher.subscribe(7)
+
+    publisher.publish(7, 'campaign.metrics', {'clicks': 3})
+    publisher.publish(8, 'campaign.metrics', {'clicks': 1})
+
+    assert subscriber.poll_broker() == 1
+    assert subscriber.poll_broker() == 0
+    assert remote.get(timeout=0)['data'] == {'clicks': 3}
+    # The publisher delivered locally and skips its own events when polling
+    assert local.get(timeout=0)['data'] == {'clicks': 3}
+    assert publisher.poll_broker() == 0
+    assert local.get(timeout=0) is None
+
+def test_publish_survives_a_broker_failure(workers):
+    publisher, _ = workers
+    local = publisher.subscribe(7)
+    publisher._broker().execute('DROP TABLE events')
+
+    publisher.publish(7, 'inquiry.created', {'id': 1})
+
+    assert local.get(timeout=0)['data'] == {'id': 1}
+
+def test_poll_purges_expired_events_at_most_once_per_interval(workers, monkeypatch):
+    publisher, subscriber = workers
+    monkeypatch.setattr('src.utils.events.BROKER_RETENTION_SECONDS', -1)
+    publisher.publish(7, 'campaign.metrics', {})
+    subscriber.poll_broker()
+    publisher.publish(7, 'campaign.metrics', {})
+    subscriber.poll_broker()
+
+    remaining = sqlite3.connect(subscriber.broker_path).execute('SELECT COUNT(*) FROM events').fetchone()[0]
+    assert remaining == 1
+
+def test_stream_tickets_are_single_use(client, make_user):
+    _, token = make_user()
+    ticket = client.post('/api/stream/ticket', headers={'Authorization': f'Bearer {token}'}).get_json()['ticket']
+
+    assert client.get('/api/stream?ticket=not-a-ticket').status_code == 401
+    response = client.get(f'/api/stream?ticket={ticket}')
+    assert response.status_code == 200
+    response.close()
+    assert client.get(f'/api/stream?ticket={ticket}').status_code == 401
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import text
+from src.utils.listing_generation import GenerationTracker, bump_generation, consistent_scan, current_generation
+from src.utils.price_analytics import price_analytics
+from src.utils.recommender import similarity_index
+
+pytest.importorskip('numpy')
+
+def _write_elsewhere(engine, statement, **params):
+    """A listing write committed by another worker: no ORM events here, only the shared generation moves"""
+    with engine.begin() as connection:
+        connection.execute(text(statement), params)
+        bump_generation(connection)
+
+def _rebuild_immediately(index):
+    index.tracker.check_interval = 0
+    index.tracker.rebuild_interval = 0
+
+def test_tracker_applies_own_commits_in_generation_order():
+    tracker = GenerationTracker()
+    tracker.reset(10)
+
+    assert tracker.commit(12, ['b']) == []
+    assert tracker.commit(11, ['a']) == [['a'], ['b']]
+    assert tracker.commit(11, ['again']) == []
+    assert tracker.generation == 12
+
+def test_tracker_rebuild_keeps_only_commits_newer_than_the_scan():
+    tracker = GenerationTracker()
+    tracker.reset(10)
+    tracker.commit(12, ['in the scan'])
+    tracker.commit(14, ['after the scan'])
+
+    tracker.reset(13)
+
+    assert tracker.pending == {14: ['after the scan']}
+    assert tracker.drain() == [['after the scan']]
+
+def test_tracker_without_a_generation_row_applies_changes_directly():
+    tracker = GenerationTracker()
+    tracker.reset(None)
+    assert tracker.commit(None, ['local']) == [['local']]
+
+def test_consistent_scan_detects_writes_during_the_scan(db, other_worker):
+    def scan():
+        _write_elsewhere(other_worker, 'UPDATE property SET views = 1')
+        return 'rows'
+
+    result, generation, consistent = consistent_scan(scan, attempts=2)
+
+    assert (result, consistent) == ('rows', False)
+    assert generation == current_generation()
+
+def test_own_writes_update_the_similarity_index_without_a_rebuild(db, make_property):
+    first, second, third = (make_property(price=price) for price in (1000000, 1100000, 1200000))
+    assert similarity_index.similar(first.id, limit=5)
+    built_generation = similarity_index.tracker.generation
+
+    second.active = False
+    db.session.commit()
+
+    assert second.id not in [match_id for match_id, _ in similarity_index.similar(first.id, limit=5)]
+    assert similarity_index.tracker.generation == built_generation + 1
+    assert similarity_index.tracker.pending == {}
+
+def test_other_workers_writes_trigger_a_similarity_rebuild(db, make_property, other_worker):
+    first, second, third = (make_property(price=price) for price in (1000000, 1100000, 1200000))
+    assert len(similarity_index.similar(first.id, limit=5)) == 2
+    _rebuild_immediately(similarity_index)
+
+    _write_elsewhere(other_worker, 'UPDATE property SET active = 0 WHERE id = :id', id=third.id)
+
+    assert [match_id for match_id, _ in similarity_index.similar(first.id, limit=5)] == [second.id]
+    assert similarity_index.tracker.generation == current_generation()
+
+def test_price_analytics_counts_other_workers_listings_exactly_once(db, make_property, other_worker):
+    prop = make_property(price=1000000)
+    assert price_analytics.summary()['listings'] == 1
+    _rebuild_immediately(price_analytics)
+
+    _write_elsewhere(other_worker, 'UPDATE property SET price = 3000000 WHERE id = :id', id=prop.id)
+    make_property(price=2000000)
+
+    summary = price_analytics.summary()
+    assert (summary['listings'], summary['avg_price']) == (2, 2500000)
+    assert price_analytics.tracker.generation == current_generation()
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import pytest
+from src.models.subscription import OutboxEvent
+from src.utils.outbox import OutboxDispatcher, enqueue
+
+@pytest.fixture
+def make_dispatcher(app):
+    dispatchers = []
+
+    def make_dispatcher(handler, **options):
+        dispatcher = OutboxDispatcher()
+        dispatcher.init_app(app, interval=0, **options)
+        dispatcher.register('test.event', handler)
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    yield make_dispatcher
+    for dispatcher in dispatchers:
+        dispatcher.executor.shutdown()
+
+def _enqueue(db, *events):
+    for aggregate_id, step in events:
+        enqueue('test.event', 'test', aggregate_id, {'step': step})
+    db.session.commit()
+
+def _statuses(db):
+    db.session.expire_all()
+    return {(row.aggregate_id, row.payload): (row.status, row.attempts) for row in OutboxEvent.query}
+
+def _later(seconds):
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+def test_a_failed_event_holds_back_its_aggregate_until_its_retry(db, make_dispatcher):
+    delivered, failing = [], {1}
+
+    def handler(app, outbox_event):
+        step = outbox_event['payload']['step']
+        if step in failing:
+            failing.discard(step)
+            raise RuntimeError('platform unavailable')
+        delivered.append((outbox_event['aggregate_id'], step))
+
+    dispatcher = make_dispatcher(handler)
+    _enqueue(db, ('a', 1), ('a', 2), ('b', 3))
+
+    assert dispatcher.dispatch_pending() == 3
+    assert delivered == [('b', 3)]
+    event = OutboxEvent.query.filter_by(aggregate_id='a').order_by(OutboxEvent.id).first()
+    assert (event.attempts, event.last_error) == (1, 'platform unavailable')
+
+    # Not due yet: neither the failed event nor the one queued behind it may run
+    assert dispatcher.dispatch_pending() == 0
+    assert dispatcher.dispatch_pending(now=_later(dispatcher.retry_base + 1)) == 2
+    assert delivered == [('b', 3), ('a', 1), ('a', 2)]
+    assert {status for status, _ in _statuses(db).values()} == {'dispatched'}
+
+def test_dead_lettered_events_stop_blocking_their_aggregate(db, make_dispatcher):
+    delivered = []
+
+    def handler(app, outbox_event):
+        if outbox_event['payload']['step'] == 1:
+            raise RuntimeError('rejected')
+        delivered.append(outbox_event['payload']['step'])
+
+    dispatcher = make_dispatcher(handler, max_attempts=2)
+    _enqueue(db, ('a', 1), ('a', 2))
+
+    dispatcher.dispatch_pending()
+    dispatcher.dispatch_pending(now=_later(dispatcher.retry_base + 1))
+
+    assert _statuses(db)[('a', '{"step": 1}')] == ('failed', 2)
+    dispatcher.dispatch_pending(now=_later(dispatcher.retry_base + 1))
+    assert delivered == [2]
+
+def test_a_claimed_batch_is_invisible_to_other_workers_until_its_lease_ends(db, make_dispatcher):
+    dispatcher = make_dispatcher(lambda app, outbox_event: None, lease_seconds=60)
+    other = make_dispatcher(lambda app, outbox_event: None)
+    _enqueue(db, ('a', 1), ('a', 2))
+
+    assert [event['payload']['step'] for event in dispatcher._claim(datetime.utcnow())] == [1, 2]
+    assert other._claim(datetime.utcnow()) == []
+    # The first worker died without recording the outcome
+    assert [event['payload']['step'] for event in other._claim(_later(61))] == [1, 2]
+
+def test_claims_skip_events_queued_behind_another_workers_claim(db, make_dispatcher):
+    dispatcher = make_dispatcher(lambda app, outbox_event: None, batch_size=1)
+    other = make_dispatcher(lambda app, outbox_event: None)
+    _enqueue(db, ('a', 1))
+
+    assert len(dispatcher._claim(datetime.utcnow())) == 1
+    _enqueue(db, ('a', 2), ('b', 3))
+
+    assert [event['payload']['step'] for event in other._claim(datetime.utcnow())] == [3]
+
+def test_events_are_only_recorded_when_the_transaction_commits(db):
+    enqueue('test.event', 'test', 'a', {'step': 1})
+    db.session.rollback()
+    assert OutboxEvent.query.count() == 0
+
+    _enqueue(db, ('a', 1))
+    assert _statuses(db) == {('a', '{"step": 1}'): ('pending', 0)}
@@ -0,0 +1,138 @@
+import hashlib
+import hmac
+import json
+import time
+import pytest
+from src.models.subscription import MarketingCampaign, OutboxEvent, Payment, SubscriptionPlan
+from src.utils.payment_reconciliation import (
+    FakePaymentProvider, apply_payment_transition, process_webhook_inbox, reconcile_pending_payments,
+    record_webhook_events, verify_webhook_signature
+)
+
+SECRET = 'whsec_test'
+
+@pytest.fixture
+def plan(db):
+    plan = SubscriptionPlan(name='basic', display_name='Basic', price_monthly=9900)
+    db.session.add(plan)
+    db.session.commit()
+    return plan
+
+@pytest.fixture
+def make_payment(db, plan):
+    def make_payment(user, stripe_payment_id, status='pending'):
+        payment = Payment(
+            user_id=user.id, stripe_payment_id=stripe_payment_id, amount=9900, status=status,
+            subscription_plan_id=plan.id
+        )
+        db.session.add(payment)
+        db.session.commit()
+        return payment
+
+    return make_payment
+
+def _transition(db, stripe_payment_id, status):
+    changed = apply_payment_transition(stripe_payment_id, status)
+    db.session.commit()
+    db.session.expire_all()
+    return changed
+
+def _sign(payload, timestamp=None):
+    timestamp = str(timestamp or int(time.time()))
+    signature = hmac.new(SECRET.encode(), timestamp.encode() + b'.' + payload, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+def test_completion_activates_once_and_replays_are_no_ops(db, make_user, make_payment):
+    user, _ = make_user()
+    payment = make_payment(user, 'pi_1')
+
+    assert _transition(db, 'pi_1', 'completed') is True
+    assert _transition(db, 'pi_1', 'completed') is False
+    assert _transition(db, 'pi_1', 'failed') is False
+
+    assert db.session.get(Payment, payment.id).status == 'completed'
+    assert (user.subscription_state, user.subscription_payment_id) == ('active', payment.id)
+    assert OutboxEvent.query.filter_by(aggregate_id='pi_1').count() == 1
+
+def test_refund_only_follows_completion(db, make_user, make_payment):
+    user, _ = make_user()
+    make_payment(user, 'pi_1')
+
+    assert _transition(db, 'pi_1', 'refunded') is False
+    assert _transition(db, 'pi_1', 'completed') is True
+    assert _transition(db, 'pi_1', 'refunded') is True
+    assert _transition(db, 'pi_1', 'completed') is False
+
+def test_refund_revokes_the_subscription_it_paid_for_and_pauses_campaigns(db, make_user, make_payment):
+    user, _ = make_user()
+    make_payment(user, 'pi_1')
+    _transition(db, 'pi_1', 'completed')
+    campaign = MarketingCampaign(user_id=user.id, name='Launch', platform='google',
+                                 campaign_type='brand_awareness', budget=5000, status='active')
+    db.session.add(campaign)
+    db.session.commit()
+
+    _transition(db, 'pi_1', 'refunded')
+
+    assert user.subscription_state == 'expired'
+    assert db.session.get(MarketingCampaign, campaign.id).status == 'paused'
+
+def test_refunding_an_earlier_payment_keeps_a_renewal_of_the_same_plan(db, make_user, make_payment):
+    user, _ = make_user()
+    make_payment(user, 'pi_original')
+    renewal = make_payment(user, 'pi_renewal')
+    _transition(db, 'pi_original', 'completed')
+    _transition(db, 'pi_renewal', 'completed')
+
+    _transition(db, 'pi_original', 'refunded')
+    assert (user.subscription_state, user.subscription_payment_id) == ('active', renewal.id)
+
+    _transition(db, 'pi_renewal', 'refunded')
+    assert user.subscription_state == 'expired'
+
+def test_reconciliation_applies_settled_provider_statuses(db, make_user, make_payment):
+    user, _ = make_user()
+    for stripe_payment_id in ('pi_1', 'pi_2', 'pi_3'):
+        make_payment(user, stripe_payment_id)
+    provider = FakePaymentProvider({'pi_1': 'succeeded', 'pi_2': 'canceled'})
+
+    summary = reconcile_pending_payments(provider, batch_size=2)
+
+    assert (summary['checked'], summary['completed'], summary['failed'], summary['batches']) == (3, 1, 1, 2)
+    statuses = {payment.stripe_payment_id: payment.status for payment in Payment.query}
+    assert statuses == {'pi_1': 'completed', 'pi_2': 'failed', 'pi_3': 'pending'}
+
+def test_webhook_inbox_deduplicates_and_applies_events_in_order(db, make_user, make_payment):
+    user, _ = make_user()
+    make_payment(user, 'pi_1')
+    events = [
+        {'id': 'evt_1', 'type': 'payment_intent.succeeded', 'data': {'object': {'id': 'pi_1'}}},
+        {'id': 'evt_2', 'type': 'charge.refunded', 'data': {'object': {'payment_intent': 'pi_1'}}},
+        {'id': 'evt_1', 'type': 'payment_intent.succeeded', 'data': {'object': {'id': 'pi_1'}}}
+    ]
+
+    assert record_webhook_events(events) == 2
+    assert record_webhook_events(events[:1]) == 0
+    summary = process_webhook_inbox()
+
+    assert (summary['processed'], summary['applied']) == (2, 2)
+    assert Payment.query.filter_by(stripe_payment_id='pi_1').one().status == 'refunded'
+
+def test_webhook_signature_rejects_tampering_and_stale_timestamps():
+    payload = b'{"id": "evt_1"}'
+
+    assert verify_webhook_signature(payload, _sign(payload), SECRET)
+    assert not verify_webhook_signature(payload + b' ', _sign(payload), SECRET)
+    assert not verify_webhook_signature(payload, _sign(payload, timestamp=int(time.time()) - 3600), SECRET)
+    assert not verify_webhook_signature(payload, None, SECRET)
+
+def test_webhook_route_rejects_non_object_events(app, client):
+    app.config['PAYMENT_WEBHOOK_SECRET'] = SECRET
+    try:
+        payload = json.dumps({'events': [{'id': 'evt_1'}, 'evt_2']}).encode()
+        response = client.post('/api/webhooks/payments', data=payload, content_type='application/json',
+                               headers={'Stripe-Signature': _sign(payload)})
+    finally:
+        app.config['PAYMENT_WEBHOOK_SECRET'] = None
+
+    assert response.status_code == 400
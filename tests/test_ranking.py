@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+from src.models.property import Property
+from src.utils.ranking import claim_ranking_run, load_rankings, refresh_rankings, trending_index
+
+NOW = datetime(2026, 1, 15, 12, 0)
+
+def test_one_worker_claims_each_interval(db):
+    assert claim_ranking_run(NOW, 600) is True
+    assert claim_ranking_run(NOW + timedelta(seconds=5), 600) is False
+    assert claim_ranking_run(NOW + timedelta(seconds=600), 600) is True
+
+def test_other_workers_load_the_stored_scores_without_writing(db, make_property):
+    quiet, popular = make_property(views=1), make_property(views=500)
+    refresh_rankings(NOW)
+    stored = {prop.id: prop.popularity_score for prop in Property.query}
+
+    trending_index.__init__()
+    summary = load_rankings()
+
+    assert summary['updated'] == 0
+    assert trending_index.trending() == [popular.id, quiet.id]
+    db.session.expire_all()
+    assert {prop.id: prop.popularity_score for prop in Property.query} == stored
+
+def test_trending_skips_listings_deactivated_since_the_last_refresh(client, db, make_property):
+    kept, hidden = make_property(views=10), make_property(views=1000)
+    refresh_rankings(NOW)
+    hidden.active = False
+    db.session.commit()
+
+    response = client.get('/api/properties/trending')
+
+    assert response.status_code == 200
+    assert [prop['id'] for prop in response.get_json()['properties']] == [kept.id]
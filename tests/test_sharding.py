@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import func, select
+from src.models.property import Property
+from src.models.subscription import MarketingCampaign
+from src.utils.sharding import ShardRouter
+
+@pytest.fixture
+def router(app, tmp_path):
+    router = ShardRouter()
+    router.init_app(app, str(tmp_path / 'shards'), shard_count=3, serve_reads=True)
+    yield router
+    router.executor.shutdown()
+    for engine in router.engines:
+        engine.dispose()
+
+def _shard_ids(router, model):
+    table = model.__table__
+    return [sorted(ids) for ids in router.fan_out(lambda connection: connection.execute(select(table.c.id)).scalars().all())]
+
+def _campaign(db, user, platform, cost_spent, status='active'):
+    db.session.add(MarketingCampaign(user_id=user.id, name='Launch', platform=platform,
+                                     campaign_type='property_promotion', budget=10000, cost_spent=cost_spent,
+                                     status=status))
+    db.session.commit()
+
+def test_copy_places_rows_on_their_tenants_shard(db, router, make_user, make_property):
+    owners = [make_user()[0] for _ in range(3)]
+    props = [make_property(owner_id=owner.id) for owner in owners for _ in range(2)]
+
+    assert router.copy_from(db.engine)['property'] == 6
+
+    expected = [[] for _ in range(3)]
+    for prop in props:
+        expected[router.shard_id(prop.owner_id)].append(prop.id)
+    assert _shard_ids(router, Property) == [sorted(ids) for ids in expected]
+
+def test_recopying_drops_rows_deleted_from_the_main_database(db, router, make_user, make_property):
+    owner, _ = make_user()
+    kept, removed = make_property(owner_id=owner.id), make_property(owner_id=owner.id)
+    router.copy_from(db.engine)
+
+    db.session.delete(removed)
+    db.session.commit()
+    router.copy_from(db.engine)
+
+    assert sum(_shard_ids(router, Property), []) == [kept.id]
+
+def test_admin_stats_fan_out_matches_the_main_database(client, db, router, make_user, monkeypatch):
+    _, token = make_user(role='admin')
+    advertisers = [make_user()[0] for _ in range(4)]
+    for position, user in enumerate(advertisers):
+        _campaign(db, user, 'google' if position % 2 else 'facebook', 1000 * (position + 1),
+                  status='active' if position < 3 else 'paused')
+    expected = client.get('/api/marketing/admin/stats', headers={'Authorization': f'Bearer {token}'}).get_json()
+
+    router.copy_from(db.engine)
+    monkeypatch.setattr('src.routes.marketing.shard_router', router)
+    sharded = client.get('/api/marketing/admin/stats', headers={'Authorization': f'Bearer {token}'}).get_json()
+
+    assert sharded['overview'] == expected['overview'] == {
+        'total_campaigns': 4, 'active_campaigns': 3, 'total_spent': 100.0, 'currency': 'AED'
+    }
+    key = lambda stat: stat['platform']
+    assert sorted(sharded['platform_distribution'], key=key) == sorted(expected['platform_distribution'], key=key)
+    assert sum(router.fan_out(lambda connection: connection.execute(
+        select(func.count()).select_from(MarketingCampaign.__table__)).scalar())) == 4
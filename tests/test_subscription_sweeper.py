@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from src.models.subscription import MarketingCampaign
+from src.models.user import User
+from src.utils.subscription_sweeper import backfill_subscription_state, sweep_expired_subscriptions
+
+NOW = datetime(2026, 1, 15)
+
+def _campaign(db, user, status='active'):
+    campaign = MarketingCampaign(
+        user_id=user.id, name='Launch', platform='facebook', campaign_type='property_promotion',
+        budget=10000, status=status
+    )
+    db.session.add(campaign)
+    db.session.commit()
+    return campaign
+
+def test_sweep_expires_lapsed_subscriptions_and_pauses_their_campaigns(db, make_user):
+    lapsed, _ = make_user(subscription_type='basic', subscription_state='active', subscription_end=NOW - timedelta(days=1))
+    current, _ = make_user(subscription_type='basic', subscription_state='active', subscription_end=NOW + timedelta(days=1))
+    lapsed_campaign = _campaign(db, lapsed)
+    current_campaign = _campaign(db, current)
+
+    summary = sweep_expired_subscriptions(now=NOW)
+
+    assert summary['users_expired'] == 1
+    assert summary['campaigns_paused'] == 1
+    db.session.expire_all()
+    assert lapsed.subscription_state == 'expired'
+    assert current.subscription_state == 'active'
+    assert db.session.get(MarketingCampaign, lapsed_campaign.id).status == 'paused'
+    assert db.session.get(MarketingCampaign, current_campaign.id).status == 'active'
+
+def test_sweep_pages_through_batches_and_is_idempotent(db, make_user):
+    for _ in range(5):
+        make_user(subscription_type='trial', subscription_state='trial', subscription_end=NOW - timedelta(hours=1))
+
+    first = sweep_expired_subscriptions(now=NOW, batch_size=2)
+    second = sweep_expired_subscriptions(now=NOW, batch_size=2)
+
+    assert first['users_expired'] == 5
+    assert first['batches'] == 3
+    assert second['users_expired'] == 0
+
+def test_backfill_derives_state_for_paying_users_left_on_the_default(db, make_user):
+    active, _ = make_user(subscription_type='premium', subscription_state='free', subscription_end=NOW + timedelta(days=10))
+    lapsed, _ = make_user(subscription_type='premium', subscription_end=NOW - timedelta(days=10))
+    free, _ = make_user(subscription_type='free')
+    # Rows from before the column existed
+    User.query.filter(User.id.in_([lapsed.id, free.id])).update({'subscription_state': None}, synchronize_session=False)
+    db.session.commit()
+
+    assert backfill_subscription_state(now=NOW) == 3
+    db.session.expire_all()
+    assert (active.subscription_state, lapsed.subscription_state, free.subscription_state) == ('active', 'expired', 'free')
+    assert active.get_subscription_status()['can_list'] is True
+    assert lapsed.get_subscription_status()['type'] == 'expired'
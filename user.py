@@ -1,19 +1,28 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import secrets
+import re
 
 db = SQLAlchemy()
 
+def normalize_phone(phone):
+    """Digits of a phone number, so '+971 50-123' and '97150123' match the same prefix"""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits or None
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
+    username_lower = db.Column(db.String(80), nullable=True, index=True)  # Case-insensitive prefix search
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     
     # Profile information
     full_name = db.Column(db.String(200), nullable=True)
     phone = db.Column(db.String(20), nullable=True)
+    phone_digits = db.Column(db.String(20), nullable=True, index=True)  # Digits only, for prefix search
     avatar = db.Column(db.String(500), nullable=True)
     bio = db.Column(db.Text, nullable=True)
     
@@ -27,6 +36,8 @@ class User(db.Model):
     subscription_start = db.Column(db.DateTime, nullable=True)
     subscription_end = db.Column(db.DateTime, nullable=True)
     free_trial_used = db.Column(db.Boolean, default=False)
+    subscription_state = db.Column(db.String(20), default='free')  # free, trial, active, expired (kept by the sweeper)
+    subscription_payment_id = db.Column(db.Integer, nullable=True)  # Payment.id that bought the current subscription
     
     # Authentication tokens
     auth_token = db.Column(db.String(255), nullable=True)
@@ -46,6 +57,22 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = db.Column(db.DateTime, nullable=True)
     
+    # Range scan used by the subscription sweeper; keyset paging of the filtered admin directory
+    __table_args__ = (
+        db.Index('ix_user_subscription_state_end', 'subscription_state', 'subscription_end'),
+        db.Index('ix_user_role_subscription_type', 'role', 'subscription_type', 'id'),
+    )
+    
+    @validates('username')
+    def _set_username_lower(self, key, value):
+        self.username_lower = value.lower() if value else None
+        return value
+    
+    @validates('phone')
+    def _set_phone_digits(self, key, value):
+        self.phone_digits = normalize_phone(value)
+        return value
+    
     def __repr__(self):
         return f'<User {self.username}>'
     
@@ -76,7 +103,7 @@ class User(db.Model):
     
     def has_active_subscription(self):
         """Check if user has an active subscription"""
-        if self.subscription_type == 'free':
+        if self.subscription_type == 'free' or self.subscription_state == 'expired':
             return False
         if not self.subscription_end:
             return False
@@ -89,8 +116,9 @@ class User(db.Model):
         return self.has_active_subscription() or not self.free_trial_used
     
     def get_subscription_status(self):
-        """Get detailed subscription status"""
-        if self.subscription_type == 'free':
+        """Get detailed subscription status from the stored state (kept current by the sweeper)"""
+        state = self.subscription_state or 'free'
+        if state == 'free':
             if not self.free_trial_used:
                 return {
                     'type': 'free_trial_available',
@@ -104,8 +132,8 @@ class User(db.Model):
                     'can_list': False
                 }
         
-        if self.has_active_subscription():
-            days_left = (self.subscription_end - datetime.utcnow()).days
+        if state in ('trial', 'active'):
+            days_left = max((self.subscription_end - datetime.utcnow()).days, 0) if self.subscription_end else 0
             return {
                 'type': self.subscription_type,
                 'message': f'{self.subscription_type.title()} subscription - {days_left} days left',
@@ -125,15 +153,25 @@ class User(db.Model):
             self.subscription_type = 'trial'
             self.subscription_start = datetime.utcnow()
             self.subscription_end = datetime.utcnow() + timedelta(days=7)
+            self.subscription_state = 'trial'
+            self.subscription_payment_id = None
             self.free_trial_used = True
             return True
         return False
     
-    def upgrade_subscription(self, subscription_type, duration_months=1):
-        """Upgrade user subscription"""
+    def upgrade_subscription(self, subscription_type, duration_months=1, payment_id=None):
+        """Upgrade user subscription (payment_id: the payment that bought it, so refunding it can revoke it)"""
         self.subscription_type = subscription_type
         self.subscription_start = datetime.utcnow()
         self.subscription_end = datetime.utcnow() + timedelta(days=30 * duration_months)
+        self.subscription_state = 'active'
+        self.subscription_payment_id = payment_id
+    
+    def expire_subscription(self, now=None):
+        """End the current subscription immediately (e.g. after its payment is refunded)"""
+        now = now or datetime.utcnow()
+        self.subscription_end = now
+        self.subscription_state = 'expired'
     
     def to_dict(self, include_sensitive=False):
         data = {
@@ -150,16 +188,16 @@ class User(db.Model):
             'subscription_type': self.subscription_type,
             'marketing_enabled': self.marketing_enabled,
             'social_media_promotion': self.social_media_promotion,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None,
+            'created_at': self.created_at,
+            'last_login': self.last_login,
             'subscription_status': self.get_subscription_status()
         }
         
         if include_sensitive:
             data.update({
                 'auth_token': self.auth_token,
-                'subscription_start': self.subscription_start.isoformat() if self.subscription_start else None,
-                'subscription_end': self.subscription_end.isoformat() if self.subscription_end else None,
+                'subscription_start': self.subscription_start,
+                'subscription_end': self.subscription_end,
                 'free_trial_used': self.free_trial_used
             })
         
@@ -195,8 +233,17 @@ class UserSession(db.Model):
             'user_id': self.user_id,
             'session_token': self.session_token,
             'ip_address': self.ip_address,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at,
+            'expires_at': self.expires_at,
             'is_active': self.is_active
         }
 
+class StreamTicket(db.Model):
+    """Single-use, short-lived credential for opening an event stream (EventSource cannot send headers)"""
+    ticket_hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the ticket; the ticket itself is not stored
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<StreamTicket {self.user_id}:{self.ticket_hash[:8]}>'
+
@@ -0,0 +1,115 @@
+import threading
+import time
+from sqlalchemy import and_, func, or_, select, update
+from src.models.user import db, User, normalize_phone
+
+SEARCH_FIELDS = ('email', 'username', 'phone')
+FILTERS = ('role', 'subscription_type', 'is_active')
+MAX_PAGE_SIZE = 100
+COUNT_CAP = 10000  # Totals above this are reported as estimates instead of counted exactly
+COUNT_TTL = 60
+
+_PREFIX_COLUMNS = {
+    'email': User.email,  # Stored lower-case, already uniquely indexed
+    'username': User.username_lower,
+    'phone': User.phone_digits
+}
+
+def detect_field(query):
+    if '@' in query:
+        return 'email'
+    if normalize_phone(query) and not any(char.isalpha() for char in query):
+        return 'phone'
+    return 'username'
+
+def _normalize(field, query):
+    return normalize_phone(query) if field == 'phone' else query.strip().lower()
+
+def _prefix_range(column, prefix):
+    # A half-open range is an index range scan on every backend; LIKE 'x%' is not (collation, case rules)
+    return and_(column >= prefix, column < prefix + '\U0010ffff')
+
+class CountCache:
+    """Short-lived cache of capped result counts, keyed by the normalized search"""
+
+    def __init__(self, ttl=COUNT_TTL, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                return entry[0]
+
+        value = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (value, now + self.ttl)
+        return value
+
+count_cache = CountCache()
+
+def search_users(query=None, field=None, filters=None, cursor=None, limit=20):
+    """One page of matching users plus a cached total; returns (users, next_cursor, total, total_is_estimate)"""
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    conditions = [getattr(User, name) == value for name, value in sorted(filters.items())]
+
+    prefix = None
+    if query:
+        field = field or detect_field(query)
+        prefix = _normalize(field, query)
+    if prefix:
+        column = _PREFIX_COLUMNS[field]
+        conditions.append(_prefix_range(column, prefix))
+        order_by = (column, User.id)
+    else:
+        field = None
+        column = None
+        order_by = (User.id.desc(),)
+
+    page = User.query.filter(*conditions)
+    if cursor:
+        if column is not None:
+            value, user_id = cursor.rsplit('|', 1)
+            page = page.filter(or_(column > value, and_(column == value, User.id > int(user_id))))
+        else:
+            page = page.filter(User.id < int(cursor))
+
+    users = page.order_by(*order_by).limit(limit + 1).all()
+    next_cursor = None
+    if len(users) > limit:
+        last = users[limit - 1]
+        next_cursor = f'{getattr(last, column.key)}|{last.id}' if column is not None else str(last.id)
+
+    def count():
+        # Counting stops at the cap, so a one-letter prefix over millions of rows stays cheap
+        capped = select(User.id).where(*conditions).limit(COUNT_CAP + 1).subquery()
+        return db.session.execute(select(func.count()).select_from(capped)).scalar()
+
+    total = count_cache.get((field, prefix, tuple(sorted(filters.items()))), count)
+    return users[:limit], next_cursor, min(total, COUNT_CAP), total > COUNT_CAP
+
+def backfill_search_columns(batch_size=5000):
+    """Fill username_lower and phone_digits for rows written before the columns existed"""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(User.id, User.username, User.phone).filter(
+            User.id > last_id, User.username_lower.is_(None)
+        ).order_by(User.id).limit(batch_size).all()
+        if not rows:
+            return updated
+        db.session.execute(update(User), [
+            {'id': user_id, 'username_lower': username.lower(), 'phone_digits': normalize_phone(phone)}
+            for user_id, username, phone in rows
+        ])
+        db.session.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
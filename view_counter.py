@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from sqlalchemy import text
+from src.models.user import db
+from src.utils.append_log import AppendLog
+
+INCREMENT_VIEWS_SQL = text('UPDATE property SET views = COALESCE(views, 0) + :increment WHERE id = :property_id')
+
+# A client's repeat views of one listing count once per window, and at most this many listings per minute
+VIEW_DEDUP_SECONDS = 1800
+MAX_VIEWS_PER_CLIENT_MINUTE = 60
+MAX_TRACKED_CLIENT_VIEWS = 100000
+
+class ViewCounter:
+    """Buffers property view increments in memory and an append log, flushed in batches"""
+
+    def __init__(self):
+        self.log_dir = None
+        self.flush_interval = 5
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.pending = Counter()
+        self._log = None
+        self._recent_views = OrderedDict()  # (client, property_id) -> monotonic expiry
+        self._client_minutes = {}  # client -> (minute, views counted in it)
+
+    def init_app(self, app, log_dir, flush_interval=5):
+        """Configure only; start() adopts orphaned logs and runs the flusher"""
+        self.log_dir = log_dir
+        self.flush_interval = flush_interval
+
+    def _allow(self, client, property_id, now):
+        """Per-client dedup and rate limit; called with the lock held"""
+        while self._recent_views:
+            key, expires_at = next(iter(self._recent_views.items()))
+            if expires_at > now and len(self._recent_views) < MAX_TRACKED_CLIENT_VIEWS:
+                break
+            self._recent_views.popitem(last=False)
+
+        key = (client, property_id)
+        if key in self._recent_views:
+            return False
+
+        minute = int(now // 60)
+        window, views = self._client_minutes.get(client, (minute, 0))
+        if window != minute:
+            views = 0
+            if len(self._client_minutes) >= MAX_TRACKED_CLIENT_VIEWS:
+                self._client_minutes = {c: v for c, v in self._client_minutes.items() if v[0] == minute}
+        if views >= MAX_VIEWS_PER_CLIENT_MINUTE:
+            return False
+
+        self._client_minutes[client] = (minute, views + 1)
+        self._recent_views[key] = now + VIEW_DEDUP_SECONDS
+        return True
+
+    def record(self, property_id, count=1, client=None):
+        """Count a view (unless the client is repeating or over its limit); returns whether it counted"""
+        with self._lock:
+            if client is not None and not self._allow(client, property_id, time.monotonic()):
+                return False
+            self.pending[property_id] += count
+            log = self._append_log()
+            if log is not None:
+                log.append(f'{property_id} {count}')
+            return True
+
+    def _append_log(self):
+        """Opened on the first recorded view, so CLI commands and benchmarks leave no lock or log files
+
+        Called with the lock held; None before init_app.
+        """
+        if self._log is None and self.log_dir is not None:
+            self._log = AppendLog(self.log_dir, 'views')
+        return self._log
+
+    def recover(self):
+        """Adopt logs left behind by workers that exited before flushing"""
+        recovered = Counter()
+        with self._lock:
+            log = self._append_log()
+        for line in log.recover():
+            parts = line.split()
+            if len(parts) == 2:
+                recovered[int(parts[0])] += int(parts[1])
+
+        if recovered:
+            with self._lock:
+                self.pending.update(recovered)
+        return sum(recovered.values())
+
+    def sync_log(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.sync()
+
+    def flush(self):
+        """Apply buffered increments with one batched UPDATE; returns rows touched"""
+        with self._flush_lock:
+            with self._lock:
+                if not self.pending:
+                    return 0
+                batch = self.pending
+                self.pending = Counter()
+                if self._log is not None:
+                    self._log.rotate()
+
+            try:
+                db.session.execute(INCREMENT_VIEWS_SQL, [
+                    {'property_id': property_id, 'increment': increment}
+                    for property_id, increment in batch.items()
+                ])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # Keep the counts; the claimed log files stay until a flush succeeds
+                with self._lock:
+                    self.pending.update(batch)
+                raise
+
+            if self._log is not None:
+                self._log.confirm()
+            # Cached details keep their count until the TTL: evicting every viewed listing would evict the hottest ones
+            return len(batch)
+
+    def pending_for(self, property_id):
+        with self._lock:
+            return self.pending.get(property_id, 0)
+
+    def start(self, app):
+        """Adopt orphaned logs and flush periodically in a daemon thread (not at all when the interval is 0)"""
+        if self.flush_interval <= 0:
+            return None
+        self.recover()
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.wait(self.flush_interval):
+                with app.app_context():
+                    try:
+                        self.sync_log()
+                        self.flush()
+                    except Exception as e:
+                        app.logger.error('View counter flush failed: %s', e)
+                    finally:
+                        db.session.remove()
+
+        thread = threading.Thread(target=run, name='view-counter', daemon=True)
+        thread.start()
+        return stop_event
+
+view_counter = ViewCounter()
@@ -0,0 +1,39 @@
+from flask import Blueprint, current_app, request, jsonify
+from src.models.user import db
+from src.utils.payment_reconciliation import record_webhook_events, verify_webhook_signature
+
+webhooks_bp = Blueprint('webhooks', __name__)
+
+@webhooks_bp.route('/payments', methods=['POST'])
+def payment_webhook():
+    """Receive payment provider events into the deduplicating inbox"""
+    try:
+        secret = current_app.config.get('PAYMENT_WEBHOOK_SECRET')
+        if not secret:
+            return jsonify({'error': 'Payment webhooks are not configured'}), 503
+
+        # Verify against the raw body before trusting anything in it
+        payload = request.get_data()
+        if not verify_webhook_signature(payload, request.headers.get('Stripe-Signature'), secret):
+            return jsonify({'error': 'Invalid signature'}), 401
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Invalid payload'}), 400
+
+        # Accept a single event or a batch of events
+        events = data.get('events') if isinstance(data.get('events'), list) else [data]
+        if not all(isinstance(event, dict) for event in events):
+            return jsonify({'error': 'Each event must be an object'}), 400
+
+        accepted = record_webhook_events(events)
+
+        return jsonify({
+            'message': 'Events received',
+            'accepted': accepted,
+            'duplicates': len(events) - accepted
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to record webhook', 'details': str(e)}), 500
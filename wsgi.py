@@ -0,0 +1,4 @@
+"""WSGI entry point for production servers, e.g. gunicorn src.wsgi:app (without --preload, so every worker starts its own jobs)"""
+from src.main import app, start_background_jobs
+
+start_background_jobs()